@@ -23,7 +23,9 @@ a = Analysis(['src/main.py'],
                  'PIL.PngImagePlugin',  # For PNG
                  # Add other specific Pillow plugins if more formats are supported
                  'pypandoc', # Ensure pypandoc itself is found
-                 'docx',     # Ensure python-docx is found
+                 # yt_dlp and ffmpeg are imported inside functions (lazy loading); PyInstaller's
+                 # bytecode scan still finds them, listed here so they are never dropped.
+                 'yt_dlp', 'ffmpeg',
                  # Project modules (though PyInstaller often finds these via Analysis)
                  'src.config', 'src.config.settings_manager',
                  'src.conversion', 'src.conversion.converter',
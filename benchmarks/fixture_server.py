@@ -0,0 +1,106 @@
+"""
+Local HTTP server for the download benchmarks.
+
+Serves one fixture file under any number of distinct URLs (/media/<n>/<name>), so a
+batch of N downloads hits N different URLs and yt-dlp's generic extractor never
+short-circuits on an already-downloaded file. Supports HEAD and single Range requests,
+and can cap each response's rate so downloads last long enough to be observed.
+"""
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RANGE_PATTERN = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _resolve(self):
+        parts = [p for p in self.path.split('?')[0].split('/') if p]
+        if len(parts) == 3 and parts[0] == 'media':
+            path = os.path.join(self.server.fixture_dir, os.path.basename(parts[2]))
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _send_headers(self, path):
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = RANGE_PATTERN.fullmatch(self.headers.get('Range', ''))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else: # Suffix range: last N bytes
+                start = max(size - int(match.group(2)), 0)
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        content_type = 'video/mp4' if path.endswith('.mp4') else 'application/octet-stream'
+        self.send_header('Content-Type', content_type)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        return start, end
+
+    def do_HEAD(self):
+        path = self._resolve()
+        if not path:
+            self.send_error(404)
+            return
+        self._send_headers(path)
+
+    def do_GET(self):
+        path = self._resolve()
+        if not path:
+            self.send_error(404)
+            return
+        start, end = self._send_headers(path)
+        rate = self.server.bytes_per_second
+        chunk_size = min(256 * 1024, max(rate // 10, 16 * 1024)) if rate else 256 * 1024
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(remaining, chunk_size))
+                if not chunk:
+                    break
+                try:
+                    self.wfile.write(chunk)
+                except OSError: # Client went away (cancelled download)
+                    return
+                remaining -= len(chunk)
+                if rate:
+                    time.sleep(len(chunk) / rate)
+
+
+class FixtureServer:
+    """
+    Serves fixture_dir on 127.0.0.1 in a background thread (use as a context manager).
+    bytes_per_second limits each response; None serves as fast as possible.
+    """
+
+    def __init__(self, fixture_dir, port=0, bytes_per_second=None):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), _FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fixture_dir = fixture_dir
+        self.httpd.bytes_per_second = bytes_per_second
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fixture-server", daemon=True)
+
+    def url_for(self, filename, n=0):
+        return f"http://127.0.0.1:{self.httpd.server_port}/media/{n}/{filename}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,55 @@
+"""
+Synthetic fixtures for the offline benchmarks.
+
+Media is generated with ffmpeg's lavfi sources (testsrc for video, sine for audio),
+the same way the ConversionWorker example in src/ui/workers.py builds its dummy input.
+"""
+import os
+import subprocess
+
+
+def _run_ffmpeg(args):
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error"] + args, check=True, capture_output=True)
+
+
+def make_video(path, duration=2, size="320x240", rate=25):
+    """H.264/AAC MP4 with a test pattern and a sine tone."""
+    if not os.path.exists(path):
+        _run_ffmpeg(["-f", "lavfi", "-i", f"testsrc=duration={duration}:size={size}:rate={rate}",
+                     "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+                     "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path])
+    return path
+
+
+def make_audio(path, duration=5):
+    """WAV file with a sine tone."""
+    if not os.path.exists(path):
+        _run_ffmpeg(["-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}", path])
+    return path
+
+
+def make_image(path, size="1280x720"):
+    """Single test-pattern frame (format follows the file extension)."""
+    if not os.path.exists(path):
+        _run_ffmpeg(["-f", "lavfi", "-i", f"testsrc=size={size}", "-frames:v", "1", path])
+    return path
+
+
+def make_document(path, paragraphs=50):
+    """Plain-text document for the txt -> pdf path."""
+    if not os.path.exists(path):
+        with open(path, "w") as f:
+            for i in range(paragraphs):
+                f.write(f"Paragraph {i + 1}. " + "The quick brown fox jumps over the lazy dog. " * 8 + "\n\n")
+    return path
+
+
+def make_all(fixture_dir, video_duration=2, video_size="320x240"):
+    """Generates every fixture once and returns their paths keyed by kind."""
+    os.makedirs(fixture_dir, exist_ok=True)
+    return {
+        'video': make_video(os.path.join(fixture_dir, f"testsrc_{video_size}_{video_duration}s.mp4"), video_duration, video_size),
+        'audio': make_audio(os.path.join(fixture_dir, "sine_5s.wav")),
+        'image': make_image(os.path.join(fixture_dir, "testsrc_1280x720.png")),
+        'document': make_document(os.path.join(fixture_dir, "lorem.txt")),
+    }
@@ -0,0 +1,103 @@
+"""
+Multi-output conversion benchmark: one ffmpeg run with several outputs versus one task per output.
+
+The fixture video is converted to every target format twice:
+  - 'separate': one convert_video call per format, run on a pool with the app's number
+    of conversion slots, as when each format is queued as its own conversion task;
+  - 'multi': a single convert_video_multi call, which decodes the input once.
+Reported per approach: wall time, ffmpeg CPU time (summed over the ffmpeg processes)
+and peak RSS, followed by the wall time the single run saves.
+
+Examples (run from the project root):
+    python benchmarks/multi_output_benchmark.py
+    python benchmarks/multi_output_benchmark.py --formats mp4,mp3,webm --workers 1 --json multi.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import fixtures
+
+
+def _usage_collector(usages):
+    def _callback(data):
+        if data.get('status') in ('finished', 'error'):
+            usages.append(data)
+    return _callback
+
+
+def run_separate(converter, fixture_path, formats, workers, out_dir):
+    usages = []
+    callback = _usage_collector(usages)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda fmt: converter.convert_video(fixture_path, os.path.join(out_dir, f"out.{fmt}"), fmt, None, callback), formats))
+    return time.perf_counter() - started, all(success for success, _ in results), usages
+
+
+def run_multi(converter, fixture_path, formats, out_dir):
+    usages = []
+    started = time.perf_counter()
+    success, _ = converter.convert_video_multi(fixture_path, [(os.path.join(out_dir, f"out.{fmt}"), fmt, None) for fmt in formats], _usage_collector(usages))
+    return time.perf_counter() - started, success, usages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-decode multi-output conversion versus one conversion per output.")
+    parser.add_argument("--formats", default="mp4,mp3,webm", help="Comma-separated target formats (default: mp4,mp3,webm)")
+    parser.add_argument("--workers", type=int, default=2, help="Parallel separate conversions (default: 2, the app default)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per approach; the fastest is reported (default: 3)")
+    parser.add_argument("--fixture-dir", default=os.path.join(tempfile.gettempdir(), "versadownloader_bench_fixtures"), help="Where fixtures are generated and cached")
+    parser.add_argument("--video-size", default="1280x720", help="Fixture video resolution (default: 1280x720)")
+    parser.add_argument("--video-duration", type=int, default=10, help="Fixture video duration in seconds (default: 10)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    from src.conversion import converter
+    formats = [f.strip().lower() for f in args.formats.split(',') if f.strip()]
+    fixture_path = fixtures.make_all(args.fixture_dir, args.video_duration, args.video_size)['video']
+    results = {}
+    for approach in ('separate', 'multi'):
+        best = None
+        for _ in range(args.repeat):
+            out_dir = tempfile.mkdtemp(prefix=f"bench_multi_{approach}_")
+            try:
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    if approach == 'separate':
+                        wall, success, usages = run_separate(converter, fixture_path, formats, args.workers, out_dir)
+                    else:
+                        wall, success, usages = run_multi(converter, fixture_path, formats, out_dir)
+            finally:
+                shutil.rmtree(out_dir, ignore_errors=True)
+            if not success:
+                raise RuntimeError(f"'{approach}' conversion failed: {[u.get('message') for u in usages if u.get('status') == 'error']}")
+            run = {'wall_s': wall, 'ffmpeg_runs': len(usages),
+                   'cpu_s': sum(u.get('cpu_seconds') or 0 for u in usages),
+                   'peak_rss_mb': max((u.get('peak_rss_bytes') or 0) for u in usages) / 1e6}
+            if best is None or run['wall_s'] < best['wall_s']:
+                best = run
+        results[approach] = best
+        print(f"{approach:<9} {best['ffmpeg_runs']} ffmpeg run(s)  wall {best['wall_s']:6.2f} s  ffmpeg CPU {best['cpu_s']:6.2f} s"
+              f"  peak RSS {best['peak_rss_mb']:6.0f} MB", flush=True)
+
+    saved = results['separate']['wall_s'] - results['multi']['wall_s']
+    print(f"\nOne run for {', '.join(formats)} saves {saved:.2f} s wall time ({saved / results['separate']['wall_s'] * 100:.0f}%)"
+          f" and {results['separate']['cpu_s'] - results['multi']['cpu_s']:.2f} s CPU against {len(formats)} separate tasks on {args.workers} slot(s).")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'fixture': {'file': os.path.basename(fixture_path), 'bytes': os.path.getsize(fixture_path)},
+                       'formats': formats, 'workers': args.workers, 'results': results, 'wall_saved_s': saved}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Offline throughput/latency benchmarks for the download and conversion engines.
+
+Everything runs locally: fixtures are generated with ffmpeg's lavfi sources and
+downloads are served by a local HTTP server, fetched through yt-dlp's generic extractor.
+Each engine function runs at every batch size with a worker pool shaped like the app's
+concurrency limits, and the results are written as JSON so runs on different
+commits can be compared.
+
+Examples (run from the project root):
+    python benchmarks/run_benchmarks.py --sizes 1,10,100
+    python benchmarks/run_benchmarks.py --engines convert_video,convert_image --sizes 1,10,100,1000
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import fixtures
+from fixture_server import FixtureServer
+
+ENGINES = ['download_video', 'convert_video', 'convert_image', 'convert_document']
+DEFAULT_SIZES = [1, 10, 100, 1000]
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'benchmarks', 'results')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100.0 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def ffmpeg_version():
+    try:
+        return subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True).stdout.splitlines()[0]
+    except (OSError, IndexError):
+        return 'unavailable'
+
+
+def pandoc_available():
+    try:
+        import pypandoc
+        pypandoc.get_pandoc_version()
+        return True
+    except (ImportError, OSError):
+        return False
+
+
+def make_tasks(engine, batch_size, fixture_paths, server, work_dir):
+    """Returns a list of zero-argument callables returning (success, output_path_or_message)."""
+    from src.conversion import converter
+    from src.downloading import downloader
+
+    tasks = []
+    for i in range(batch_size):
+        out_dir = os.path.join(work_dir, f"item_{i}")
+        if engine == 'download_video':
+            url = server.url_for(os.path.basename(fixture_paths['video']), i)
+            tasks.append(lambda url=url, out_dir=out_dir: downloader.download_video(
+                url, out_dir, 'best', 'mp4', ydl_opts_override={'quiet': True, 'noprogress': True}, max_retries=0))
+        elif engine == 'convert_video':
+            tasks.append(lambda out_dir=out_dir: converter.convert_video(
+                fixture_paths['video'], os.path.join(out_dir, "out.mp3"), 'mp3'))
+        elif engine == 'convert_image':
+            tasks.append(lambda out_dir=out_dir: converter.convert_image(
+                fixture_paths['image'], os.path.join(out_dir, "out.jpg"), 'jpg'))
+        elif engine == 'convert_document':
+            tasks.append(lambda out_dir=out_dir: converter.convert_document(
+                fixture_paths['document'], os.path.join(out_dir, "out.pdf"), 'pdf'))
+    return tasks
+
+
+def run_batch(tasks, workers, work_dir):
+    latencies, failures = [], []
+
+    def _timed(task):
+        start = time.perf_counter()
+        try:
+            success, detail = task()
+        except Exception as e:
+            success, detail = False, f"{type(e).__name__}: {e}"
+        return time.perf_counter() - start, success, detail
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for latency, success, detail in pool.map(_timed, tasks):
+            latencies.append(latency)
+            if not success:
+                failures.append(str(detail)[-300:])
+    wall = time.perf_counter() - wall_start
+
+    output_bytes = 0
+    for root, _, files in os.walk(work_dir):
+        output_bytes += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return wall, latencies, failures, output_bytes
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {(r['engine'], r['batch_size']): r for r in baseline['results']}
+    print(f"\nComparison with {baseline_path} ({baseline.get('revision', '?')}):")
+    for r in current['results']:
+        before = old.get((r['engine'], r['batch_size']))
+        if not before or not before['items_per_s']:
+            continue
+        change = (r['items_per_s'] - before['items_per_s']) / before['items_per_s'] * 100
+        print(f"  {r['engine']:<17} n={r['batch_size']:<5} {before['items_per_s']:9.2f} -> {r['items_per_s']:9.2f} items/s ({change:+.1f}%)"
+              f"   p50 {before['latency_s']['p50'] * 1000:.0f} -> {r['latency_s']['p50'] * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the VersaDownloader engines.")
+    parser.add_argument("--engines", default=",".join(ENGINES), help=f"Comma-separated subset of {', '.join(ENGINES)}")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated batch sizes (default: 1,10,100,1000)")
+    parser.add_argument("--download-workers", type=int, default=3, help="Parallel downloads (default: 3, the app default)")
+    parser.add_argument("--conversion-workers", type=int, default=2, help="Parallel conversions (default: 2, the app default)")
+    parser.add_argument("--fixture-dir", default=os.path.join(tempfile.gettempdir(), "versadownloader_bench_fixtures"), help="Where fixtures are generated and cached")
+    parser.add_argument("--video-size", default="320x240", help="Fixture video resolution (default: 320x240)")
+    parser.add_argument("--video-duration", type=int, default=2, help="Fixture video duration in seconds (default: 2)")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/<revision>.json)")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Show the engines' own console output")
+    args = parser.parse_args()
+
+    engines = [e.strip() for e in args.engines.split(',') if e.strip()]
+    unknown = set(engines) - set(ENGINES)
+    if unknown:
+        parser.error(f"Unknown engines: {', '.join(sorted(unknown))}")
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    if 'convert_document' in engines and not pandoc_available():
+        print("Skipping convert_document: pandoc is not installed.", file=sys.stderr)
+        engines.remove('convert_document')
+
+    fixture_paths = fixtures.make_all(args.fixture_dir, args.video_duration, args.video_size)
+    revision = git_revision()
+    report = {
+        'revision': revision, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'cpu_count': os.cpu_count(), 'ffmpeg': ffmpeg_version()},
+        'fixtures': {kind: {'file': os.path.basename(p), 'bytes': os.path.getsize(p)} for kind, p in fixture_paths.items()},
+        'results': [],
+    }
+
+    with FixtureServer(args.fixture_dir) as server:
+        for engine in engines:
+            workers = args.download_workers if engine == 'download_video' else args.conversion_workers
+            for batch_size in sizes:
+                work_dir = tempfile.mkdtemp(prefix=f"bench_{engine}_")
+                try:
+                    tasks = make_tasks(engine, batch_size, fixture_paths, server, work_dir)
+                    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+                        wall, latencies, failures, output_bytes = run_batch(tasks, workers, work_dir)
+                finally:
+                    shutil.rmtree(work_dir, ignore_errors=True)
+                result = {
+                    'engine': engine, 'batch_size': batch_size, 'workers': workers, 'wall_s': wall,
+                    'items_per_s': batch_size / wall if wall else 0.0, 'mb_per_s': output_bytes / wall / 1e6 if wall else 0.0,
+                    'latency_s': {'p50': percentile(latencies, 50), 'p90': percentile(latencies, 90),
+                                  'p99': percentile(latencies, 99), 'max': max(latencies)},
+                    'failures': len(failures), 'failure_samples': failures[:3],
+                }
+                report['results'].append(result)
+                print(f"{engine:<17} n={batch_size:<5} {result['items_per_s']:9.2f} items/s  {result['mb_per_s']:7.2f} MB/s"
+                      f"  p50 {result['latency_s']['p50'] * 1000:7.0f} ms  p99 {result['latency_s']['p99'] * 1000:7.0f} ms"
+                      f"  failures {len(failures)}", flush=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{revision}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
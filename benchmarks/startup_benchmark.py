@@ -0,0 +1,135 @@
+"""
+Start-up benchmark: time from process launch to the main window being shown.
+
+Runs the app (from source or a frozen PyInstaller build) several times with
+VERSADOWNLOADER_STARTUP_PROBE set, which makes src/main.py record the moment the
+window is shown and exit. Optionally compares against a baseline (another git
+revision, or another frozen executable) and prints an `-X importtime` breakdown
+of the GUI import chain.
+
+Examples (run from the project root):
+    python benchmarks/startup_benchmark.py --runs 7 --importtime
+    python benchmarks/startup_benchmark.py --baseline-ref HEAD~1
+    python benchmarks/startup_benchmark.py --executable dist/VersaDownloaderApp/VersaDownloader \\
+        --baseline-executable old_dist/VersaDownloaderApp/VersaDownloader --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROBE_ENV = 'VERSADOWNLOADER_STARTUP_PROBE'
+HEAVY_BACKENDS = ['yt_dlp', 'ffmpeg', 'PIL', 'docx', 'pypandoc', 'plyer']
+
+
+def time_to_first_window(command, cwd, runs, timeout=120):
+    """Launches `command` `runs` times and returns the list of launch-to-window times in seconds."""
+    samples = []
+    for _ in range(runs):
+        fd, probe_file = tempfile.mkstemp(prefix="startup_probe_")
+        os.close(fd)
+        os.remove(probe_file)
+        env = dict(os.environ, **{PROBE_ENV: probe_file})
+        launched_at = time.time()
+        proc = subprocess.run(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=timeout)
+        try:
+            with open(probe_file) as f:
+                shown_at = float(f.read())
+        except (OSError, ValueError):
+            raise RuntimeError(f"{' '.join(command)} exited with {proc.returncode} without showing a window:\n{proc.stderr.decode(errors='replace')[-2000:]}")
+        finally:
+            if os.path.exists(probe_file):
+                os.remove(probe_file)
+        samples.append(shown_at - launched_at)
+    return samples
+
+
+def import_breakdown(cwd, top=15):
+    """Runs `python -X importtime` on the GUI import chain and returns (total_us, top modules, heavy backends loaded)."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import src.ui.main_window'],
+                          cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace('import time:', '|', 1).split('|')]
+        rows.append((int(cumulative_us), int(self_us), name))
+    total_us = sum(self_us for _, self_us, _ in rows)
+    loaded = sorted({name.split('.')[0] for _, _, name in rows} & set(HEAVY_BACKENDS))
+    top_rows = sorted(rows, reverse=True)[:top]
+    return total_us, top_rows, loaded
+
+
+def summarize(label, samples):
+    summary = {
+        'label': label, 'runs': len(samples),
+        'median_s': statistics.median(samples), 'min_s': min(samples), 'max_s': max(samples),
+        'samples_s': samples,
+    }
+    print(f"{label:>10}: median {summary['median_s']:.3f}s  min {summary['min_s']:.3f}s  max {summary['max_s']:.3f}s  ({len(samples)} runs)")
+    return summary
+
+
+def checkout_ref(ref):
+    worktree = tempfile.mkdtemp(prefix="startup_baseline_")
+    subprocess.run(['git', 'worktree', 'add', '--detach', worktree, ref], cwd=PROJECT_ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return worktree
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure VersaDownloader time-to-first-window.")
+    parser.add_argument("--runs", type=int, default=5, help="Launches per configuration (default: 5)")
+    parser.add_argument("--executable", help="Frozen build to measure instead of running from source")
+    parser.add_argument("--baseline-executable", help="Frozen build to compare against")
+    parser.add_argument("--baseline-ref", help="Git revision to compare against when running from source")
+    parser.add_argument("--importtime", action="store_true", help="Print an -X importtime breakdown of the GUI import chain")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {'configurations': []}
+    baseline_tree = None
+    try:
+        if args.executable:
+            results['configurations'].append(summarize('current', time_to_first_window([args.executable], PROJECT_ROOT, args.runs)))
+            if args.baseline_executable:
+                results['configurations'].append(summarize('baseline', time_to_first_window([args.baseline_executable], PROJECT_ROOT, args.runs)))
+        else:
+            source_cmd = [sys.executable, '-m', 'src.main']
+            results['configurations'].append(summarize('current', time_to_first_window(source_cmd, PROJECT_ROOT, args.runs)))
+            if args.baseline_ref:
+                baseline_tree = checkout_ref(args.baseline_ref)
+                results['configurations'].append(summarize('baseline', time_to_first_window(source_cmd, baseline_tree, args.runs)))
+
+        if len(results['configurations']) == 2:
+            current, baseline = (c['median_s'] for c in results['configurations'])
+            results['reduction_s'] = baseline - current
+            results['reduction_pct'] = (baseline - current) / baseline * 100 if baseline else 0.0
+            print(f"Time-to-first-window reduced by {results['reduction_s']:.3f}s ({results['reduction_pct']:.1f}%)")
+
+        if args.importtime:
+            for label, tree in [('current', PROJECT_ROOT)] + ([('baseline', baseline_tree)] if baseline_tree else []):
+                total_us, top_rows, loaded = import_breakdown(tree)
+                results[f'importtime_{label}'] = {'total_us': total_us, 'heavy_backends_loaded': loaded,
+                                                  'top': [{'module': n, 'cumulative_us': c, 'self_us': s} for c, s, n in top_rows]}
+                print(f"\n-X importtime ({label}): {total_us / 1000:.1f} ms total, heavy backends loaded at import: {', '.join(loaded) or 'none'}")
+                for cumulative_us, self_us, name in top_rows:
+                    print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+    finally:
+        if baseline_tree:
+            subprocess.run(['git', 'worktree', 'remove', '--force', baseline_tree], cwd=PROJECT_ROOT,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+UI responsiveness benchmark: event-loop latency of the main window while many downloads run.
+
+For each download worker mode ('thread': yt-dlp in QThreads of the GUI process,
+'process': DownloadProcessPool worker processes), a fresh process opens the main
+window offscreen, queues N downloads from the local fixture server (rate-limited so
+they overlap) with N download slots, and runs a 5 ms heartbeat timer on the GUI
+thread until every download has finished. The lateness of each heartbeat is the time
+the UI could not react to input. Reported per mode: heartbeat lag percentiles, the
+number of heartbeats late by more than one 60 Hz frame, wall time and the CPU time
+spent in the GUI process.
+
+Examples (run from the project root):
+    python benchmarks/ui_responsiveness_benchmark.py
+    python benchmarks/ui_responsiveness_benchmark.py --downloads 16 --rate 4000000 --json ui.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+import fixtures
+from fixture_server import FixtureServer
+from run_benchmarks import percentile
+
+MODES = ['thread', 'process']
+HEARTBEAT_MS = 5
+# One frame at 60 Hz; a heartbeat later than this is a visible stall.
+FRAME_MS = 1000 / 60
+# Downloads still running after this long are reported as unfinished.
+RUN_TIMEOUT = 300
+
+
+def run_mode(mode, downloads, fixture_path, fixture_dir, rate):
+    """Runs one measurement in this process and returns its result dict."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    os.environ.setdefault('VERSADOWNLOADER_CACHE_DIR', tempfile.mkdtemp(prefix="bench_ui_cache_"))
+    from PyQt6.QtCore import QTimer, Qt
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    from src.scheduling.scheduler import estimate_download_cost, PRIORITY_NORMAL
+    from src.ui.main_window import MainWindow
+
+    out_dir = tempfile.mkdtemp(prefix=f"bench_ui_{mode}_")
+    window = MainWindow()
+    window.download_worker_mode = mode
+    window.download_tuner = None # Measure a fixed number of parallel downloads
+    window.MAX_CONCURRENT_DOWNLOADS = downloads
+    lags, heartbeat = [], {'last': None}
+    finished_states = ('completed', 'failed', 'cancelled')
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+
+    with FixtureServer(fixture_dir, bytes_per_second=rate) as server:
+        rows = []
+        for i in range(downloads):
+            task_id = window.generate_task_id(); url = server.url_for(os.path.basename(fixture_path), i)
+            window._add_task('download', task_id, {'url': url, 'type': 'Video Download', 'status': 'queued', 'quality': 'best', 'format': 'mp4',
+                                                  'output_path': os.path.join(out_dir, f"item_{i}"), 'title': url, 'enqueued_at': time.time(), 'priority': PRIORITY_NORMAL})
+            window.scheduler.submit(task_id, 'download', estimate_download_cost('best', 'mp4'), PRIORITY_NORMAL)
+            rows.append((task_id, url, "Video Download", "Queued"))
+        window.add_table_rows(rows)
+
+        def _beat():
+            now = time.perf_counter()
+            if heartbeat['last'] is not None:
+                lags.append(max((now - heartbeat['last']) * 1000 - HEARTBEAT_MS, 0.0))
+            heartbeat['last'] = now
+            states = [t['status'] for t in window.download_queue.values()]
+            if all(s in finished_states for s in states) or now - started > RUN_TIMEOUT:
+                app.quit()
+
+        timer = QTimer(); timer.setTimerType(Qt.TimerType.PreciseTimer); timer.timeout.connect(_beat); timer.start(HEARTBEAT_MS)
+        window.schedule_tasks()
+        app.exec()
+
+    wall = time.perf_counter() - started
+    gui_cpu = time.process_time() - cpu_started
+    states = [t['status'] for t in window.download_queue.values()]
+    if window.download_pool:
+        window.download_pool.shutdown()
+    shutil.rmtree(out_dir, ignore_errors=True)
+    return {
+        'mode': mode, 'downloads': downloads, 'completed': states.count('completed'), 'wall_s': wall,
+        'gui_cpu_s': gui_cpu,
+        'heartbeats': len(lags), 'late_frames': sum(1 for lag in lags if lag > FRAME_MS),
+        'lag_ms': {'p50': percentile(lags, 50), 'p95': percentile(lags, 95), 'p99': percentile(lags, 99), 'max': max(lags)} if lags else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Main-window event-loop latency with many concurrent downloads.")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated download worker modes (default: thread,process)")
+    parser.add_argument("--downloads", type=int, default=12, help="Concurrent downloads (default: 12)")
+    parser.add_argument("--rate", type=int, default=2_000_000, help="Bytes per second served per download (default: 2000000)")
+    parser.add_argument("--fixture-dir", default=os.path.join(tempfile.gettempdir(), "versadownloader_bench_fixtures"), help="Where fixtures are generated and cached")
+    parser.add_argument("--video-size", default="1280x720", help="Fixture video resolution (default: 1280x720)")
+    parser.add_argument("--video-duration", type=int, default=20, help="Fixture video duration in seconds (default: 20)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--run-mode", help=argparse.SUPPRESS) # Internal: measure one mode in this process
+    args = parser.parse_args()
+
+    fixture_path = fixtures.make_all(args.fixture_dir, args.video_duration, args.video_size)['video']
+    if args.run_mode:
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull # The app prints progress messages
+            try:
+                result = run_mode(args.run_mode, args.downloads, fixture_path, args.fixture_dir, args.rate)
+            finally:
+                sys.stdout = stdout
+        print(json.dumps(result))
+        return
+
+    results = []
+    for mode in [m.strip() for m in args.modes.split(',') if m.strip()]:
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-mode', mode, '--downloads', str(args.downloads),
+                               '--rate', str(args.rate), '--fixture-dir', args.fixture_dir, '--video-size', args.video_size,
+                               '--video-duration', str(args.video_duration)],
+                              cwd=PROJECT_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Mode '{mode}' failed:\n{proc.stderr[-2000:]}")
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(result)
+        lag = result['lag_ms'] or {'p50': 0, 'p99': 0, 'max': 0}
+        print(f"{mode:<8} {result['completed']}/{result['downloads']} done in {result['wall_s']:6.1f} s"
+              f"  lag p50 {lag['p50']:6.1f} ms  p99 {lag['p99']:6.1f} ms  max {lag['max']:7.1f} ms"
+              f"  late frames {result['late_frames']:5d}/{result['heartbeats']}  GUI CPU {result['gui_cpu_s']:6.1f} s", flush=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'fixture': {'file': os.path.basename(fixture_path), 'bytes': os.path.getsize(fixture_path)}, 'rate': args.rate, 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
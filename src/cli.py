@@ -0,0 +1,259 @@
+import argparse
+import csv
+import json
+import os
+import queue
+import re
+import sys
+import time
+
+from src.conversion.converter import guess_task_subtype
+from src.engine.job_engine import JobEngine, FINAL_STATUSES
+from src.utils.output_paths import OUTPUT_LAYOUTS, DEFAULT_LAYOUT
+
+# Built-in target profiles for URL rows. File rows use the target format as the profile
+# name (e.g. 'mp3', 'png', 'pdf'). More profiles can be loaded with --profiles.
+DOWNLOAD_PROFILES = {
+    'best': {'quality': 'best', 'format': 'mp4'},
+    '1080p': {'quality': '1080p', 'format': 'mp4'},
+    '720p': {'quality': '720p', 'format': 'mp4'},
+    '480p': {'quality': '480p', 'format': 'mp4'},
+    'audio-mp3': {'quality': 'audio_only', 'format': 'mp3'},
+    'audio-m4a': {'quality': 'audio_only', 'format': 'm4a'},
+}
+URL_PATTERN = re.compile(r'^https?://', re.IGNORECASE)
+STATUS_INTERVAL = 1.0
+
+
+class ManifestError(ValueError):
+    pass
+
+
+def read_manifest(path):
+    """
+    Reads a manifest of jobs from a CSV (header row required) or JSONL file.
+
+    Each row names a source in 'url', 'input' or 'source' and optionally a 'profile',
+    'output_dir' and explicit fields ('quality', 'format', 'stream', 'output_layout', 'target_format',
+    'quality_options', 'normalize_loudness').
+
+    Returns:
+        list: (line_number, row_dict) tuples.
+
+    Raises:
+        ManifestError: If the file cannot be parsed.
+    """
+    rows = []
+    try:
+        with open(path, newline='') as f:
+            if path.lower().endswith('.csv'):
+                for line_number, row in enumerate(csv.DictReader(f), start=2):
+                    rows.append((line_number, {k.strip(): v.strip() for k, v in row.items() if k and v and v.strip()}))
+            else:
+                for line_number, line in enumerate(f, start=1):
+                    line = line.strip()
+                    if not line or line.startswith('#'):
+                        continue
+                    row = json.loads(line)
+                    if not isinstance(row, dict):
+                        raise ManifestError(f"{path}:{line_number}: expected a JSON object")
+                    rows.append((line_number, row))
+    except (OSError, ValueError, csv.Error) as e:
+        raise ManifestError(f"Could not read manifest {path}: {e}") from e
+    return rows
+
+
+def _flag(value):
+    """A boolean manifest field: JSON booleans, or 1/true/yes in CSV cells."""
+    return value.lower() in ('1', 'true', 'yes') if isinstance(value, str) else bool(value)
+
+
+def build_job_spec(row, profiles, default_output_dir):
+    """Turns a manifest row into a JobEngine job spec. Raises ManifestError for invalid rows."""
+    source = row.get('url') or row.get('input') or row.get('source')
+    if not source:
+        raise ManifestError("row has no 'url', 'input' or 'source'")
+    profile_name = row.get('profile')
+    output_dir = row.get('output_dir') or default_output_dir
+
+    if URL_PATTERN.match(source):
+        spec = {'kind': 'download', 'url': source}
+        if profile_name:
+            if profile_name not in profiles:
+                raise ManifestError(f"unknown download profile '{profile_name}'")
+            spec.update(profiles[profile_name])
+        spec.update({k: row[k] for k in ('quality', 'format', 'output_layout') if row.get(k)})
+        if spec.get('output_layout', DEFAULT_LAYOUT) not in OUTPUT_LAYOUTS:
+            raise ManifestError(f"unknown output layout '{spec['output_layout']}' (expected one of: {', '.join(OUTPUT_LAYOUTS)})")
+        if 'stream' in row:
+            spec['stream'] = _flag(row['stream'])
+        if output_dir:
+            spec['output_path'] = output_dir
+    else:
+        spec = {'kind': 'conversion', 'input_filepath': source}
+        if profile_name in profiles:
+            spec.update(profiles[profile_name])
+        elif profile_name:
+            spec['target_format'] = profile_name
+        spec.update({k: row[k] for k in ('target_format', 'quality_options') if row.get(k)})
+        if isinstance(spec.get('quality_options'), str): # CSV cells carry JSON text
+            spec['quality_options'] = json.loads(spec['quality_options'])
+        if 'normalize_loudness' in row:
+            spec['normalize_loudness'] = _flag(row['normalize_loudness'])
+        if not spec.get('target_format'):
+            raise ManifestError("conversion row needs a 'profile' or 'target_format'")
+        if not os.path.exists(source):
+            raise ManifestError(f"input file not found: {source}")
+        if not spec.get('task_subtype') and not guess_task_subtype(source):
+            raise ManifestError(f"unsupported input file type: {source}")
+        if output_dir:
+            spec['output_dir'] = output_dir
+    return spec
+
+
+def _format_eta(seconds):
+    if seconds is None:
+        return "--:--:--"
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class BatchProgress:
+    """Aggregates engine events into throughput/ETA figures for the status line."""
+
+    def __init__(self, total):
+        self.total = total
+        self.started = time.monotonic()
+        self.finished = {}
+        self.running = set()
+        self.bytes_done = 0
+        self._job_bytes = {}
+
+    def handle(self, event):
+        job_id = event.get('job_id')
+        if event.get('event') == 'progress' and event.get('downloaded_bytes') is not None:
+            previous = self._job_bytes.get(job_id, 0)
+            current = event['downloaded_bytes']
+            self.bytes_done += current - previous if current >= previous else current # A retry restarts the count
+            self._job_bytes[job_id] = current
+        elif event.get('event') == 'status':
+            if event['status'] == 'running':
+                self.running.add(job_id)
+            elif event['status'] in FINAL_STATUSES:
+                self.running.discard(job_id)
+                self.finished[job_id] = event['status']
+                filepath = event.get('filepath')
+                if filepath and job_id not in self._job_bytes and os.path.exists(filepath):
+                    self.bytes_done += os.path.getsize(filepath) # Conversions report their output size
+
+    def status_line(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        done = len(self.finished)
+        failed = sum(1 for s in self.finished.values() if s != 'completed')
+        rate = done / elapsed
+        eta = (self.total - done) / rate if rate > 0 else None
+        return (f"[{done:>{len(str(self.total))}}/{self.total}] ok {done - failed} failed {failed} | running {len(self.running)}"
+                f" | {rate * 60:.1f} jobs/min | {self.bytes_done / elapsed / 1e6:.2f} MB/s | ETA {_format_eta(eta)}")
+
+
+def write_results(path, jobs, summary):
+    records = []
+    for line_number, source, job in jobs:
+        duration = (job['finished_at'] - job['started_at']) if job.get('finished_at') and job.get('started_at') else None
+        records.append({'line': line_number, 'source': source, 'id': job.get('id'), 'kind': job.get('kind'),
+                        'status': job.get('status'), 'message': job.get('message'), 'filepath': job.get('filepath'),
+                        'queue_wait_s': (job['started_at'] - job['created_at']) if job.get('started_at') else None,
+                        'duration_s': duration})
+    with open(path, 'w') as f:
+        if path.lower().endswith('.jsonl'):
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        else:
+            json.dump({'summary': summary, 'jobs': records}, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a batch of downloads/conversions from a CSV or JSONL manifest.")
+    parser.add_argument("manifest", help="Manifest file (.csv with a header row, or .jsonl)")
+    parser.add_argument("--results", default="results.json", help="Machine-readable results file (.json or .jsonl; default: results.json)")
+    parser.add_argument("--download-jobs", type=int, default=3, help="Parallel downloads (default: 3)")
+    parser.add_argument("--convert-jobs", type=int, default=os.cpu_count() or 2, help="Parallel conversions (default: CPU count)")
+    parser.add_argument("--output-dir", help="Default output directory for rows without 'output_dir' (default: current directory)")
+    parser.add_argument("--scratch-dir", help="Fast local directory for part files and encodes in progress; finished files are moved to their output directory")
+    parser.add_argument("--profiles", help="JSON file with additional named profiles: {\"name\": {fields...}}")
+    parser.add_argument("--quiet", action="store_true", help="Do not print the status line")
+    args = parser.parse_args(argv)
+
+    profiles = dict(DOWNLOAD_PROFILES)
+    try:
+        if args.profiles:
+            with open(args.profiles) as f:
+                profiles.update(json.load(f))
+        rows = read_manifest(args.manifest)
+        specs = []
+        for line_number, row in rows:
+            try:
+                specs.append((line_number, row, build_job_spec(row, profiles, args.output_dir)))
+            except (ManifestError, ValueError) as e:
+                raise ManifestError(f"{args.manifest}:{line_number}: {e}") from e
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if not specs:
+        print(f"Error: {args.manifest} contains no jobs.", file=sys.stderr)
+        return 2
+
+    engine = JobEngine(max_concurrent_downloads=args.download_jobs, max_concurrent_conversions=args.convert_jobs,
+                       default_download_dir=args.output_dir, default_conversion_dir=args.output_dir, scratch_dir=args.scratch_dir)
+    events = engine.subscribe()
+    engine.start()
+    submitted = []
+    rejected = [] # Rows the engine refused; recorded as failed while the rest of the batch runs
+    for line_number, row, spec in specs:
+        source = spec.get('url') or spec.get('input_filepath')
+        try:
+            job = engine.submit(spec)
+        except ValueError as e:
+            print(f"{args.manifest}:{line_number}: {e}", file=sys.stderr)
+            rejected.append((line_number, source, {'id': None, 'kind': spec.get('kind'), 'status': 'failed', 'message': str(e)}))
+            continue
+        submitted.append((line_number, source, job['id']))
+
+    progress = BatchProgress(len(submitted))
+    interrupted = False
+    last_print = 0.0
+    try:
+        while len(progress.finished) < len(submitted):
+            try:
+                progress.handle(events.get(timeout=STATUS_INTERVAL))
+            except queue.Empty:
+                pass
+            if not args.quiet and time.monotonic() - last_print >= STATUS_INTERVAL:
+                last_print = time.monotonic()
+                print(progress.status_line(), file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        interrupted = True
+        print("\nInterrupted: cancelling remaining jobs...", file=sys.stderr)
+    finally:
+        engine.stop(cancel_running=True)
+
+    final_jobs = [(line_number, source, engine.get(job_id) or {'id': job_id, 'status': 'cancelled'}) for line_number, source, job_id in submitted]
+    final_jobs = sorted(final_jobs + rejected, key=lambda item: item[0])
+    counts = {}
+    for _, _, job in final_jobs:
+        counts[job['status']] = counts.get(job['status'], 0) + 1
+    elapsed = time.monotonic() - progress.started
+    summary = {'manifest': os.path.abspath(args.manifest), 'total': len(final_jobs), 'counts': counts,
+               'elapsed_s': elapsed, 'bytes': progress.bytes_done, 'interrupted': interrupted}
+    write_results(args.results, final_jobs, summary)
+
+    if not args.quiet:
+        print(progress.status_line(), file=sys.stderr)
+    print(f"{counts.get('completed', 0)}/{len(final_jobs)} jobs completed in {elapsed:.1f}s. Results written to {args.results}")
+    if interrupted:
+        return 130
+    return 0 if counts.get('completed', 0) == len(final_jobs) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
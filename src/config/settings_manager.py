@@ -1,12 +1,22 @@
+import atexit
 import json
 import os
+import threading
 from PyQt6.QtCore import QStandardPaths
 # QSettings not used for JSON, but good to remember for platform-native settings
 from ..utils.logger import setup_logger # Added
 
+# Seconds set_setting waits before writing, so a burst of changes (a dialog being applied,
+# a spin box being scrolled) ends in one write of the file.
+SAVE_DELAY = 0.5
+
 class SettingsManager:
     def __init__(self, settings_file='config/settings.json'):
         self.logger = setup_logger('SettingsManager', 'application.log') # Setup logger for this class
+        self._lock = threading.RLock() # Guards settings, the pending save timer and the subscriber list
+        self._write_lock = threading.Lock() # One write of the file at a time (timer thread, GUI thread and atexit share the .tmp file)
+        self._save_timer = None
+        self._subscribers = [] # (callback, keys or None) pairs, see subscribe()
         
         app_data_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppConfigLocation)
         if app_data_path: 
@@ -26,10 +36,20 @@ class SettingsManager:
             'max_concurrent_downloads': 3,
             'max_concurrent_conversions': 2,
             'auto_clear_completed': False,
+            'auto_tune_concurrency': False,
+            'preempt_for_urgent': True,
+            'download_worker_mode': 'thread', # 'thread' or 'process' (see DownloadProcessPool)
+            'conversion_profile': 'balanced', # Key of conversion.profiles.ENCODING_PROFILES
+            'target_size_mb': 50, # Output size of the 'size_targeted' profile
+            'normalize_loudness': False, # Two-pass EBU R128 loudness normalization of video/audio conversions
+            'stream_downloads': False, # Convert downloads while they arrive instead of writing the source file first
+            'output_layout': 'flat', # Sub-folders of downloads; key of utils.output_paths.OUTPUT_LAYOUTS
+            'scratch_dir': '', # Fast local directory for in-flight downloads and encodes ('' writes straight to the output directories)
             'theme': 'Light' 
         }
         self.settings = self.defaults.copy()
         self.load_settings()
+        atexit.register(self.flush) # A change still waiting for its delayed save is written on exit
 
     def load_settings(self):
         self.logger.info(f"Loading settings from {self.settings_file}")
@@ -61,25 +81,91 @@ class SettingsManager:
 
 
     def save_settings(self):
-        self.logger.info(f"Saving settings to {self.settings_file}")
-        try:
-            os.makedirs(os.path.dirname(self.settings_file), exist_ok=True)
-            with open(self.settings_file, 'w') as f:
-                json.dump(self.settings, f, indent=4)
-            self.logger.info("Settings saved successfully.")
-        except Exception as e:
-            self.logger.error(f"Error saving settings to {self.settings_file}: {e}", exc_info=True)
+        """
+        Writes the settings now, replacing any pending delayed save.
+
+        The JSON goes to a temporary file next to the settings file, which is fsynced and then
+        renamed over it, so a crash or a full disk mid-write leaves the previous file intact.
+        Concurrent calls (the delayed save's timer thread, an explicit save, the exit flush)
+        write one after another, each with the settings as they are when its turn comes.
+        """
+        with self._write_lock:
+            with self._lock:
+                if self._save_timer:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                snapshot = dict(self.settings)
+            self.logger.info(f"Saving settings to {self.settings_file}")
+            tmp_path = f"{self.settings_file}.tmp"
+            try:
+                os.makedirs(os.path.dirname(self.settings_file), exist_ok=True)
+                with open(tmp_path, 'w') as f:
+                    json.dump(snapshot, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.settings_file)
+                self.logger.info("Settings saved successfully.")
+            except Exception as e:
+                self.logger.error(f"Error saving settings to {self.settings_file}: {e}", exc_info=True)
+
+    def schedule_save(self):
+        """Saves the settings SAVE_DELAY seconds from now; changes made until then share that write."""
+        with self._lock:
+            if self._save_timer:
+                return
+            self._save_timer = threading.Timer(SAVE_DELAY, self.save_settings)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Writes a pending delayed save immediately; does nothing if there is none."""
+        with self._lock:
+            pending = self._save_timer is not None
+        if pending:
+            self.save_settings()
 
     def get_setting(self, key):
         # self.logger.debug(f"Getting setting for key: {key}") # Can be too verbose
         return self.settings.get(key, self.defaults.get(key))
 
     def set_setting(self, key, value):
+        """
+        Changes a setting, notifies its subscribers and schedules a save (see schedule_save).
+        Setting a key to its current value does neither.
+        """
         # Basic type validation before setting could be useful
         if key in self.defaults and not isinstance(value, type(self.defaults[key])):
             print(f"Warning: Type mismatch for setting '{key}'. Expected {type(self.defaults[key])}, got {type(value)}. Value not set.")
             return
-        self.settings[key] = value
+        with self._lock:
+            if key in self.settings and self.settings[key] == value:
+                return
+            self.settings[key] = value
+            callbacks = [callback for callback, keys in self._subscribers if keys is None or key in keys]
+        self.schedule_save()
+        for callback in callbacks:
+            try:
+                callback(key, value)
+            except Exception as e:
+                self.logger.error(f"Settings subscriber {callback!r} failed for '{key}': {e}", exc_info=True)
+
+    def subscribe(self, callback, keys=None):
+        """
+        Registers callback(key, value) for changes made with set_setting.
+
+        Callbacks run in the thread that changed the setting (the GUI thread for the dialog
+        and the main window), after the new value is visible to get_setting.
+
+        Args:
+            callback: Callable(key, value).
+            keys: Iterable of setting names to watch; None watches every setting.
+        """
+        with self._lock:
+            self._subscribers.append((callback, frozenset(keys) if keys is not None else None))
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [(c, keys) for c, keys in self._subscribers if c != callback]
 
     def save(self): # To be called explicitly by the dialog or app
         self.save_settings()
@@ -1,25 +1,19 @@
-from PIL import Image, UnidentifiedImageError
-import ffmpeg
 import argparse
 import os
 import sys
 import json
-import docx # from python-docx - typically not used directly for conversion to PDF with pypandoc
-import pypandoc # For document conversion
-
-def get_media_info(input_file_path):
-    """
-    Fetches media information using ffmpeg.probe.
-
-    Args:
-        input_file_path: Path to a media file.
-
-    Returns:
-        A dictionary containing media properties, or None if probing fails.
-    """
-    if not os.path.exists(input_file_path):
-        print(f"Error: Input file not found: {input_file_path}", file=sys.stderr)
-        return None
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+# ffmpeg-python, Pillow and pypandoc are imported inside the functions that use them,
+# so importing this module (and with it the GUI) does not pay for loading them.
+
+from .probe_cache import get_probe_cache
+from ..utils import scratch
+from ..utils.telemetry import wait_with_rusage, kill_child
+
+def _probe(input_file_path):
+    import ffmpeg
     try:
         print(f"Probing file: {input_file_path}")
         info = ffmpeg.probe(input_file_path)
@@ -33,67 +27,225 @@ def get_media_info(input_file_path):
         print(f"An unexpected error occurred while probing {input_file_path}: {e}", file=sys.stderr)
         return None
 
-def convert_video(input_file_path, output_file_path, target_format_extension, quality_options=None, progress_callback=None):
+# Probes currently running (in the prefetch pool or in get_media_info), keyed by absolute
+# path, so that a get_media_info() call for a file that is being probed waits instead of
+# re-probing. A probe stores its result in the cache before it leaves this dict.
+_probe_inflight = {}
+_probe_inflight_lock = threading.Lock()
+_probe_executor = None
+PROBE_PREFETCH_WORKERS = min(8, (os.cpu_count() or 2))
+
+def get_media_info(input_file_path, use_cache=True):
     """
-    Converts a media file to a target format using ffmpeg-python.
-    (Implementation from previous step - assumed to be correct and complete)
+    Fetches media information using ffmpeg.probe.
+
+    Results are cached in memory and on disk (see probe_cache.ProbeCache), keyed by
+    the file's path, size, mtime and inode, so repeated probes of an unchanged file
+    do not spawn ffprobe again.
+
+    Args:
+        input_file_path: Path to a media file.
+        use_cache: If False, always runs ffprobe and does not touch the cache.
+
+    Returns:
+        A dictionary containing media properties, or None if probing fails.
     """
     if not os.path.exists(input_file_path):
-        return False, f"Error: Input file not found: {input_file_path}"
+        print(f"Error: Input file not found: {input_file_path}", file=sys.stderr)
+        return None
+    if not use_cache:
+        return _probe(input_file_path)
 
-    os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
-    print(f"Starting video/audio conversion: {input_file_path} -> {output_file_path}")
+    cache = get_probe_cache()
+    info = cache.get(input_file_path)
+    if info is not None:
+        return info
+    abs_path = os.path.abspath(input_file_path)
+    with _probe_inflight_lock:
+        # Checked again under the lock: a probe that finished since the lookup above has already cached its result
+        info = cache.get(abs_path)
+        if info is not None:
+            return info
+        pending = _probe_inflight.get(abs_path)
+        if pending is None:
+            future = _probe_inflight[abs_path] = Future()
+    if pending is not None:
+        return pending.result()
+
+    info = None
+    try:
+        info = _probe(input_file_path)
+        cache.put(input_file_path, info)
+    finally:
+        with _probe_inflight_lock:
+            _probe_inflight.pop(abs_path, None)
+        future.set_result(info)
+    return info
+
+def prefetch_media_info(input_file_paths, max_workers=None):
+    """
+    Probes a batch of media files in parallel in the background and stores the
+    results in the probe cache. Returns immediately.
+
+    Files that are already cached or already being probed are skipped. The on-disk
+    cache is flushed once when the whole batch has finished.
 
+    Args:
+        input_file_paths: Iterable of media file paths.
+        max_workers: Size of the probe pool (only honoured when the pool is first created).
+
+    Returns:
+        A dict mapping each newly scheduled absolute path to its Future.
+    """
+    global _probe_executor
+    cache = get_probe_cache()
+    scheduled = {}
+    with _probe_inflight_lock:
+        if _probe_executor is None:
+            _probe_executor = ThreadPoolExecutor(max_workers=max_workers or PROBE_PREFETCH_WORKERS, thread_name_prefix="probe")
+        for path in input_file_paths:
+            abs_path = os.path.abspath(path)
+            if abs_path in _probe_inflight or abs_path in scheduled or not os.path.exists(abs_path):
+                continue
+            if cache.get(abs_path) is not None:
+                continue
+            scheduled[abs_path] = _probe_executor.submit(_probe, abs_path)
+        _probe_inflight.update(scheduled)
+
+    remaining = [len(scheduled)]
+    def _on_done(abs_path, future):
+        info = None if future.exception() else future.result()
+        cache.put(abs_path, info)
+        with _probe_inflight_lock:
+            _probe_inflight.pop(abs_path, None)
+            remaining[0] -= 1
+            batch_done = remaining[0] == 0
+        if batch_done:
+            cache.flush()
+
+    for abs_path, future in scheduled.items():
+        future.add_done_callback(lambda f, p=abs_path: _on_done(p, f))
+    return scheduled
+
+# ffmpeg muxer names for target extensions that are not muxer names themselves.
+FFMPEG_MUXERS = {'mkv': 'matroska', 'm4a': 'ipod', 'aac': 'adts'}
+# Codecs the target container accepts; applied unless quality_options name a codec.
+FORMAT_DEFAULT_CODECS = {
+    'mp3': {'audio_codec': 'libmp3lame'},
+    'ogg': {'audio_codec': 'libvorbis'},
+    'flac': {'audio_codec': 'flac'},
+    'wav': {'audio_codec': 'pcm_s16le'},
+    'webm': {'video_codec': 'libvpx-vp9', 'audio_codec': 'libopus'},
+}
+
+AUDIO_ONLY_FORMATS = ["mp3", "aac", "wav", "flac", "ogg", "m4a"]
+
+def _media_output_params(target_format_extension, quality_options=None):
+    """
+    Builds the ffmpeg output options for one video/audio target.
+
+    Returns:
+        Tuple (output_params_dict, is_audio_output)
+    """
     default_options = {
         'video_codec': 'libx264', 'crf': 23, 'audio_codec': 'aac',
         'audio_bitrate': '192k', 'preset': 'medium',
     }
-    audio_only_formats = ["mp3", "aac", "wav", "flac", "ogg", "m4a"]
-    is_audio_output = target_format_extension.lower() in audio_only_formats
+    is_audio_output = target_format_extension.lower() in AUDIO_ONLY_FORMATS
 
     current_options = default_options.copy()
+    current_options.update(FORMAT_DEFAULT_CODECS.get(target_format_extension.lower(), {}))
     if quality_options:
         current_options.update(quality_options)
 
-    stream = ffmpeg.input(input_file_path)
     output_params = {}
+    if is_audio_output:
+        output_params['acodec'] = current_options.get('audio_codec', 'aac')
+        if current_options.get('audio_bitrate'):
+            output_params['audio_bitrate'] = current_options['audio_bitrate']
+    else:
+        output_params['vcodec'] = current_options.get('video_codec', 'libx264')
+        if current_options.get('crf') is not None and output_params['vcodec'] in ['libx264', 'libx265']:
+            output_params['crf'] = current_options['crf']
+        elif current_options.get('crf') is not None and output_params['vcodec'] == 'libvpx-vp9' and not current_options.get('video_bitrate'):
+            output_params['crf'] = current_options['crf']; output_params['video_bitrate'] = 0 # Constant-quality mode for VP9
+        if current_options.get('video_bitrate'):
+            output_params['video_bitrate'] = current_options['video_bitrate']
+            for key in ('maxrate', 'bufsize'): # Rate-control bounds of size-targeted encodes
+                if current_options.get(key):
+                    output_params[key] = current_options[key]
+        if current_options.get('preset') and output_params['vcodec'] in ['libx264', 'libx265']:
+             output_params['preset'] = current_options['preset']
+        output_params['acodec'] = current_options.get('audio_codec', 'aac')
+        if current_options.get('audio_bitrate'):
+            output_params['audio_bitrate'] = current_options['audio_bitrate']
+
+    if current_options.get('audio_filter'):
+        output_params['af'] = current_options['audio_filter'] # e.g. the loudnorm pass of conversion.loudness
+    if current_options.get('audio_sample_rate') and output_params['acodec'] != 'libopus': # Opus encodes at 48 kHz only; ffmpeg picks that itself
+        output_params['ar'] = current_options['audio_sample_rate']
+    if current_options.get('threads'):
+        output_params['threads'] = current_options['threads'] # Set by the concurrency auto-tuner
+    output_params['format'] = FFMPEG_MUXERS.get(target_format_extension.lower(), target_format_extension)
+    return output_params, is_audio_output
+
+def _run_ffmpeg_job(stream, progress_callback):
+    """
+    Runs a compiled ffmpeg-python graph and waits for it.
 
-    try:
-        if is_audio_output:
-            output_params['audio_codec'] = current_options.get('audio_codec', 'aac')
-            if current_options.get('audio_bitrate'):
-                output_params['audio_bitrate'] = current_options['audio_bitrate']
-            stream = stream.audio
-        else:
-            output_params['vcodec'] = current_options.get('video_codec', 'libx264')
-            if current_options.get('crf') is not None and output_params['vcodec'] in ['libx264', 'libx265']:
-                output_params['crf'] = current_options['crf']
-            if current_options.get('video_bitrate'):
-                output_params['video_bitrate'] = current_options['video_bitrate']
-            if current_options.get('preset') and output_params['vcodec'] in ['libx264', 'libx265']:
-                 output_params['preset'] = current_options['preset']
-            output_params['acodec'] = current_options.get('audio_codec', 'aac')
-            if current_options.get('audio_bitrate'):
-                output_params['audio_bitrate'] = current_options['audio_bitrate']
-        
-        output_params['format'] = target_format_extension
+    Returns:
+        Tuple (returncode, stderr_text, usage_dict)
+    """
+    import ffmpeg
+    encode_started = time.monotonic()
+    process = ffmpeg.run_async(stream, pipe_stderr=True, overwrite_output=True)
+    if progress_callback:
+        progress_callback({'status': 'process_started', 'process': process, 'pid': process.pid})
+    err, cpu_seconds, peak_rss_bytes = wait_with_rusage(process)
+    usage = {'encode_seconds': time.monotonic() - encode_started, 'cpu_seconds': cpu_seconds, 'peak_rss_bytes': peak_rss_bytes}
+    return process.returncode, err.decode('utf8', errors='replace').strip(), usage
+
+def convert_video(input_file_path, output_file_path, target_format_extension, quality_options=None, progress_callback=None, scratch_dir=None):
+    """
+    Converts a media file to a target format using ffmpeg-python.
+
+    With scratch_dir, ffmpeg writes to a file there that is moved to output_file_path
+    once the encode has succeeded (see utils.scratch.move_into_place).
+
+    The 'finished' and 'error' progress callbacks carry the encode wall time
+    ('encode_seconds') and the CPU time and peak RSS of the ffmpeg process
+    ('cpu_seconds', 'peak_rss_bytes'; None where the platform cannot report them).
+    A 'process_started' callback hands out the ffmpeg subprocess ('process'), so the
+    caller can suspend, resume or kill it while this function waits for it.
+    """
+    if not os.path.exists(input_file_path):
+        return False, f"Error: Input file not found: {input_file_path}"
+
+    import ffmpeg
+    os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+    print(f"Starting video/audio conversion: {input_file_path} -> {output_file_path}")
+    work_path = scratch.scratch_file_for(output_file_path, scratch_dir) if scratch_dir else output_file_path
 
-        stream = ffmpeg.output(stream, output_file_path, **output_params)
+    try:
+        output_params, is_audio_output = _media_output_params(target_format_extension, quality_options)
+        stream = ffmpeg.input(input_file_path)
+        stream = ffmpeg.output(stream.audio if is_audio_output else stream, work_path, **output_params)
         
         if progress_callback:
             progress_callback({'status': 'starting', 'input': input_file_path, 'output': output_file_path, 'message': 'Video conversion starting...'})
 
-        process = ffmpeg.run_async(stream, pipe_stdout=True, pipe_stderr=True, overwrite_output=True)
-        out, err = process.communicate()
-
-        if process.returncode != 0:
-            error_message = err.decode('utf8').strip()
+        returncode, error_message, usage = _run_ffmpeg_job(stream, progress_callback)
+        if returncode != 0:
+            if work_path != output_file_path:
+                scratch.discard(work_path)
             if progress_callback:
-                progress_callback({'status': 'error', 'message': error_message})
+                progress_callback({'status': 'error', 'message': error_message, **usage})
             return False, f"FFmpeg error: {error_message}"
+        if work_path != output_file_path:
+            scratch.move_into_place(work_path, output_file_path)
 
         if progress_callback:
-            progress_callback({'status': 'finished', 'filepath': output_file_path, 'message': 'Video conversion finished.'})
+            progress_callback({'status': 'finished', 'filepath': output_file_path, 'message': 'Video conversion finished.', **usage})
         return True, output_file_path
 
     except ffmpeg.Error as e:
@@ -106,6 +258,152 @@ def convert_video(input_file_path, output_file_path, target_format_extension, qu
             progress_callback({'status': 'error', 'message': str(e)})
         return False, f"Unexpected error: {str(e)}"
 
+def convert_video_multi(input_file_path, outputs, progress_callback=None, scratch_dir=None):
+    """
+    Converts a media file to several targets with one ffmpeg run.
+
+    The input is read and decoded once, and each decoded frame is handed to every
+    output's encoder, instead of decoding the file again for each target as separate
+    convert_video calls do. Progress callbacks are the same as convert_video's; the
+    'starting' and 'finished' ones list every output path under 'outputs'.
+
+    Args:
+        input_file_path: Path to the input file.
+        outputs: List of (output_file_path, target_format_extension, quality_options) tuples;
+                 quality_options may be None.
+        progress_callback: Optional callback, as for convert_video.
+        scratch_dir: Optional directory the outputs are encoded in before being moved into place, as for convert_video.
+
+    Returns:
+        Tuple (success_boolean, list_of_output_paths_or_error_message_string)
+    """
+    if not os.path.exists(input_file_path):
+        return False, f"Error: Input file not found: {input_file_path}"
+    if not outputs:
+        return False, "Error: No conversion outputs given."
+
+    import ffmpeg
+    output_paths = [output_file_path for output_file_path, _, _ in outputs]
+    print(f"Starting video/audio conversion: {input_file_path} -> {', '.join(output_paths)}")
+    work_paths = [scratch.scratch_file_for(path, scratch_dir) if scratch_dir else path for path in output_paths]
+
+    try:
+        source = ffmpeg.input(input_file_path)
+        streams = []
+        for (output_file_path, target_format_extension, quality_options), work_path in zip(outputs, work_paths):
+            os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+            output_params, is_audio_output = _media_output_params(target_format_extension, quality_options)
+            streams.append(ffmpeg.output(source.audio if is_audio_output else source, work_path, **output_params))
+        stream = ffmpeg.merge_outputs(*streams)
+
+        if progress_callback:
+            progress_callback({'status': 'starting', 'input': input_file_path, 'output': output_paths[0], 'outputs': output_paths,
+                               'message': f'Video conversion to {len(output_paths)} formats starting...'})
+
+        returncode, error_message, usage = _run_ffmpeg_job(stream, progress_callback)
+        if returncode != 0:
+            for work_path, output_file_path in zip(work_paths, output_paths):
+                if work_path != output_file_path:
+                    scratch.discard(work_path)
+            if progress_callback:
+                progress_callback({'status': 'error', 'message': error_message, **usage})
+            return False, f"FFmpeg error: {error_message}"
+        for work_path, output_file_path in zip(work_paths, output_paths):
+            if work_path != output_file_path:
+                scratch.move_into_place(work_path, output_file_path)
+
+        if progress_callback:
+            progress_callback({'status': 'finished', 'filepath': output_paths[0], 'outputs': output_paths, 'message': 'Video conversion finished.', **usage})
+        return True, output_paths
+
+    except ffmpeg.Error as e:
+        error_message = e.stderr.decode('utf8').strip() if e.stderr else "Unknown ffmpeg error during setup"
+        if progress_callback:
+            progress_callback({'status': 'error', 'message': error_message})
+        return False, f"FFmpeg setup error: {error_message}"
+    except Exception as e:
+        if progress_callback:
+            progress_callback({'status': 'error', 'message': str(e)})
+        return False, f"Unexpected error: {str(e)}"
+
+def convert_stream(chunks, output_file_path, target_format_extension, quality_options=None, progress_callback=None, input_format=None, scratch_dir=None):
+    """
+    Converts media arriving as a byte stream (e.g. a download in progress) by feeding it to ffmpeg's stdin.
+
+    Nothing is written besides the output, and encoding starts with the first chunk. A
+    feeder thread writes the chunks while this function waits for ffmpeg. Containers that
+    need seeking to be demuxed (MP4 with the index at the end) fail, as ffmpeg cannot
+    seek in a pipe. Progress callbacks are the same as convert_video's.
+
+    Args:
+        chunks: Iterable of bytes. If iterating it raises (a network error, or a cancellation
+                raised by the caller's progress hook), ffmpeg is killed, the partial output
+                removed and the exception re-raised here.
+        output_file_path: Path of the file to create.
+        target_format_extension: Target format (e.g., 'mp3', 'mp4').
+        quality_options: As for convert_video.
+        progress_callback: Optional callback, as for convert_video.
+        input_format: ffmpeg demuxer of the stream, if it cannot be detected from its first bytes.
+        scratch_dir: Optional directory the output is written in before being moved into place, as for convert_video.
+
+    Returns:
+        Tuple (success_boolean, output_filepath_or_error_message_string)
+    """
+    import ffmpeg
+    os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+    print(f"Starting streamed video/audio conversion -> {output_file_path}")
+    work_path = scratch.scratch_file_for(output_file_path, scratch_dir) if scratch_dir else output_file_path
+    output_params, is_audio_output = _media_output_params(target_format_extension, quality_options)
+    source = ffmpeg.input('pipe:', **({'f': input_format} if input_format else {}))
+    # -xerror: ffmpeg otherwise exits with 0 and an empty output when the demuxer gives up on the pipe
+    stream = ffmpeg.output(source.audio if is_audio_output else source, work_path, **output_params).global_args('-xerror')
+    if progress_callback:
+        progress_callback({'status': 'starting', 'input': 'pipe:', 'output': output_file_path, 'message': 'Streamed conversion starting...'})
+
+    encode_started = time.monotonic()
+    process = ffmpeg.run_async(stream, pipe_stdin=True, pipe_stderr=True, overwrite_output=True)
+    if progress_callback:
+        progress_callback({'status': 'process_started', 'process': process, 'pid': process.pid})
+    feed_error = []
+
+    def _feed():
+        try:
+            for chunk in chunks:
+                process.stdin.write(chunk)
+        except BrokenPipeError: # ffmpeg exited early; its stderr says why
+            pass
+        except BaseException as e:
+            feed_error.append(e)
+            kill_child(process)
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    feeder = threading.Thread(target=_feed, name="ffmpeg-stdin-feeder", daemon=True)
+    feeder.start()
+    err, cpu_seconds, peak_rss_bytes = wait_with_rusage(process)
+    feeder.join()
+    usage = {'encode_seconds': time.monotonic() - encode_started, 'cpu_seconds': cpu_seconds, 'peak_rss_bytes': peak_rss_bytes}
+    error_message = err.decode('utf8', errors='replace').strip()
+    if feed_error or process.returncode != 0:
+        if os.path.exists(work_path):
+            os.remove(work_path)
+        if progress_callback:
+            progress_callback({'status': 'error', 'message': str(feed_error[0]) if feed_error else error_message, **usage})
+        if feed_error:
+            raise feed_error[0]
+        return False, f"FFmpeg error: {error_message}"
+    if work_path != output_file_path:
+        try:
+            scratch.move_into_place(work_path, output_file_path)
+        except OSError as e:
+            return False, f"Could not move the output into place: {e}"
+    if progress_callback:
+        progress_callback({'status': 'finished', 'filepath': output_file_path, 'message': 'Streamed conversion finished.', **usage})
+    return True, output_file_path
+
 # --- Image Conversion ---
 def convert_image(input_file_path, output_file_path, target_format_extension):
     """
@@ -115,6 +413,7 @@ def convert_image(input_file_path, output_file_path, target_format_extension):
         print(f"Error: Input image file not found: {input_file_path}", file=sys.stderr)
         return False, f"Error: Input image file not found: {input_file_path}"
 
+    from PIL import Image, UnidentifiedImageError
     os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
     print(f"Starting image conversion: {input_file_path} -> {output_file_path}")
 
@@ -152,75 +451,6 @@ def convert_image(input_file_path, output_file_path, target_format_extension):
         print(f"An unexpected error occurred during image conversion of {input_file_path}: {e}", file=sys.stderr)
         return False, f"Unexpected error during image conversion: {str(e)}"
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description="Media Converter CLI (Video/Audio/Image)")
-    
-    # Video/Audio specific arguments
-    parser.add_argument("--input", help="Input video/audio file path")
-    parser.add_argument("--output", help="Output video/audio file path")
-    parser.add_argument("--format", help="Target video/audio format extension (e.g., mp4, mp3)")
-    parser.add_argument("--vcodec", help="Video codec")
-    parser.add_argument("--acodec", help="Audio codec")
-    parser.add_argument("--vb", help="Video bitrate")
-    parser.add_argument("--ab", help="Audio bitrate")
-    parser.add_argument("--crf", help="Constant Rate Factor for x264/x265")
-    parser.add_argument("--preset", help="x264/x265 preset")
-    parser.add_argument("--info", action="store_true", help="Display media info for the video/audio input file and exit.")
-
-    # Image specific arguments
-    parser.add_argument("--image_input", help="Input image file path")
-    parser.add_argument("--image_output", help="Output image file path")
-    parser.add_argument("--image_format", help="Target image format (e.g., png, jpg, webp)")
-
-    args = parser.parse_args()
-
-    action_taken = False
-
-    if args.info and args.input:
-        print(f"Fetching media information for: {args.input}")
-        media_info = get_media_info(args.input)
-        if media_info:
-            print(json.dumps(media_info, indent=4))
-        else:
-            print("Failed to retrieve media information.")
-        action_taken = True
-    elif args.input and args.output: # Video/Audio conversion
-        target_format_ext = args.format
-        if not target_format_ext:
-            _, target_format_ext = os.path.splitext(args.output)
-            if target_format_ext.startswith('.'): target_format_ext = target_format_ext[1:]
-        
-        if not target_format_ext:
-            parser.error("Target video/audio format could not be determined. Use --format or ensure output file has an extension.")
-        
-        quality_opts = {k: v for k, v in vars(args).items() if v is not None and k in ['vcodec', 'acodec', 'vb', 'ab', 'crf', 'preset']}
-        if 'crf' in quality_opts: quality_opts['crf'] = int(quality_opts['crf'])
-
-        def cli_progress(data): print(f"PROGRESS: {data}")
-        
-        success, message = convert_video(args.input, args.output, target_format_ext.lower(), quality_opts, cli_progress)
-        if success: print(f"CLI: Video/Audio conversion success: {message}")
-        else: print(f"CLI: Video/Audio conversion failure: {message}", file=sys.stderr); sys.exit(1)
-        action_taken = True
-
-    if args.image_input and args.image_output and args.image_format:
-        print(f"\nAttempting image conversion:")
-        img_success, img_message = convert_image(args.image_input, args.image_output, args.image_format.lower())
-        if img_success: print(f"CLI: Image conversion success: {img_message}")
-        else: print(f"CLI: Image conversion failure: {img_message}", file=sys.stderr); sys.exit(1)
-        action_taken = True
-    
-    if not action_taken:
-        if (args.image_input or args.image_output or args.image_format): # if some image args but not all
-             print("Error: For image conversion, --image_input, --image_output, and --image_format are all required.", file=sys.stderr)
-             sys.exit(1)
-        elif (args.input or args.output): # if some video args but not all (and not info)
-             print("Error: For video/audio conversion, --input and --output are required.", file=sys.stderr)
-             sys.exit(1)
-        else: # No valid set of arguments provided
-            parser.print_help()
-        sys.exit(0) # Exit if no action was taken, or after an action if not exited already.
-
 # --- Document Conversion ---
 def convert_document(input_file_path, output_file_path, target_format_extension):
     """
@@ -239,6 +469,7 @@ def convert_document(input_file_path, output_file_path, target_format_extension)
 
     try:
         if input_ext == '.docx' or input_ext == '.txt':
+            import pypandoc
             pypandoc.convert_file(input_file_path, 'pdf', outputfile=output_file_path)
             print(f"Document conversion successful: {output_file_path}")
             return True, output_file_path
@@ -258,18 +489,62 @@ def convert_document(input_file_path, output_file_path, target_format_extension)
         print(f"An unexpected error occurred during document conversion of {input_file_path}: {e}", file=sys.stderr)
         return False, f"Unexpected error during document conversion: {str(e)}"
 
+# Input extensions accepted for each conversion subtype.
+SUBTYPE_EXTENSIONS = {
+    'video': ['.mp4', '.mkv', '.avi', '.mov', '.webm', '.flv', '.ts'],
+    'audio': ['.mp3', '.aac', '.wav', '.ogg', '.flac', '.m4a'],
+    'image': ['.png', '.jpg', '.jpeg', '.webp', '.heic', '.heif'],
+    'document': ['.docx', '.txt'],
+}
+
+def guess_task_subtype(input_file_path):
+    """Returns 'video', 'audio', 'image' or 'document' based on the file extension, or None if unsupported."""
+    ext = os.path.splitext(input_file_path)[1].lower()
+    return next((subtype for subtype, exts in SUBTYPE_EXTENSIONS.items() if ext in exts), None)
+
+def convert_file(input_file_path, output_file_path, target_format_extension, task_subtype=None, quality_options=None, progress_callback=None, scratch_dir=None):
+    """
+    Converts a file with the converter matching its subtype.
+
+    Args:
+        input_file_path: Path to the input file.
+        output_file_path: Path of the file to create.
+        target_format_extension: Target format (e.g., 'mp3', 'png', 'pdf').
+        task_subtype: 'video', 'audio', 'image' or 'document'; guessed from the extension if None.
+        quality_options: Options for convert_video (ignored for images and documents).
+        progress_callback: Progress callback for convert_video (ignored for images and documents).
+        scratch_dir: Encode directory for convert_video (ignored for images and documents).
+
+    Returns:
+        Tuple (success_boolean, output_filepath_or_error_message_string)
+    """
+    task_subtype = task_subtype or guess_task_subtype(input_file_path)
+    if task_subtype in ['video', 'audio']:
+        return convert_video(input_file_path, output_file_path, target_format_extension, quality_options, progress_callback, scratch_dir)
+    if task_subtype == 'image':
+        return convert_image(input_file_path, output_file_path, target_format_extension)
+    if task_subtype == 'document':
+        return convert_document(input_file_path, output_file_path, target_format_extension)
+    return False, f"Unsupported conversion subtype for {input_file_path}: {task_subtype}"
+
 
 if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description="Media and Document Converter CLI")
-    
-    # ... (Existing video/audio args) ...
+    parser = argparse.ArgumentParser(description="Media and Document Converter CLI (single file; see src/cli.py for batches)")
+
+    # Video/Audio specific arguments
     parser.add_argument("--input", help="Input video/audio file path")
     parser.add_argument("--output", help="Output video/audio file path")
     parser.add_argument("--format", help="Target video/audio format extension (e.g., mp4, mp3)")
-    # ... (vcodec, acodec, etc.) ...
+    parser.add_argument("--vcodec", help="Video codec")
+    parser.add_argument("--acodec", help="Audio codec")
+    parser.add_argument("--vb", help="Video bitrate")
+    parser.add_argument("--ab", help="Audio bitrate")
+    parser.add_argument("--crf", type=int, help="Constant Rate Factor for x264/x265")
+    parser.add_argument("--preset", help="x264/x265 preset")
+    parser.add_argument("--also", nargs="+", metavar="OUTPUT", help="More output files (format from the extension) encoded in the same ffmpeg run as --output")
     parser.add_argument("--info", action="store_true", help="Display media info for the video/audio input file and exit.")
 
-    # ... (Existing image args) ...
+    # Image specific arguments
     parser.add_argument("--image_input", help="Input image file path")
     parser.add_argument("--image_output", help="Output image file path")
     parser.add_argument("--image_format", help="Target image format (e.g., png, jpg, webp)")
@@ -281,35 +556,58 @@ if __name__ == '__main__':
 
     args = parser.parse_args()
     action_taken = False
+    failed = False
 
-    # ... (Existing info, video/audio, image conversion logic from previous state) ...
     if args.info and args.input:
-        # ... (info logic) ...
+        print(f"Fetching media information for: {args.input}")
+        media_info = get_media_info(args.input)
+        if media_info:
+            print(json.dumps(media_info, indent=4))
+        else:
+            print("Failed to retrieve media information.", file=sys.stderr); failed = True
         action_taken = True
-    elif args.input and args.output: 
-        # ... (video/audio conversion logic) ...
+    elif args.input and args.output: # Video/Audio conversion
+        target_format_ext = args.format or os.path.splitext(args.output)[1].lstrip('.')
+        if not target_format_ext:
+            parser.error("Target video/audio format could not be determined. Use --format or ensure output file has an extension.")
+
+        option_names = {'vcodec': 'video_codec', 'acodec': 'audio_codec', 'vb': 'video_bitrate', 'ab': 'audio_bitrate', 'crf': 'crf', 'preset': 'preset'}
+        quality_opts = {option_names[k]: v for k, v in vars(args).items() if v is not None and k in option_names}
+
+        def cli_progress(data): print(f"PROGRESS: {data}")
+
+        if args.also:
+            outputs = [(args.output, target_format_ext.lower(), quality_opts)] + [(path, os.path.splitext(path)[1].lstrip('.').lower(), quality_opts) for path in args.also]
+            success, message = convert_video_multi(args.input, outputs, cli_progress)
+        else:
+            success, message = convert_video(args.input, args.output, target_format_ext.lower(), quality_opts, cli_progress)
+        if success: print(f"CLI: Video/Audio conversion success: {message}")
+        else: print(f"CLI: Video/Audio conversion failure: {message}", file=sys.stderr); failed = True
         action_taken = True
+    elif args.input or args.output:
+        print("Error: For video/audio conversion, --input and --output are required.", file=sys.stderr)
+        sys.exit(1)
 
     if args.image_input and args.image_output and args.image_format:
-        # ... (image conversion logic) ...
+        print(f"\nAttempting image conversion:")
+        img_success, img_message = convert_image(args.image_input, args.image_output, args.image_format.lower())
+        if img_success: print(f"CLI: Image conversion success: {img_message}")
+        else: print(f"CLI: Image conversion failure: {img_message}", file=sys.stderr); failed = True
         action_taken = True
-    
-    # Handle Document Conversion
+    elif args.image_input or args.image_output or args.image_format:
+        print("Error: For image conversion, --image_input, --image_output, and --image_format are all required.", file=sys.stderr)
+        sys.exit(1)
+
     if args.doc_input and args.doc_output:
         print(f"\nAttempting document conversion:")
         doc_success, doc_message = convert_document(args.doc_input, args.doc_output, "pdf")
-        if doc_success:
-            print(f"CLI: Document conversion success: {doc_message}")
-        else:
-            print(f"CLI: Document conversion failure: {doc_message}", file=sys.stderr)
-            # Consider sys.exit(1) here if this is the only action
+        if doc_success: print(f"CLI: Document conversion success: {doc_message}")
+        else: print(f"CLI: Document conversion failure: {doc_message}", file=sys.stderr); failed = True
         action_taken = True
-    elif (args.doc_input and not args.doc_output) or (not args.doc_input and args.doc_output):
+    elif args.doc_input or args.doc_output:
         print("Error: For document conversion, both --doc_input and --doc_output must be specified.", file=sys.stderr)
-        action_taken = True # Still an action, albeit an erroneous one for CLI.
-        # sys.exit(1)
+        sys.exit(1)
 
     if not action_taken:
         parser.print_help()
-    
-    sys.exit(0) # Default exit if any action was attempted or help printed.
+    sys.exit(1 if failed else 0)
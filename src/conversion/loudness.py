@@ -0,0 +1,322 @@
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from . import converter
+from ..utils.cache import JsonStore, get_cache_path, file_key, file_digest
+from ..utils.logger import setup_logger
+from ..utils.telemetry import wait_with_rusage
+
+loudness_logger = setup_logger('Loudness', 'conversion.log')
+
+# EBU R128 targets of the loudnorm filter: integrated loudness (LUFS), true peak (dBTP)
+# and loudness range (LU). -16 LUFS is the common target for streamed music and speech.
+DEFAULT_TARGETS = {'I': -16.0, 'TP': -1.5, 'LRA': 11.0}
+# Sample rate of the normalized output when the source rate is unknown (loudnorm
+# resamples to 192 kHz internally, so the output rate has to be set explicitly).
+DEFAULT_SAMPLE_RATE = 48000
+DEFAULT_MAX_ENTRIES = 16384
+# loudnorm's summary is the last JSON object on stderr; the source rate comes from the input summary.
+LOUDNORM_JSON_PATTERN = re.compile(r"\{[^{}]*\"input_i\"[^{}]*\}")
+SAMPLE_RATE_PATTERN = re.compile(r"Audio:[^\n]*?(\d+) Hz")
+MEASUREMENT_KEYS = ('input_i', 'input_tp', 'input_lra', 'input_thresh', 'target_offset')
+
+
+def _targets_key(targets):
+    return '|'.join(f"{name}={float(targets[name]):g}" for name in ('I', 'TP', 'LRA'))
+
+
+class LoudnessCache(JsonStore):
+    """
+    LRU cache of loudnorm analysis results, persisted to a JSON file (see utils.cache.JsonStore).
+
+    Measurements are keyed by the SHA-1 of the file content and the loudness targets,
+    so copies and renamed files reuse one analysis. Hashing reads the file, which is
+    still much cheaper than decoding it; the digest of each file_key is remembered as
+    well, so an unchanged file is not even read again.
+    """
+
+    def __init__(self, cache_file=None, max_entries=DEFAULT_MAX_ENTRIES):
+        super().__init__(cache_file or get_cache_path('loudness_cache.json'), loudness_logger, 'loudness cache')
+        self.max_entries = max_entries
+        self._entries = OrderedDict() # "<digest>|I=..|TP=..|LRA=.." -> measurement
+        self._digests = OrderedDict() # file_key -> digest
+
+    def _restore(self, stored):
+        self._entries.update(stored.get('measurements', {}))
+        self._digests.update(stored.get('digests', {}))
+        self._trim()
+        loudness_logger.info(f"Loaded {len(self._entries)} loudness measurements from {self.path}")
+
+    def _clear(self):
+        self._entries.clear(); self._digests.clear()
+
+    def _snapshot(self):
+        return {'measurements': self._entries, 'digests': self._digests}
+
+    def _trim(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        while len(self._digests) > self.max_entries:
+            self._digests.popitem(last=False)
+
+    def digest(self, path):
+        """Content digest of a file (see utils.cache.file_digest), read only once per file_key."""
+        key = file_key(path)
+        if key is None:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = file_digest(path)
+            if digest is None:
+                return None
+            with self._lock:
+                self._digests[key] = digest
+                self._trim()
+                self._mark_dirty()
+        return digest
+
+    def get(self, path, targets=None):
+        """Returns the cached measurement of the file's content for these targets, or None."""
+        digest = self.digest(path)
+        if digest is None:
+            return None
+        key = f"{digest}|{_targets_key(targets or DEFAULT_TARGETS)}"
+        with self._lock:
+            measurement = self._entries.get(key)
+            if measurement is not None:
+                self._entries.move_to_end(key)
+            return measurement
+
+    def put(self, path, measurement, targets=None):
+        digest = self.digest(path)
+        if digest is None or measurement is None:
+            return
+        key = f"{digest}|{_targets_key(targets or DEFAULT_TARGETS)}"
+        with self._lock:
+            self._entries[key] = measurement
+            self._entries.move_to_end(key)
+            self._trim()
+            self._mark_dirty()
+
+
+_loudness_cache = None
+_loudness_cache_lock = threading.Lock()
+
+
+def get_loudness_cache():
+    """Returns the process-wide LoudnessCache, creating it on first use."""
+    global _loudness_cache
+    with _loudness_cache_lock:
+        if _loudness_cache is None:
+            _loudness_cache = LoudnessCache()
+        return _loudness_cache
+
+
+def analyze_loudness(input_file_path, targets=None, progress_callback=None):
+    """
+    Runs the measuring pass of loudnorm over the file's first audio stream (decode only, no output).
+
+    Args:
+        input_file_path: Audio or video file.
+        targets: Dict with 'I', 'TP', 'LRA' (default DEFAULT_TARGETS).
+        progress_callback: Optional callable; receives {'status': 'process_started', 'process', 'pid'}
+                           like convert_video's callback, so the caller can suspend or kill the pass.
+
+    Returns:
+        dict: 'input_i', 'input_tp', 'input_lra', 'input_thresh', 'target_offset' (floats),
+              'sample_rate' (int or None) and the CPU time/peak RSS of the pass.
+
+    Raises:
+        ValueError: If ffmpeg fails or the file has no audio to measure.
+    """
+    targets = targets or DEFAULT_TARGETS
+    args = ["ffmpeg", "-hide_banner", "-nostats", "-i", input_file_path, "-map", "0:a:0", "-vn", "-sn",
+            "-af", f"loudnorm=I={targets['I']}:TP={targets['TP']}:LRA={targets['LRA']}:print_format=json", "-f", "null", "-"]
+    try:
+        process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise ValueError(f"Could not start ffmpeg for loudness analysis: {e}") from e
+    if progress_callback:
+        progress_callback({'status': 'process_started', 'process': process, 'pid': process.pid})
+    err, cpu_seconds, peak_rss_bytes = wait_with_rusage(process)
+    stderr = err.decode('utf8', errors='replace')
+    matches = LOUDNORM_JSON_PATTERN.findall(stderr)
+    if process.returncode != 0 or not matches:
+        raise ValueError(f"Loudness analysis of {os.path.basename(input_file_path)} failed: {stderr.strip().splitlines()[-1] if stderr.strip() else 'no output'}")
+    summary = json.loads(matches[-1])
+    try:
+        measurement = {key: float(summary[key]) for key in MEASUREMENT_KEYS}
+    except (KeyError, ValueError) as e: # "-inf" for silent files
+        raise ValueError(f"Loudness of {os.path.basename(input_file_path)} cannot be measured (silent audio?): {e}") from e
+    if measurement['input_i'] == float('-inf'):
+        raise ValueError(f"Loudness of {os.path.basename(input_file_path)} cannot be measured (silent audio).")
+    rate = SAMPLE_RATE_PATTERN.search(stderr)
+    measurement['sample_rate'] = int(rate.group(1)) if rate else None
+    measurement.update(cpu_seconds=cpu_seconds, peak_rss_bytes=peak_rss_bytes)
+    return measurement
+
+
+def get_loudness(input_file_path, targets=None, progress_callback=None, use_cache=True):
+    """
+    The file's loudness measurement: from the cache, or analyzed and cached.
+
+    Returns:
+        Tuple (measurement_dict, from_cache_boolean). Raises ValueError like analyze_loudness.
+    """
+    cache = get_loudness_cache()
+    if use_cache:
+        measurement = cache.get(input_file_path, targets)
+        if measurement is not None:
+            return measurement, True
+    measurement = analyze_loudness(input_file_path, targets, progress_callback)
+    cache.put(input_file_path, measurement, targets)
+    loudness_logger.info(f"Measured {input_file_path}: {measurement['input_i']:.1f} LUFS, {measurement['input_tp']:.1f} dBTP")
+    return measurement, False
+
+
+def loudnorm_quality_options(measurement, targets=None):
+    """
+    convert_video quality_options that apply the second (linear) loudnorm pass with a measurement.
+
+    With the measured values loudnorm applies one gain over the whole file instead of
+    adjusting it dynamically, as long as the true-peak target allows it.
+    """
+    targets = targets or DEFAULT_TARGETS
+    audio_filter = (f"loudnorm=I={targets['I']}:TP={targets['TP']}:LRA={targets['LRA']}"
+                    f":measured_I={measurement['input_i']}:measured_TP={measurement['input_tp']}"
+                    f":measured_LRA={measurement['input_lra']}:measured_thresh={measurement['input_thresh']}"
+                    f":offset={measurement['target_offset']}:linear=true:print_format=none")
+    return {'audio_filter': audio_filter, 'audio_sample_rate': measurement.get('sample_rate') or DEFAULT_SAMPLE_RATE}
+
+
+def normalize_audio(input_file_path, output_file_path, target_format_extension, quality_options=None, targets=None, progress_callback=None, scratch_dir=None):
+    """
+    Converts a file with loudness normalization: the cached or freshly run analysis pass, then the encode pass
+    (written in scratch_dir first when given, see convert_video).
+
+    Returns:
+        Tuple (success_boolean, output_filepath_or_error_message_string), like convert_video.
+    """
+    try:
+        measurement, _ = get_loudness(input_file_path, targets, progress_callback)
+    except ValueError as e:
+        return False, str(e)
+    options = {**(quality_options or {}), **loudnorm_quality_options(measurement, targets)}
+    return converter.convert_video(input_file_path, output_file_path, target_format_extension, options, progress_callback, scratch_dir)
+
+
+def _encode_job(input_file_path, output_file_path, target_format_extension, quality_options):
+    # Runs in a pool process; convert_video's console output is not needed there.
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            return converter.convert_video(input_file_path, output_file_path, target_format_extension, quality_options)
+        finally:
+            sys.stdout = sys.__stdout__
+
+
+def normalize_batch(jobs, targets=None, max_workers=None, progress_callback=None):
+    """
+    Normalizes many files with both passes running on a process pool.
+
+    Analyses that are not cached run first, one per distinct file content; each file's
+    encode is submitted as soon as its measurement is known, so analysis and encoding
+    overlap. Measurements are cached in this process (pool processes only measure and
+    encode), so re-running a batch at another bitrate or format skips every analysis.
+
+    Args:
+        jobs: List of (input_file_path, output_file_path, target_format_extension, quality_options).
+        targets: loudnorm targets (default DEFAULT_TARGETS).
+        max_workers: Pool processes (default: CPU count).
+        progress_callback: Optional callable(result_dict) as each job finishes.
+
+    Returns:
+        list: Per job, {'input', 'output', 'status' ('completed'/'failed'), 'message', 'analysis_cached'}.
+    """
+    targets = targets or DEFAULT_TARGETS
+    cache = get_loudness_cache()
+    results = [{'input': job[0], 'output': job[1], 'status': 'queued', 'message': '', 'analysis_cached': False} for job in jobs]
+    waiting = {} # content digest -> indexes of jobs waiting for that analysis
+    futures = {} # future -> ('analyze', digest) or ('encode', index)
+
+    def _finish(index, success, message):
+        results[index].update(status='completed' if success else 'failed', message=message)
+        if progress_callback:
+            progress_callback(dict(results[index]))
+
+    def _submit_encode(pool, index, measurement):
+        input_path, output_path, fmt, quality_options = jobs[index]
+        options = {**(quality_options or {}), **loudnorm_quality_options(measurement, targets)}
+        futures[pool.submit(_encode_job, input_path, output_path, fmt, options)] = ('encode', index)
+
+    # Spawned, not forked: the GUI process runs Qt threads (see downloading.process_pool).
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        for index, (input_path, _, _, _) in enumerate(jobs):
+            measurement = cache.get(input_path, targets)
+            if measurement is not None:
+                results[index]['analysis_cached'] = True
+                _submit_encode(pool, index, measurement)
+                continue
+            digest = cache.digest(input_path)
+            if digest is None:
+                _finish(index, False, f"Error: Input file not found: {input_path}")
+            elif digest in waiting:
+                waiting[digest].append(index)
+            else:
+                waiting[digest] = [index]
+                futures[pool.submit(analyze_loudness, input_path, targets)] = ('analyze', digest)
+        while futures:
+            done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, ref = futures.pop(future)
+                if kind == 'encode':
+                    try:
+                        success, message = future.result()
+                    except Exception as e: # A pool process that died takes its job with it
+                        success, message = False, f"Worker error: {e}"
+                    _finish(ref, success, message)
+                    continue
+                indexes = waiting.pop(ref)
+                try:
+                    measurement = future.result()
+                except Exception as e:
+                    for index in indexes:
+                        _finish(index, False, str(e))
+                    continue
+                cache.put(jobs[indexes[0]][0], measurement, targets)
+                for index in indexes:
+                    _submit_encode(pool, index, measurement)
+    cache.flush()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Loudness-normalize audio/video files (EBU R128, two-pass loudnorm with cached analysis)")
+    parser.add_argument("inputs", nargs="+", help="Input audio/video files")
+    parser.add_argument("--output-dir", required=True, help="Directory for the normalized files")
+    parser.add_argument("--format", default="mp3", help="Target format extension (default: mp3)")
+    parser.add_argument("--ab", help="Audio bitrate (e.g. 192k)")
+    parser.add_argument("--lufs", type=float, default=DEFAULT_TARGETS['I'], help=f"Integrated loudness target (default: {DEFAULT_TARGETS['I']:g})")
+    parser.add_argument("--true-peak", type=float, default=DEFAULT_TARGETS['TP'], help=f"True peak ceiling in dBTP (default: {DEFAULT_TARGETS['TP']:g})")
+    parser.add_argument("--lra", type=float, default=DEFAULT_TARGETS['LRA'], help=f"Loudness range target (default: {DEFAULT_TARGETS['LRA']:g})")
+    parser.add_argument("--workers", type=int, help="Pool processes (default: CPU count)")
+    args = parser.parse_args()
+
+    fmt = args.format.lower().lstrip('.')
+    quality_opts = {'audio_bitrate': args.ab} if args.ab else None
+    batch = [(path, os.path.join(args.output_dir, f"{os.path.splitext(os.path.basename(path))[0]}.{fmt}"), fmt, quality_opts) for path in args.inputs]
+    results = normalize_batch(batch, {'I': args.lufs, 'TP': args.true_peak, 'LRA': args.lra}, args.workers,
+                              lambda r: print(f"{r['status'].upper():<9} {r['input']}{' (cached analysis)' if r['analysis_cached'] else ''}: {r['message']}"))
+    failed = sum(1 for r in results if r['status'] != 'completed')
+    print(f"{len(results) - failed}/{len(results)} normalized, {sum(1 for r in results if r['analysis_cached'])} analyses from cache.")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+
+from ..utils.cache import JsonStore, get_cache_path, file_key
+from ..utils.logger import setup_logger
+
+cache_logger = setup_logger('ProbeCache', 'conversion.log')
+
+DEFAULT_MAX_ENTRIES = 4096
+
+
+class ProbeCache(JsonStore):
+    """
+    In-process LRU cache of ffprobe results, persisted to a JSON file (see utils.cache.JsonStore).
+
+    Entries are keyed by utils.cache.file_key (path, size, mtime, inode), so a
+    modified file is simply a cache miss; stale entries age out through LRU eviction.
+    """
+
+    def __init__(self, cache_file=None, max_entries=DEFAULT_MAX_ENTRIES):
+        super().__init__(cache_file or get_cache_path('probe_cache.json'), cache_logger, 'probe cache')
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def _restore(self, stored):
+        # The file is written oldest-first, so insertion order restores the LRU order.
+        for key, info in stored.items():
+            self._entries[key] = info
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        cache_logger.info(f"Loaded {len(self._entries)} probe results from {self.path}")
+
+    def _clear(self):
+        self._entries.clear()
+
+    def _snapshot(self):
+        return self._entries
+
+    def get(self, path):
+        """Returns the cached probe result for the file's current content, or None."""
+        key = file_key(path)
+        if key is None:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            info = self._entries.get(key)
+            if info is not None:
+                self._entries.move_to_end(key)
+            return info
+
+    def put(self, path, info):
+        """Stores a probe result for the file's current content, evicting the least recently used entry."""
+        key = file_key(path)
+        if key is None or info is None:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[key] = info
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._mark_dirty()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._loaded = True
+            self._mark_dirty()
+
+
+_probe_cache = None
+_probe_cache_lock = threading.Lock()
+
+
+def get_probe_cache():
+    """Returns the process-wide ProbeCache, creating it on first use."""
+    global _probe_cache
+    with _probe_cache_lock:
+        if _probe_cache is None:
+            _probe_cache = ProbeCache()
+        return _probe_cache
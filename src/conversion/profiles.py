@@ -0,0 +1,202 @@
+import os
+import subprocess
+import threading
+import time
+
+from ..utils.cache import JsonStore, get_cache_path
+from ..utils.logger import setup_logger
+
+profile_logger = setup_logger('EncodingProfiles', 'conversion.log')
+
+# Named quality/speed trade-offs for video/audio conversions. 'options' are
+# convert_video quality_options; 'size_targeted' replaces CRF with bitrates computed
+# from the target file size and the probed duration (see size_targeted_options).
+ENCODING_PROFILES = {
+    'fast_draft': {'label': "Fast Draft", 'options': {'preset': 'veryfast', 'crf': 28, 'audio_bitrate': '128k'}},
+    'balanced': {'label': "Balanced", 'options': {'preset': 'medium', 'crf': 23, 'audio_bitrate': '192k'}},
+    'archival': {'label': "Archival", 'options': {'preset': 'slow', 'crf': 18, 'audio_bitrate': '320k'}},
+    'size_targeted': {'label': "Size-Targeted", 'options': {'preset': 'medium', 'audio_bitrate': '128k'}},
+}
+DEFAULT_PROFILE = 'balanced'
+# Share of the size budget kept free for container overhead and rate-control overshoot.
+SIZE_OVERHEAD = 0.04
+# Bitrate floors (kbit/s) below which a size target is not met rather than producing unwatchable output.
+MIN_VIDEO_KBPS = 100
+MIN_AUDIO_KBPS = 32
+MAX_AUDIO_KBPS = 320
+# Calibration encodes this many frames of a synthetic clip per preset.
+CALIBRATION_FRAMES = 120
+CALIBRATION_SIZE = (1280, 720)
+# The prediction only covers encoders whose presets were calibrated.
+CALIBRATED_CODECS = ('libx264',)
+
+
+def media_duration(media_info):
+    """Duration in seconds from ffprobe data (format first, then the longest stream), or None."""
+    if not media_info:
+        return None
+    candidates = [(media_info.get('format') or {}).get('duration')] + [s.get('duration') for s in media_info.get('streams', [])]
+    for value in candidates:
+        try:
+            if value is not None and float(value) > 0:
+                return float(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def size_targeted_options(target_size_mb, duration, audio_only=False, audio_kbps=128):
+    """
+    Bitrates that make a file of the given duration come out at about target_size_mb.
+
+    The budget (less SIZE_OVERHEAD) is split between audio, which keeps up to audio_kbps
+    but never more than a fifth of the total for video outputs, and video, which gets the rest.
+
+    Returns:
+        dict: quality_options with 'video_bitrate'/'audio_bitrate' and CRF switched off.
+
+    Raises:
+        ValueError: If the duration is unknown or the target is too small for the duration.
+    """
+    if not duration:
+        raise ValueError("Size-targeted encoding needs the media duration (ffprobe failed).")
+    total_kbps = target_size_mb * 1024 * 1024 * 8 * (1 - SIZE_OVERHEAD) / duration / 1000
+    if audio_only:
+        audio = min(int(total_kbps), MAX_AUDIO_KBPS)
+        if audio < MIN_AUDIO_KBPS:
+            raise ValueError(f"{target_size_mb} MB is too small for {duration:.0f} s of audio.")
+        return {'audio_bitrate': f"{audio}k"}
+    audio = max(min(audio_kbps, int(total_kbps / 5)), MIN_AUDIO_KBPS)
+    video = int(total_kbps - audio)
+    if video < MIN_VIDEO_KBPS:
+        raise ValueError(f"{target_size_mb} MB is too small for {duration:.0f} s of video.")
+    return {'crf': None, 'video_bitrate': f"{video}k", 'audio_bitrate': f"{audio}k",
+            'maxrate': f"{int(video * 1.5)}k", 'bufsize': f"{video * 2}k"}
+
+
+def profile_quality_options(profile, media_info=None, target_size_mb=None, audio_only=False):
+    """
+    convert_video quality_options for a named profile.
+
+    Args:
+        profile: Key of ENCODING_PROFILES; unknown names fall back to DEFAULT_PROFILE.
+        media_info: ffprobe data of the input (only needed for 'size_targeted').
+        target_size_mb: Output size for 'size_targeted'.
+        audio_only: True if the target is an audio-only format.
+
+    Raises:
+        ValueError: For 'size_targeted' when the duration is unknown or the size is too small.
+    """
+    options = dict(ENCODING_PROFILES.get(profile, ENCODING_PROFILES[DEFAULT_PROFILE])['options'])
+    if profile == 'size_targeted':
+        options.update(size_targeted_options(target_size_mb, media_duration(media_info), audio_only, int(options['audio_bitrate'].rstrip('k'))))
+    return options
+
+
+class EncoderCalibration(JsonStore):
+    """
+    Encode speed of each profile's x264 preset on this machine, persisted in the cache
+    directory (see utils.cache.JsonStore).
+
+    Speed is stored as pixels per second (frames/s times the calibration frame size), so a
+    prediction for another resolution scales with its pixel count. Loaded lazily.
+    """
+
+    def __init__(self, calibration_file=None):
+        super().__init__(calibration_file or get_cache_path('encoder_calibration.json'), profile_logger, 'encoder calibration')
+        self._data = {}
+
+    def _restore(self, stored):
+        self._data = dict(stored)
+
+    def _clear(self):
+        self._data = {}
+
+    def _snapshot(self):
+        return self._data
+
+    def get(self):
+        """Returns {'profiles': {name: {'preset', 'fps', 'pixels_per_second'}}, 'measured_at', 'cpu_count'} or {}."""
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._data)
+
+    def run(self, profiles=None, progress_callback=None):
+        """
+        Encodes CALIBRATION_FRAMES frames of ffmpeg's testsrc2 with each profile's preset and
+        stores the measured speeds. Profiles sharing a preset share one measurement.
+        Blocking; run it off the GUI thread.
+
+        Args:
+            profiles: Profile names to measure (default: all).
+            progress_callback: Optional callable(profile_name, result_dict) after each preset.
+
+        Returns:
+            dict: The calibration data ('profiles' is empty if every measurement failed).
+        """
+        width, height = CALIBRATION_SIZE
+        results, measured = {}, {}
+        for name in profiles or list(ENCODING_PROFILES):
+            preset = ENCODING_PROFILES[name]['options']['preset']
+            if preset in measured:
+                results[name] = measured[preset]
+                continue
+            started = time.monotonic()
+            try:
+                subprocess.run(["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "lavfi",
+                                "-i", f"testsrc2=size={width}x{height}:rate=30", "-frames:v", str(CALIBRATION_FRAMES),
+                                "-c:v", "libx264", "-preset", preset, "-f", "null", "-"], check=True, capture_output=True)
+            except (OSError, subprocess.CalledProcessError) as e:
+                profile_logger.error(f"Encoder calibration of preset '{preset}' failed: {e}")
+                continue
+            fps = CALIBRATION_FRAMES / max(time.monotonic() - started, 1e-6)
+            results[name] = measured[preset] = {'preset': preset, 'fps': fps, 'pixels_per_second': fps * width * height}
+            profile_logger.info(f"Calibrated {name} (preset {preset}): {fps:.1f} fps at {width}x{height}")
+            if progress_callback:
+                progress_callback(name, results[name])
+        data = {'profiles': results, 'measured_at': time.time(), 'cpu_count': os.cpu_count()}
+        if not results: # Keep an earlier calibration when ffmpeg could not run at all
+            return data
+        with self._lock:
+            self._data = data
+            self._loaded = True
+            self._mark_dirty()
+        self.flush() # A calibration is rare and expensive; it is written right away
+        return data
+
+    def estimate_seconds(self, profile, media_info, video_codec='libx264', threads=None):
+        """
+        Predicted encode time of a video from its ffprobe data, or None when the profile was not
+        calibrated, the codec is not an x264 one or the probe data lacks size/duration.
+
+        Calibration lets ffmpeg use every core; an encode limited to fewer threads is
+        assumed to slow down in proportion.
+        """
+        calibration = self.get()
+        measured = calibration.get('profiles', {}).get(profile)
+        duration = media_duration(media_info)
+        if not measured or not duration or video_codec not in CALIBRATED_CODECS:
+            return None
+        for stream in (media_info or {}).get('streams', []):
+            if stream.get('codec_type') == 'video' and stream.get('width') and stream.get('height'):
+                try:
+                    num, den = (stream.get('avg_frame_rate') or '30/1').split('/')
+                    fps = float(num) / float(den) if float(den) else 30.0
+                except ValueError:
+                    fps = 30.0
+                cores = calibration.get('cpu_count') or 1
+                return duration * (fps or 30.0) * stream['width'] * stream['height'] / measured['pixels_per_second'] * cores / min(threads or cores, cores)
+        return None
+
+
+_calibration = None
+_calibration_lock = threading.Lock()
+
+
+def get_encoder_calibration():
+    """Returns the process-wide EncoderCalibration, creating it on first use."""
+    global _calibration
+    with _calibration_lock:
+        if _calibration is None:
+            _calibration = EncoderCalibration()
+        return _calibration
@@ -0,0 +1,225 @@
+import hashlib
+import io
+import json
+import os
+import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .converter import get_media_info
+from .profiles import media_duration
+from ..utils.cache import DigestIndex, get_cache_path
+from ..utils.logger import setup_logger
+
+thumb_logger = setup_logger('Thumbnails', 'conversion.log')
+
+# Frames per video and their width in the sprite sheet; heights follow the aspect ratio.
+DEFAULT_FRAME_COUNT = 8
+DEFAULT_TILE_WIDTH = 160
+DEFAULT_COLUMNS = 4
+SHEET_JPEG_QUALITY = 85
+THUMBNAIL_WORKERS = min(4, (os.cpu_count() or 2))
+# Seconds one frame grab may take before it is given up (a seek into a damaged file can hang).
+FRAME_TIMEOUT = 20
+# "Duration: 00:01:02.50," in ffmpeg's input summary; used when ffprobe is unavailable.
+FFMPEG_DURATION_PATTERN = re.compile(r"Duration:\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+
+def _duration_from_ffmpeg(input_file_path):
+    """Duration parsed from the header summary ffmpeg prints for an input, or None. Nothing is decoded."""
+    try:
+        result = subprocess.run(["ffmpeg", "-hide_banner", "-i", input_file_path], capture_output=True, text=True, errors='replace', timeout=FRAME_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = FFMPEG_DURATION_PATTERN.search(result.stderr)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds) or None
+
+
+def _grab_frame(input_file_path, timestamp, width, keyframes_only):
+    try:
+        result = subprocess.run(["ffmpeg", "-hide_banner", "-loglevel", "error"] + (["-skip_frame", "nokey"] if keyframes_only else []) +
+                                ["-ss", f"{timestamp:.3f}", "-noaccurate_seek", "-i", input_file_path,
+                                 "-map", "0:v:0", "-frames:v", "1", "-vf", f"scale={width}:-2", "-an", "-sn",
+                                 "-f", "image2pipe", "-c:v", "mjpeg", "-q:v", "4", "-"], capture_output=True, timeout=FRAME_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        thumb_logger.warning(f"Frame grab at {timestamp:.1f}s of {input_file_path} failed: {e}")
+        return None
+    return result.stdout if result.returncode == 0 and result.stdout else None
+
+
+def _grab_keyframe(input_file_path, timestamp, width):
+    """
+    JPEG bytes of a frame near timestamp, scaled to width, or None.
+
+    The seek is an input option, so ffmpeg jumps through the container index instead of
+    decoding up to the timestamp, and -skip_frame nokey makes the decoder drop every
+    non-key frame; the grab costs one keyframe decode wherever it is in the file. When
+    no keyframe follows the seek point (long GOPs, e.g. a single keyframe per file), the
+    frame is decoded normally from the preceding keyframe instead.
+    """
+    return _grab_frame(input_file_path, timestamp, width, True) or _grab_frame(input_file_path, timestamp, width, False)
+
+
+def extract_keyframes(input_file_path, count=DEFAULT_FRAME_COUNT, width=DEFAULT_TILE_WIDTH):
+    """
+    Grabs count keyframes spread evenly over a video (at the middle of each of count equal spans).
+
+    The duration comes from get_media_info (probe cache) or, failing that, ffmpeg's input summary.
+
+    Returns:
+        list: (timestamp_seconds, jpeg_bytes) tuples of the frames that could be grabbed;
+              empty if the file has no video stream or cannot be read.
+    """
+    duration = media_duration(get_media_info(input_file_path)) or _duration_from_ffmpeg(input_file_path)
+    timestamps = [duration * (i + 0.5) / count for i in range(count)] if duration else [0.0]
+    frames = []
+    for timestamp in timestamps:
+        jpeg = _grab_keyframe(input_file_path, timestamp, width)
+        if jpeg:
+            frames.append((timestamp, jpeg))
+    return frames
+
+
+def build_sprite_sheet(frames, output_path, columns=DEFAULT_COLUMNS):
+    """
+    Tiles JPEG frames left to right, top to bottom into one JPEG with Pillow.
+
+    Args:
+        frames: List of JPEG bytes, all of the same width.
+        output_path: Where to write the sheet.
+        columns: Tiles per row.
+
+    Returns:
+        dict: 'tile_width', 'tile_height', 'columns', 'rows' of the written sheet.
+    """
+    from PIL import Image
+    images = [Image.open(io.BytesIO(jpeg)).convert('RGB') for jpeg in frames]
+    tile_width = max(image.width for image in images)
+    tile_height = max(image.height for image in images)
+    columns = min(columns, len(images))
+    rows = (len(images) + columns - 1) // columns
+    sheet = Image.new('RGB', (tile_width * columns, tile_height * rows))
+    for index, image in enumerate(images):
+        sheet.paste(image, ((index % columns) * tile_width, (index // columns) * tile_height))
+    tmp_path = f"{output_path}.tmp"
+    sheet.save(tmp_path, format='JPEG', quality=SHEET_JPEG_QUALITY)
+    os.replace(tmp_path, output_path)
+    return {'tile_width': tile_width, 'tile_height': tile_height, 'columns': columns, 'rows': rows}
+
+
+_digest_index = None
+_digest_index_lock = threading.Lock()
+
+
+def _get_digest_index():
+    global _digest_index
+    with _digest_index_lock:
+        if _digest_index is None:
+            _digest_index = DigestIndex(os.path.join(get_cache_path('thumbnails'), 'digests.json'), thumb_logger)
+        return _digest_index
+
+
+def _cache_paths(content_digest, count, width, columns):
+    digest = hashlib.sha1(f"{content_digest}|{count}|{width}|{columns}".encode('utf-8')).hexdigest()
+    folder = get_cache_path('thumbnails')
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{digest}.jpg"), os.path.join(folder, f"{digest}.json")
+
+
+def _read_sheet(sheet_path, meta_path):
+    if not os.path.exists(meta_path) or not os.path.exists(sheet_path):
+        return None
+    try:
+        with open(meta_path, 'r') as f:
+            return dict(json.load(f), sheet_path=sheet_path)
+    except (OSError, ValueError):
+        return None
+
+
+def cached_sprite_sheet(input_file_path, count=DEFAULT_FRAME_COUNT, width=DEFAULT_TILE_WIDTH, columns=DEFAULT_COLUMNS):
+    """
+    The cached sheet of the file's current content (see get_sprite_sheet), or None. Does no
+    media work and does not read the file: a file whose digest is not known yet is a miss.
+    """
+    content_digest = _get_digest_index().lookup(input_file_path)
+    return _read_sheet(*_cache_paths(content_digest, count, width, columns)) if content_digest else None
+
+
+def get_sprite_sheet(input_file_path, count=DEFAULT_FRAME_COUNT, width=DEFAULT_TILE_WIDTH, columns=DEFAULT_COLUMNS):
+    """
+    Returns the sprite sheet of a video, extracting and caching it on a miss.
+
+    Sheets live in the 'thumbnails' cache directory, keyed by the SHA-1 of the file's
+    content and the layout, so a copied or moved file reuses its sheet and a changed file
+    gets a new one. The digest of each file_key is remembered (utils.cache.DigestIndex),
+    so an unchanged file is hashed only once. The metadata file is written after the
+    image, so a sheet is only used once it is complete.
+
+    Returns:
+        dict: 'sheet_path', 'tile_width', 'tile_height', 'columns', 'rows', 'timestamps'
+              (seconds of each tile), or None if no frame could be extracted.
+    """
+    content_digest = _get_digest_index().digest(input_file_path)
+    if content_digest is None:
+        return None
+    sheet_path, meta_path = _cache_paths(content_digest, count, width, columns)
+    sheet = _read_sheet(sheet_path, meta_path)
+    if sheet:
+        return sheet
+    frames = extract_keyframes(input_file_path, count, width)
+    if not frames:
+        thumb_logger.info(f"No video frames in {input_file_path}; no thumbnails.")
+        return None
+    try:
+        meta = build_sprite_sheet([jpeg for _, jpeg in frames], sheet_path, columns)
+    except (OSError, ValueError) as e: # Pillow raises these for undecodable frames and write errors
+        thumb_logger.error(f"Could not build sprite sheet for {input_file_path}: {e}")
+        return None
+    meta['timestamps'] = [round(timestamp, 3) for timestamp, _ in frames]
+    tmp_path = f"{meta_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+    thumb_logger.info(f"Built {len(frames)}-frame sprite sheet for {input_file_path}")
+    return dict(meta, sheet_path=sheet_path)
+
+
+# Sheets being built in the background pool, keyed by absolute path, so a file is only
+# processed once however often it is requested.
+_inflight = {}
+_inflight_lock = threading.Lock()
+_executor = None
+
+
+def request_sprite_sheet(input_file_path, callback=None):
+    """
+    Builds a file's sprite sheet in a background pool (THUMBNAIL_WORKERS threads).
+
+    Args:
+        input_file_path: Video file path.
+        callback: Optional callable(sheet_dict_or_None), called from a pool thread when done.
+
+    Returns:
+        concurrent.futures.Future resolving to get_sprite_sheet()'s result.
+    """
+    global _executor
+    abs_path = os.path.abspath(input_file_path)
+    with _inflight_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnails")
+        future = _inflight.get(abs_path)
+        if future is None:
+            future = _inflight[abs_path] = _executor.submit(get_sprite_sheet, abs_path)
+            future.add_done_callback(lambda f, p=abs_path: _forget(p))
+    if callback:
+        future.add_done_callback(lambda f: callback(None if f.exception() else f.result()))
+    return future
+
+
+def _forget(abs_path):
+    with _inflight_lock:
+        _inflight.pop(abs_path, None)
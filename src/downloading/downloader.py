@@ -1,11 +1,23 @@
-import yt_dlp
 import argparse
 import os
+import time
 from ..utils.logger import setup_logger # Assuming logger.py is in src/utils
+from ..scheduling.disk_space import MergeGuard
+from ..utils.output_paths import DEFAULT_LAYOUT, safe_name, layout_directory, reserve_name, release_name
+from ..utils import scratch
+# yt_dlp is imported inside each function that needs it: loading it takes a large
+# share of the GUI's start-up time, and most sessions do not download right away.
 
 # Setup logger for this module
 download_logger = setup_logger('yt_downloader', 'youtube_download.log', console_out=True) # console_out for dev
 
+
+class DownloadPaused(Exception):
+    """
+    Raised by a progress hook to stop a download that will be resumed later. Unlike any
+    other exception from a hook (a cancellation), it keeps the file name reserved.
+    """
+
 def get_video_info(url, ydl_opts=None):
     """
     Fetches video title, ID, and available formats using yt-dlp.
@@ -15,9 +27,11 @@ def get_video_info(url, ydl_opts=None):
         ydl_opts: Optional yt-dlp options dictionary.
 
     Returns:
-        Dictionary with 'id', 'title', and a list of 'formats', or None if info fetch fails.
+        Dictionary with 'id', 'title', 'channel', 'uploader', 'upload_date' and a list of 'formats',
+        or None if info fetch fails.
     """
     # Use a new YDL opts dict for this function to avoid modifying the global one if passed
+    import yt_dlp
     current_ydl_opts = {'quiet': True, 'nocheckcertificate': True} # nocheckcertificate can help with some network issues
     if ydl_opts:
         current_ydl_opts.update(ydl_opts)
@@ -35,6 +49,7 @@ def get_video_info(url, ydl_opts=None):
                     })
             return {
                 'id': info.get('id'), 'title': info.get('title'),
+                'channel': info.get('channel'), 'uploader': info.get('uploader'), 'upload_date': info.get('upload_date'),
                 'formats': formats, 'original_url': url,
             }
     except yt_dlp.utils.DownloadError as e:
@@ -44,8 +59,51 @@ def get_video_info(url, ydl_opts=None):
         download_logger.error(f"Generic error fetching video info for {url}: {e}")
         return None
 
+def _format_options(quality_label, preferred_format):
+    """
+    yt-dlp format selection for a quality label and container.
+
+    Returns:
+        Tuple (format_selector, postprocessors, merge_output_format)
+    """
+    if quality_label.startswith('audio_only'):
+        audio_format = preferred_format if preferred_format in ['mp3', 'm4a', 'ogg'] else 'mp3'
+        format_selector = f'bestaudio[ext={audio_format}]/bestaudio'
+        postprocessors = [{'key': 'FFmpegExtractAudio', 'preferredcodec': audio_format, 'preferredquality': '192'}]
+        merge_format = None
+    else:
+        height_filter = ""
+        if quality_label != 'best' and quality_label.endswith('p'):
+            try:
+                height = int(quality_label[:-1])
+                height_filter = f'[height<={height}]'
+            except ValueError:
+                download_logger.warning(f"Invalid quality label '{quality_label}'. Using 'best'.")
+
+        # More robust format selection: try preferred, then webm, then best overall
+        format_selector = (
+            f'bestvideo{height_filter}[ext={preferred_format}]+bestaudio[ext=m4a]'
+            f'/bestvideo{height_filter}[ext=webm]+bestaudio[ext=m4a]' # Common fallback
+            f'/bestvideo{height_filter}+bestaudio'
+            f'/best[ext={preferred_format}]'
+            f'/best[ext=webm]'
+            f'/best'
+        )
+        if quality_label == 'best':
+            format_selector = (
+                f'bestvideo[ext={preferred_format}]+bestaudio[ext=m4a]'
+                f'/bestvideo[ext=webm]+bestaudio[ext=m4a]'
+                f'/bestvideo+bestaudio'
+                f'/best[ext={preferred_format}]'
+                f'/best[ext=webm]'
+                f'/best'
+            )
+        postprocessors = []
+        merge_format = preferred_format
+    return format_selector, postprocessors, merge_format
+
 def download_video(url, output_path, quality_label='best', preferred_format='mp4', 
-                   progress_hooks=None, ydl_opts_override=None, max_retries=2, task_id_for_hook=None):
+                   progress_hooks=None, ydl_opts_override=None, max_retries=2, task_id_for_hook=None, output_layout=DEFAULT_LAYOUT, scratch_dir=None):
     """
     Downloads a single video from YouTube.
 
@@ -57,60 +115,40 @@ def download_video(url, output_path, quality_label='best', preferred_format='mp4
                           For audio_only, this is the audio format like 'mp3'.
         progress_hooks: List of functions to call for progress updates.
         ydl_opts_override: Dictionary to override default yt-dlp options.
+        output_layout: Sub-folder layout below output_path (key of utils.output_paths.OUTPUT_LAYOUTS).
+        scratch_dir: Optional fast local directory for part files, fragments and merge inputs;
+                     yt-dlp moves only the finished file to output_path.
+
+    The file name is the sanitized title, reserved with utils.output_paths.reserve_name, so
+    a different video with the same title gets "Title (2)" instead of overwriting it. The
+    reservation is released when the download ends, however it ends, unless a progress
+    hook raised DownloadPaused; that exception propagates to the caller.
 
     Returns:
         Tuple (success_boolean, final_filepath_or_error_message_string)
     """
+    import yt_dlp
     video_info = get_video_info(url)
     if not video_info:
         return False, f"Failed to fetch video info for {url}"
 
     title = video_info.get('title', 'untitled_video')
-    safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-    os.makedirs(output_path, exist_ok=True)
+    output_path = layout_directory(output_path, output_layout, video_info)
+    try:
+        safe_title = reserve_name(output_path, safe_name(title), video_info.get('id') or url)
+    except OSError as e:
+        return False, f"Cannot reserve a file name for '{title}': {e}"
+    temp_path = scratch.download_scratch_dir(scratch_dir, video_info.get('id') or url) if scratch_dir else None
 
     # Initial ydl_opts setup based on arguments
     def _get_initial_ydl_opts(current_quality_label, current_preferred_format, current_output_path_template):
-        if current_quality_label.startswith('audio_only'):
-            audio_format = current_preferred_format if current_preferred_format in ['mp3', 'm4a', 'ogg'] else 'mp3'
-            format_selector = f'bestaudio[ext={audio_format}]/bestaudio'
-            postprocessors = [{'key': 'FFmpegExtractAudio', 'preferredcodec': audio_format, 'preferredquality': '192'}]
-            merge_format = None
-        else:
-            height_filter = ""
-            if current_quality_label != 'best' and current_quality_label.endswith('p'):
-                try:
-                    height = int(current_quality_label[:-1])
-                    height_filter = f'[height<={height}]'
-                except ValueError:
-                    download_logger.warning(f"Invalid quality label '{current_quality_label}'. Using 'best'.")
-            
-            # More robust format selection: try preferred, then webm, then best overall
-            format_selector = (
-                f'bestvideo{height_filter}[ext={current_preferred_format}]+bestaudio[ext=m4a]'
-                f'/bestvideo{height_filter}[ext=webm]+bestaudio[ext=m4a]' # Common fallback
-                f'/bestvideo{height_filter}+bestaudio'
-                f'/best[ext={current_preferred_format}]'
-                f'/best[ext=webm]'
-                f'/best'
-            )
-            if current_quality_label == 'best':
-                format_selector = (
-                    f'bestvideo[ext={current_preferred_format}]+bestaudio[ext=m4a]'
-                    f'/bestvideo[ext=webm]+bestaudio[ext=m4a]'
-                    f'/bestvideo+bestaudio'
-                    f'/best[ext={current_preferred_format}]'
-                    f'/best[ext=webm]'
-                    f'/best'
-                )
-            postprocessors = []
-            merge_format = current_preferred_format
-
+        format_selector, postprocessors, merge_format = _format_options(current_quality_label, current_preferred_format)
         opts = {
             'format': format_selector,
             'outtmpl': current_output_path_template,
             'noplaylist': True,
             'quiet': False, # Capture output for logging/hooks
+            'logger': download_logger, # yt-dlp's screen output goes through the queued log pipeline instead of stdout
             'progress_hooks': progress_hooks if progress_hooks else [],
             'merge_output_format': merge_format,
             'postprocessors': postprocessors,
@@ -121,74 +159,268 @@ def download_video(url, output_path, quality_label='best', preferred_format='mp4
         }
         if ydl_opts_override:
             opts.update(ydl_opts_override)
+        opts['postprocessor_hooks'] = list(opts.get('postprocessor_hooks') or []) + [merge_guard]
+        if temp_path: # yt-dlp writes below 'temp' and moves the finished file to 'home'
+            opts['outtmpl'] = os.path.basename(current_output_path_template)
+            opts['paths'] = {'home': output_path, 'temp': temp_path}
         return opts
 
+    merge_guard = MergeGuard(temp_path or output_path) # Limits concurrent merges on the disk they write to
     last_error = None
-    for attempt_num in range(max_retries + 1):
-        current_ydl_opts = {}
-        attempt_message_prefix = f"Attempt {attempt_num + 1}/{max_retries + 1}"
-
-        if attempt_num == 0: # Initial attempt
-            filename_template = f"{safe_title}.%(ext)s" # Let yt-dlp determine extension initially
-            output_template = os.path.join(output_path, filename_template)
-            current_ydl_opts = _get_initial_ydl_opts(quality_label, preferred_format, output_template)
-            log_message = f"{attempt_message_prefix}: Downloading {url} as {quality_label} ({preferred_format})"
-            download_logger.info(log_message)
-            if progress_hooks: # Notify UI of initial attempt
-                 for hook in progress_hooks:
-                    hook({'status': 'retrying', 'message': log_message, 'id': task_id_for_hook, 'attempt_num': attempt_num + 1, 'max_retries': max_retries +1})
-
-        else: # Retry attempts
-            download_logger.warning(f"{attempt_message_prefix}: Previous attempt failed for {url}. Retrying with fallback options...")
-            # Fallback: generic mp4, often more compatible
-            fallback_preferred_format = 'mp4'
-            fallback_quality_label = 'best' # Generic best for fallback
-            # Use a slightly different name for fallback attempts to avoid conflicts if partial files exist
-            fallback_filename_template = f"{safe_title}_fallback_attempt{attempt_num}.%(ext)s"
-            fallback_output_template = os.path.join(output_path, fallback_filename_template)
+    paused = False
+    try:
+        for attempt_num in range(max_retries + 1):
+            current_ydl_opts = {}
+            attempt_message_prefix = f"Attempt {attempt_num + 1}/{max_retries + 1}"
+
+            if attempt_num == 0: # Initial attempt
+                filename_template = f"{safe_title}.%(ext)s" # Let yt-dlp determine extension initially
+                output_template = os.path.join(output_path, filename_template)
+                current_ydl_opts = _get_initial_ydl_opts(quality_label, preferred_format, output_template)
+                log_message = f"{attempt_message_prefix}: Downloading {url} as {quality_label} ({preferred_format})"
+                download_logger.info(log_message)
+                if progress_hooks: # Notify UI of initial attempt
+                     for hook in progress_hooks:
+                        hook({'status': 'retrying', 'message': log_message, 'id': task_id_for_hook, 'attempt_num': attempt_num + 1, 'max_retries': max_retries +1})
+
+            else: # Retry attempts
+                download_logger.warning(f"{attempt_message_prefix}: Previous attempt failed for {url}. Retrying with fallback options...")
+                # Fallback: generic mp4, often more compatible
+                fallback_preferred_format = 'mp4'
+                fallback_quality_label = 'best' # Generic best for fallback
+                # Use a slightly different name for fallback attempts to avoid conflicts if partial files exist
+                fallback_filename_template = f"{safe_title}_fallback_attempt{attempt_num}.%(ext)s"
+                fallback_output_template = os.path.join(output_path, fallback_filename_template)
             
-            current_ydl_opts = _get_initial_ydl_opts(fallback_quality_label, fallback_preferred_format, fallback_output_template)
-            # Ensure the fallback uses a very common format string
-            current_ydl_opts['format'] = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best'
-            current_ydl_opts['merge_output_format'] = 'mp4' # Explicitly mp4 for this common fallback
+                current_ydl_opts = _get_initial_ydl_opts(fallback_quality_label, fallback_preferred_format, fallback_output_template)
+                # Ensure the fallback uses a very common format string
+                current_ydl_opts['format'] = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best'
+                current_ydl_opts['merge_output_format'] = 'mp4' # Explicitly mp4 for this common fallback
             
-            log_message = f"{attempt_message_prefix}: Retrying {url} with generic best quality (mp4)."
-            download_logger.info(log_message)
-            if progress_hooks:
-                for hook in progress_hooks:
-                    hook({'status': 'retrying', 'message': log_message, 'id': task_id_for_hook, 'attempt_num': attempt_num + 1, 'max_retries': max_retries +1})
+                log_message = f"{attempt_message_prefix}: Retrying {url} with generic best quality (mp4)."
+                download_logger.info(log_message)
+                if progress_hooks:
+                    for hook in progress_hooks:
+                        hook({'status': 'retrying', 'message': log_message, 'id': task_id_for_hook, 'attempt_num': attempt_num + 1, 'max_retries': max_retries +1})
         
-        try:
-            with yt_dlp.YoutubeDL(current_ydl_opts) as ydl:
-                ydl.download([url])
-            # If download successful, the 'finished' status in progress_hook should have the final filename.
-            # For now, we assume the hook handles the final path.
-            # If no hooks, we'd need to infer the path.
-            # This function's primary role is to manage attempts and return success/failure.
-            # The actual final path should ideally come from the 'finished' hook.
-            download_logger.info(f"{attempt_message_prefix} for {url} succeeded.")
-            # The hook should provide the actual path, but if not, we can construct a probable one.
-            # This part is tricky as yt-dlp names files. The hook is the best source.
-            # For now, returning a generic success message, actual path is in hook.
-            return True, f"Download successful after {attempt_num+1} attempt(s)." 
-        except yt_dlp.utils.DownloadError as e:
-            last_error = str(e)
-            download_logger.error(f"{attempt_message_prefix} failed for {url}: {last_error}")
-            # Check for specific error types that shouldn't be retried
-            if "Unsupported URL" in last_error or "Video unavailable" in last_error:
-                break # No point retrying these
-        except Exception as e: # Catch other errors like network issues, ffmpeg errors during postprocessing
-            last_error = str(e)
-            download_logger.error(f"{attempt_message_prefix} encountered an unexpected error for {url}: {last_error}")
-            # If it's a KeyboardInterrupt, don't retry.
-            if isinstance(e, KeyboardInterrupt):
-                 download_logger.warning(f"Download for {url} cancelled by user.")
-                 break
+            try:
+                try:
+                    with yt_dlp.YoutubeDL(current_ydl_opts) as ydl:
+                        if temp_path:
+                            # Postprocessor hooks otherwise last see the file in the scratch folder;
+                            # this no-op step runs after the move, so they report the final path.
+                            ydl.add_post_processor(yt_dlp.postprocessor.common.PostProcessor(), when='after_move')
+                        ydl.download([url])
+                finally:
+                    merge_guard.release() # A merge that failed or was cancelled never reports 'finished'
+                # If download successful, the 'finished' status in progress_hook should have the final filename.
+                # For now, we assume the hook handles the final path.
+                # If no hooks, we'd need to infer the path.
+                # This function's primary role is to manage attempts and return success/failure.
+                # The actual final path should ideally come from the 'finished' hook.
+                download_logger.info(f"{attempt_message_prefix} for {url} succeeded.")
+                if temp_path:
+                    try:
+                        os.rmdir(temp_path) # Empty once yt-dlp has moved the file
+                    except OSError:
+                        pass
+                # The hook should provide the actual path, but if not, we can construct a probable one.
+                # This part is tricky as yt-dlp names files. The hook is the best source.
+                # For now, returning a generic success message, actual path is in hook.
+                return True, f"Download successful after {attempt_num+1} attempt(s)." 
+            except DownloadPaused:
+                raise
+            except yt_dlp.utils.DownloadError as e:
+                last_error = str(e)
+                download_logger.error(f"{attempt_message_prefix} failed for {url}: {last_error}")
+                # Check for specific error types that shouldn't be retried
+                if "Unsupported URL" in last_error or "Video unavailable" in last_error:
+                    break # No point retrying these
+            except Exception as e: # Catch other errors like network issues, ffmpeg errors during postprocessing
+                last_error = str(e)
+                download_logger.error(f"{attempt_message_prefix} encountered an unexpected error for {url}: {last_error}")
+                # If it's a KeyboardInterrupt, don't retry.
+                if isinstance(e, KeyboardInterrupt):
+                     download_logger.warning(f"Download for {url} cancelled by user.")
+                     break
+    except DownloadPaused:
+        paused = True # The name stays reserved, so the resumed download continues its .part file
+        raise
+    finally:
+        if not paused: # Finished, failed or cancelled (a hook raised)
+            release_name(output_path, safe_title)
 
     download_logger.error(f"All {max_retries + 1} attempts failed for {url}. Last error: {last_error}")
     return False, f"All attempts failed. Last error: {last_error}"
 
 
+# Protocols stream_video reads as one byte stream; fragmented ones (HLS, DASH) are downloaded to a file.
+STREAMABLE_PROTOCOLS = ('http', 'https')
+STREAM_BLOCK_SIZE = 256 * 1024
+
+def _streamable_format(info):
+    """
+    The one format to stream for a resolved info dict, or None.
+
+    A selection of separate video and audio formats needs a merge; it is replaced by a
+    format that carries both, if one exists at the selected height or higher.
+    """
+    requested = info.get('requested_formats')
+    if not requested:
+        return info if info.get('url') and info.get('protocol') in STREAMABLE_PROTOCOLS else None
+    height = max(f.get('height') or 0 for f in requested)
+    progressive = [f for f in info.get('formats', []) if f.get('vcodec') not in (None, 'none') and f.get('acodec') not in (None, 'none')
+                   and (f.get('height') or 0) >= height and f.get('url') and f.get('protocol') in STREAMABLE_PROTOCOLS]
+    return max(progressive, key=lambda f: (f.get('height') or 0, f.get('tbr') or 0), default=None)
+
+def _iter_format_bytes(ydl, fmt, on_progress):
+    """
+    Yields the bytes of one http(s) format. Formats for which the extractor sets
+    http_chunk_size (YouTube throttles long single requests) are read in ranges of that size.
+    on_progress(downloaded_bytes, total_bytes_or_None) is called after every block.
+    """
+    from yt_dlp.networking import Request
+    range_size = (fmt.get('downloader_options') or {}).get('http_chunk_size')
+    total = fmt.get('filesize') or fmt.get('filesize_approx')
+    downloaded = 0
+    while True:
+        headers = dict(fmt.get('http_headers') or {})
+        if range_size:
+            headers['Range'] = f"bytes={downloaded}-{downloaded + range_size - 1}"
+        with ydl.urlopen(Request(fmt['url'], headers=headers)) as response:
+            ranged = response.status == 206
+            length = (response.headers.get('Content-Range') or '').rpartition('/')[2] if ranged else response.headers.get('Content-Length')
+            total = int(length) if length and length.isdigit() else total
+            received = 0
+            for block in iter(lambda: response.read(STREAM_BLOCK_SIZE), b''):
+                received += len(block); downloaded += len(block)
+                on_progress(downloaded, total)
+                yield block
+        if not ranged or received < range_size or (total and downloaded >= total):
+            return
+
+def stream_video(url, output_path, quality_label='best', preferred_format='mp4',
+                 progress_hooks=None, ydl_opts_override=None, max_retries=2, task_id_for_hook=None, output_layout=DEFAULT_LAYOUT, scratch_dir=None):
+    """
+    Downloads a single video straight into ffmpeg, so only the converted file is written.
+
+    The format is chosen as download_video would choose it, and its bytes are piped into
+    converter.convert_stream while they arrive. Audio-only downloads are encoded to the
+    audio format (192 kbit/s, like download_video's extraction); videos are copied into
+    the container when the format already has its extension (or into MKV), and re-encoded otherwise.
+    Selections that need a merge of separate video and audio, fragmented formats
+    (HLS/DASH) and failed streams fall back to download_video, as do extraction errors.
+
+    Args and return value are those of download_video. Progress hooks receive yt-dlp
+    style 'downloading' and 'finished' updates; postprocessor_hooks in ydl_opts_override
+    receive the final path. Exceptions raised by a progress hook (e.g. a cancellation)
+    propagate to the caller; the name reservation is kept only for DownloadPaused.
+    """
+    import yt_dlp
+    from ..conversion import converter
+    override = dict(ydl_opts_override or {})
+    postprocessor_hooks = override.pop('postprocessor_hooks', [])
+    override.pop('progress_hooks', None)
+    format_selector, _, _ = _format_options(quality_label, preferred_format)
+    opts = {'format': format_selector, 'noplaylist': True, 'quiet': True, 'logger': download_logger, 'nocheckcertificate': True, **override}
+
+    def _fall_back(reason):
+        reason = str(reason).strip().splitlines()[-1] if str(reason).strip() else 'unknown error' # Last line of ffmpeg's stderr
+        download_logger.info(f"Streaming {url} not possible ({reason}); downloading to a file instead.")
+        return download_video(url, output_path, quality_label, preferred_format, progress_hooks, ydl_opts_override, max_retries, task_id_for_hook, output_layout, scratch_dir)
+
+    directory = name = None
+    paused = False
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+            fmt = _streamable_format(info)
+            if fmt is None:
+                return _fall_back("the format needs a merge or is fragmented")
+            audio_only = quality_label.startswith('audio_only')
+            target_format = (preferred_format if preferred_format in ['mp3', 'm4a', 'ogg'] else 'mp3') if audio_only else preferred_format
+            title = info.get('title', 'untitled_video')
+            directory = layout_directory(output_path, output_layout, info)
+            name = reserve_name(directory, safe_name(title), info.get('id') or url) # Same owner, so a fallback download keeps the name
+            output_file = os.path.join(directory, f"{name}.{target_format}")
+            if fmt.get('ext') == target_format or (target_format == 'mkv' and not audio_only): # Matroska takes any codec
+                quality_options = {'video_codec': 'copy', 'audio_codec': 'copy', 'audio_bitrate': None, 'crf': None}
+            else:
+                quality_options = {'audio_bitrate': '192k'}
+            info_dict = {'id': info.get('id'), 'title': title, 'filename': output_file}
+            started = time.monotonic()
+
+            def _on_progress(downloaded, total):
+                elapsed = max(time.monotonic() - started, 1e-6)
+                speed = downloaded / elapsed
+                for hook in progress_hooks or []:
+                    hook({'status': 'downloading', 'downloaded_bytes': downloaded, 'total_bytes': total, 'speed': speed,
+                          'eta': (total - downloaded) / speed if total else None, 'filename': output_file, 'info_dict': info_dict})
+
+            download_logger.info(f"Streaming {url} (format {fmt.get('format_id')}, {fmt.get('ext')}) into {output_file}")
+            success, result = converter.convert_stream(_iter_format_bytes(ydl, fmt, _on_progress), output_file, target_format, quality_options, scratch_dir=scratch_dir)
+        if not success:
+            return _fall_back(result)
+    except (yt_dlp.utils.DownloadError, yt_dlp.networking.exceptions.RequestError) as e:
+        return _fall_back(e)
+    except OSError as e: # No name could be reserved
+        return False, f"Cannot reserve a file name for {url}: {e}"
+    except DownloadPaused:
+        paused = True
+        raise
+    finally:
+        if name is not None and not paused: # The fallback download reserved (and released) the same name
+            release_name(directory, name)
+    finished = {'status': 'finished', 'filename': output_file, 'total_bytes': os.path.getsize(output_file),
+                'info_dict': {**info_dict, 'filepath': output_file}}
+    for hook in (progress_hooks or []) + postprocessor_hooks:
+        hook(finished)
+    return True, "Streamed download and conversion finished."
+
+def iter_playlist_entries(playlist_url, ydl_opts=None):
+    """
+    Yields the entries of a playlist or channel one at a time, as yt-dlp pages through it.
+
+    The playlist is extracted flat and unprocessed, so yt-dlp only requests the next
+    page when more entries are asked for; a caller that stops iterating early never
+    fetches the rest of the playlist.
+
+    Args:
+        playlist_url: YouTube playlist or channel URL.
+        ydl_opts: Optional yt-dlp options.
+
+    Yields:
+        Dictionaries with 'id', 'title', 'original_url', 'playlist_title', 'playlist_id'.
+
+    Raises:
+        yt_dlp.utils.DownloadError: If the playlist cannot be extracted.
+    """
+    import yt_dlp
+    current_ydl_opts = {
+        'quiet': True, 'extract_flat': True, 'skip_download': True,
+        'nocheckcertificate': True,
+    }
+    if ydl_opts:
+        current_ydl_opts.update(ydl_opts)
+
+    with yt_dlp.YoutubeDL(current_ydl_opts) as ydl:
+        playlist_dict = ydl.extract_info(playlist_url, download=False, process=False)
+        for _ in range(3): # Follow redirects (channel home -> videos tab, watch?v=..&list=..) without processing
+            if not playlist_dict or playlist_dict.get('_type') not in ('url', 'url_transparent'):
+                break
+            playlist_dict = ydl.extract_info(playlist_dict['url'], download=False, ie_key=playlist_dict.get('ie_key'), process=False)
+        if not playlist_dict:
+            return
+        for entry in playlist_dict.get('entries') or []:
+            if entry:
+                yield {
+                    'id': entry.get('id'), 'title': entry.get('title', 'N/A'),
+                    'original_url': entry.get('url') or f"https://www.youtube.com/watch?v={entry.get('id')}",
+                    'playlist_title': playlist_dict.get('title', 'N/A'),
+                    'playlist_id': playlist_dict.get('id', 'N/A'),
+                }
+
+
 def get_playlist_info(playlist_url, ydl_opts=None):
     """
     Fetches info for all videos in a playlist without downloading.
@@ -201,29 +433,12 @@ def get_playlist_info(playlist_url, ydl_opts=None):
         A list of dictionaries, each containing 'id', 'title', 'original_url'.
         Returns None if playlist info extraction fails.
     """
-    base_ydl_opts = {
-        'quiet': True, 'extract_flat': True, 'skip_download': True,
-        'nocheckcertificate': True,
-    }
-    if ydl_opts:
-        current_ydl_opts.update(ydl_opts)
-    
-    videos_info = []
+    import yt_dlp
     try:
-        with yt_dlp.YoutubeDL(current_ydl_opts) as ydl:
-            playlist_dict = ydl.extract_info(playlist_url, download=False)
-            if playlist_dict and 'entries' in playlist_dict:
-                for entry in playlist_dict['entries']:
-                    if entry:
-                        videos_info.append({
-                            'id': entry.get('id'), 'title': entry.get('title', 'N/A'),
-                            'original_url': entry.get('url') or f"https://www.youtube.com/watch?v={entry.get('id')}",
-                            'playlist_title': playlist_dict.get('title', 'N/A'),
-                            'playlist_id': playlist_dict.get('id', 'N/A'),
-                        })
-            else:
-                download_logger.warning(f"No entries found in playlist: {playlist_url}")
-                return None
+        videos_info = list(iter_playlist_entries(playlist_url, ydl_opts))
+        if not videos_info:
+            download_logger.warning(f"No entries found in playlist: {playlist_url}")
+            return None
         return videos_info
     except yt_dlp.utils.DownloadError as e:
         download_logger.error(f"yt-dlp DownloadError fetching playlist info for {playlist_url}: {e}")
@@ -255,7 +470,7 @@ def download_playlist(playlist_url, output_path, quality_label='best', preferred
         return
 
     playlist_main_title = playlist_videos[0].get('playlist_title', 'youtube_playlist')
-    safe_playlist_title = "".join(c for c in playlist_main_title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+    safe_playlist_title = safe_name(playlist_main_title, 'youtube_playlist')
     playlist_specific_output_path = os.path.join(output_path, safe_playlist_title)
     os.makedirs(playlist_specific_output_path, exist_ok=True)
 
@@ -295,8 +510,9 @@ def download_playlist(playlist_url, output_path, quality_label='best', preferred
     else:
         download_logger.info(f"Playlist items added to queue for: {safe_playlist_title}")
 
-# Removed old CLI from __main__ as this module is primarily for library use.
-# Testing should be done via UI or dedicated test scripts.
+if __name__ == '__main__':
+    # Minimal single-URL CLI; batch downloads with manifests are handled by src/cli.py.
+    parser = argparse.ArgumentParser(description="YouTube downloader CLI")
     parser.add_argument("--url", help="URL of the single video to download")
     parser.add_argument("--playlist", help="URL of the playlist to download")
     parser.add_argument("--output", required=True, help="Output directory to save files")
@@ -313,11 +529,9 @@ def download_playlist(playlist_url, output_path, quality_label='best', preferred
 
     if args.url:
         print(f"Attempting to download single video: {args.url}")
-        success = download_video(args.url, args.output, args.quality, args.format)
-        if success:
-            print(f"Single video download process finished.")
-        else:
-            print(f"Single video download process failed.")
+        success, message = download_video(args.url, args.output, args.quality, args.format)
+        print(f"Single video download {'finished' if success else 'failed'}: {message}")
+        raise SystemExit(0 if success else 1)
     elif args.playlist:
         print(f"Attempting to download playlist: {args.playlist}")
         download_playlist(args.playlist, args.output, args.quality, args.format)
@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+
+from ..utils.cache import JsonStore, get_cache_path
+from ..utils.logger import setup_logger
+
+history_logger = setup_logger('DownloadHistory', 'application.log')
+
+DEFAULT_MAX_ENTRIES = 100000
+
+
+class DownloadHistory(JsonStore):
+    """
+    Completed downloads, keyed by url_tools keys (video ID for YouTube URLs), persisted
+    to a JSON file so bulk imports can skip what was already downloaded.
+
+    Loaded lazily on first use; add() schedules a write a few seconds ahead (see
+    utils.cache.JsonStore), so a crash during a long import loses only the last few
+    entries. The oldest entries are dropped beyond max_entries.
+    """
+
+    def __init__(self, history_file=None, max_entries=DEFAULT_MAX_ENTRIES):
+        super().__init__(history_file or get_cache_path('download_history.json'), history_logger, 'download history')
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def _restore(self, stored):
+        self._entries.update(stored)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        history_logger.info(f"Loaded {len(self._entries)} download history entries from {self.path}")
+
+    def _clear(self):
+        self._entries.clear()
+
+    def _snapshot(self):
+        return self._entries
+
+    def __contains__(self, key):
+        with self._lock:
+            self._ensure_loaded()
+            return key in self._entries
+
+    def add(self, key, title=None, filepath=None):
+        """Records a completed download."""
+        if not key:
+            return
+        with self._lock:
+            self._ensure_loaded()
+            self._entries[key] = {'title': title, 'filepath': filepath, 'completed_at': time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._mark_dirty()
+
+
+_download_history = None
+_download_history_lock = threading.Lock()
+
+
+def get_download_history():
+    """Returns the process-wide DownloadHistory, creating it on first use."""
+    global _download_history
+    with _download_history_lock:
+        if _download_history is None:
+            _download_history = DownloadHistory()
+        return _download_history
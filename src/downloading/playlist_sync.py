@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+
+from . import downloader
+from .history import get_download_history
+from .url_tools import video_key
+from ..utils.cache import JsonStore, get_cache_path
+from ..utils.logger import setup_logger
+from ..utils.output_paths import RESERVATION_SUFFIX, safe_name
+
+sync_logger = setup_logger('PlaylistSync', 'application.log')
+
+# Newest-first listings stop after this many consecutive entries that are already downloaded.
+# A few extra entries guard against re-ordered or re-uploaded videos near the top.
+STOP_AFTER_KNOWN = 5
+# Seen IDs remembered per playlist; the oldest are dropped beyond this.
+MAX_SEEN_IDS = 20000
+# Files yt-dlp leaves next to unfinished downloads, and name reservation markers; they do not count as downloaded.
+PARTIAL_SUFFIXES = ('.part', '.ytdl', '.temp', RESERVATION_SUFFIX)
+
+ORDER_NEWEST_FIRST = 'newest_first'
+ORDER_APPENDED = 'appended'
+
+
+class PlaylistSyncState(JsonStore):
+    """
+    Per-playlist sync state, keyed by url_tools keys ('ytlist:ID', 'ytchannel:@name/videos'),
+    persisted to a JSON file in the cache directory (see utils.cache.JsonStore).
+
+    For each playlist it keeps its title, the entry IDs seen by earlier syncs, the order in
+    which new entries show up ('newest_first' or 'appended', once known) and the time of the
+    last sync.
+    """
+
+    def __init__(self, state_file=None):
+        super().__init__(state_file or get_cache_path('playlist_sync.json'), sync_logger, 'playlist sync state')
+        self._playlists = {}
+
+    def _restore(self, stored):
+        self._playlists.update(stored)
+
+    def _clear(self):
+        self._playlists.clear()
+
+    def _snapshot(self):
+        return self._playlists
+
+    def get(self, key):
+        """Returns a copy of a playlist's state ('title', 'seen', 'order', 'last_synced'), or None."""
+        with self._lock:
+            self._ensure_loaded()
+            state = self._playlists.get(key)
+            return dict(state, seen=list(state['seen'])) if state else None
+
+    def record_sync(self, key, title, seen_ids, order=None):
+        """Adds the entry IDs enumerated by a sync (in playlist order) and stores the learned order."""
+        with self._lock:
+            self._ensure_loaded()
+            state = self._playlists.setdefault(key, {'title': title, 'seen': [], 'order': None, 'last_synced': None})
+            known = set(state['seen'])
+            state['seen'].extend(i for i in seen_ids if i not in known)
+            del state['seen'][:-MAX_SEEN_IDS]
+            state.update({'title': title or state['title'], 'order': order or state['order'], 'last_synced': time.time()})
+            self._mark_dirty()
+
+
+_sync_state = None
+_sync_state_lock = threading.Lock()
+
+
+def get_playlist_sync_state():
+    """Returns the process-wide PlaylistSyncState, creating it on first use."""
+    global _sync_state
+    with _sync_state_lock:
+        if _sync_state is None:
+            _sync_state = PlaylistSyncState()
+        return _sync_state
+
+
+class PlaylistSync:
+    """
+    Enumerates a playlist or channel and yields only the entries that still need downloading.
+
+    An entry is already downloaded if its video is in the download history or a file with
+    its title exists in <output_path>/<playlist title> (where playlist items are saved).
+    Entries come from downloader.iter_playlist_entries(), which pages through the playlist
+    lazily. Channels list their newest videos first, and so do playlists whose earlier syncs
+    found new entries at the top; for those, enumeration stops after STOP_AFTER_KNOWN
+    consecutive entries that were seen before and are downloaded, so only the pages holding
+    new entries are fetched. Other playlists append new entries at the end and are
+    enumerated completely, but only their new entries are returned.
+
+    After iterating new_entries(), 'stats' holds the counts of scanned, known and new
+    entries and whether enumeration stopped early.
+    """
+
+    def __init__(self, url, playlist_key, output_path, kind='playlist', state=None, history=None, entry_source=None):
+        self.url = url
+        self.playlist_key = playlist_key or url
+        self.output_path = output_path
+        self.kind = kind
+        self.state = state or get_playlist_sync_state()
+        self.history = history if history is not None else get_download_history()
+        self.entry_source = entry_source or downloader.iter_playlist_entries
+        self.stats = {'scanned': 0, 'known': 0, 'new': 0, 'stopped_early': False}
+
+    def _files_on_disk(self, playlist_title):
+        # Walks sub-folders too, since an output layout (see utils.output_paths) may shard the files.
+        folder = os.path.join(self.output_path, safe_name(playlist_title, 'pl'))
+        return {os.path.splitext(name)[0] for _, _, names in os.walk(folder) for name in names if not name.endswith(PARTIAL_SUFFIXES)}
+
+    def new_entries(self):
+        """
+        Yields entry dicts (as from iter_playlist_entries, plus 'playlist_index') of videos not
+        downloaded yet, in playlist order. Records the sync in the state once enumeration ends.
+
+        Raises:
+            yt_dlp.utils.DownloadError: If the playlist cannot be extracted.
+        """
+        previous = self.state.get(self.playlist_key) or {}
+        seen_before = set(previous.get('seen', []))
+        order = ORDER_NEWEST_FIRST if self.kind == 'channel' else previous.get('order')
+        stop_early = order == ORDER_NEWEST_FIRST and bool(seen_before)
+        on_disk, playlist_title, scanned_ids = None, previous.get('title'), []
+        unseen_positions, first_seen_position = [], None
+        known_streak = 0
+        completed = False
+        try:
+            for index, entry in enumerate(self.entry_source(self.url)):
+                if on_disk is None:
+                    playlist_title = entry.get('playlist_title') or playlist_title or 'Playlist'
+                    on_disk = self._files_on_disk(playlist_title)
+                entry_id = entry.get('id')
+                self.stats['scanned'] += 1
+                scanned_ids.append(entry_id)
+                if entry_id in seen_before:
+                    first_seen_position = index if first_seen_position is None else first_seen_position
+                else:
+                    unseen_positions.append(index)
+                downloaded = video_key(entry_id, entry.get('original_url')) in self.history or safe_name(entry.get('title')) in on_disk
+                if downloaded:
+                    self.stats['known'] += 1
+                    known_streak = known_streak + 1 if entry_id in seen_before else 0
+                    if stop_early and known_streak >= STOP_AFTER_KNOWN:
+                        self.stats['stopped_early'] = True
+                        break
+                    continue
+                known_streak = 0
+                self.stats['new'] += 1
+                yield dict(entry, playlist_index=index)
+            completed = True
+        finally:
+            if completed: # A failed or abandoned enumeration does not update the state
+                if unseen_positions and first_seen_position is not None and self.kind != 'channel':
+                    # New entries only above the known ones mean the playlist grows at the top.
+                    order = ORDER_NEWEST_FIRST if max(unseen_positions) < first_seen_position else ORDER_APPENDED
+                self.state.record_sync(self.playlist_key, playlist_title, [i for i in scanned_ids if i], order)
+                sync_logger.info(f"Synced {self.playlist_key}: {self.stats['new']} new of {self.stats['scanned']} scanned"
+                                 f"{' (stopped at known entries)' if self.stats['stopped_early'] else ''}, order {order or 'unknown'}")
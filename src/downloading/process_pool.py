@@ -0,0 +1,219 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from ..scheduling import disk_space
+from ..utils.logger import setup_logger
+from ..utils.progress_table import ProgressTable, STATE_DOWNLOADING
+from ..utils.telemetry import TaskTelemetry
+
+pool_logger = setup_logger('DownloadProcessPool', 'application.log')
+
+# Upper bound on worker processes (the download auto-tuner's maximum).
+MAX_WORKER_PROCESSES = 16
+# How often the event listener checks for worker processes that died without reporting.
+LIVENESS_CHECK_SECONDS = 0.5
+# Seconds shutdown() waits for idle workers to exit before terminating them.
+SHUTDOWN_TIMEOUT = 3.0
+# Values of a slot's cancel flag; a paused job keeps its reserved file name (downloader.DownloadPaused).
+CANCEL_FLAG = 1
+PAUSE_FLAG = 2
+
+
+class DownloadCancelled(Exception):
+    pass
+
+
+def _run_job(job, table, cancel_flags, events):
+    """Runs one download in a worker process. Returns the result dict sent back as the 'finished' event."""
+    from . import downloader
+    job_id, slot = job['job_id'], job['slot']
+    telemetry = TaskTelemetry('download', job_id, job.get('enqueued_at'))
+    finished_info = {}
+    reported_title = [None]
+
+    def _progress_hook(d):
+        if cancel_flags[slot] == PAUSE_FLAG:
+            raise downloader.DownloadPaused("Download paused by user via _progress_hook")
+        if cancel_flags[slot]:
+            raise DownloadCancelled("Download cancelled by user via _progress_hook")
+        if d['status'] == 'retrying':
+            events.put(('status', job_id, ('retrying', d.get('message', 'Retrying download...'))))
+        elif d['status'] == 'downloading':
+            telemetry.stop('metadata'); telemetry.stop('postprocess'); telemetry.start('transfer')
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            percentage = d.get('downloaded_bytes', 0) / total * 100 if total else 0
+            table.write(slot, STATE_DOWNLOADING, percentage=percentage, downloaded_bytes=d.get('downloaded_bytes'),
+                        total_bytes=total, speed=d.get('speed'), eta=d.get('eta'))
+            title = d.get('info_dict', {}).get('title', d.get('filename', "N/A"))
+            if title != reported_title[0]:
+                reported_title[0] = title
+                events.put(('title', job_id, title))
+        elif d['status'] == 'finished':
+            telemetry.stop('transfer'); telemetry.start('postprocess')
+            telemetry.bytes += d.get('total_bytes') or d.get('downloaded_bytes') or 0
+            finished_info.update(filepath=d.get('info_dict', {}).get('filepath') or d.get('filename'),
+                                 title=d.get('info_dict', {}).get('title', "Unknown title"))
+            events.put(('status', job_id, ('postprocessing', 'Merging / post-processing...')))
+
+    def _postprocessor_hook(d):
+        if d.get('status') == 'finished' and d.get('info_dict', {}).get('filepath'):
+            finished_info['filepath'] = d['info_dict']['filepath'] # Final path after merging/extraction
+
+    if cancel_flags[slot]:
+        success, message = False, 'Cancelled before start.'
+    else:
+        telemetry.start('metadata')
+        try:
+            fetch = downloader.stream_video if job.get('stream') else downloader.download_video
+            success, message = fetch(
+                url=job['url'], output_path=job['output_path'], quality_label=job['quality'], preferred_format=job['format'],
+                progress_hooks=[_progress_hook], max_retries=2, task_id_for_hook=job_id, output_layout=job.get('output_layout', 'flat'), scratch_dir=job.get('scratch_dir'),
+                ydl_opts_override={'postprocessor_hooks': [_postprocessor_hook]})
+        except (DownloadCancelled, downloader.DownloadPaused):
+            success, message = False, 'Download cancelled by user.'
+        except Exception as e:
+            success, message = False, f"Worker error: {e}"
+    telemetry.stop_all()
+    if cancel_flags[slot]:
+        status, message = 'cancelled', 'Download cancelled by user.'
+    else:
+        status = 'completed' if success else 'failed'
+        message = "Download finished successfully." if success else message
+    if status != 'completed':
+        return {'status': status, 'message': message, 'filepath': None, 'telemetry': telemetry.to_dict()}
+    return {'status': status, 'message': message, 'filepath': finished_info.get('filepath'),
+            'title': finished_info.get('title', "Unknown title"), 'telemetry': telemetry.to_dict()}
+
+
+def _worker_main(jobs, events, table_name, slots, cancel_flags, merge_semaphore):
+    """Entry point of a worker process: runs jobs until it receives None."""
+    table = ProgressTable.attach(table_name, slots)
+    disk_space.set_shared_merge_semaphore(merge_semaphore) # Merges are limited across all workers, not per process
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            events.put(('started', job['job_id'], os.getpid()))
+            try:
+                result = _run_job(job, table, cancel_flags, events)
+            except Exception as e: # Keep the process alive for the next job
+                result = {'status': 'failed', 'message': f"Worker error: {e}", 'filepath': None, 'telemetry': None}
+            events.put(('finished', job['job_id'], result))
+    finally:
+        table.close()
+
+
+class DownloadProcessPool:
+    """
+    Long-lived worker processes that run downloads outside the GUI process.
+
+    yt-dlp's extraction, hooks and post-processor orchestration then run under each
+    worker's own GIL instead of the UI's. Processes are started on demand (spawned, not
+    forked, since the GUI process runs Qt threads) up to max_workers and then reused.
+
+    IPC per download is kept small:
+      - progress goes into the task's slot of the shared ProgressTable;
+      - cancellation is one byte per slot in a shared array, polled by the progress hook;
+      - rare events (start, title, retrying/post-processing, the final result with the
+        file path and telemetry) are tuples on one multiprocessing queue, dispatched by
+        a listener thread to the callback given to submit().
+      - merges share one semaphore across the workers (see disk_space.MergeGuard).
+
+    A worker process that dies while running a job reports that job as failed and is
+    replaced on the next submit().
+    """
+
+    def __init__(self, progress_table, max_workers=MAX_WORKER_PROCESSES):
+        self.progress_table = progress_table
+        self.max_workers = max_workers
+        self._ctx = multiprocessing.get_context('spawn')
+        self._jobs = self._ctx.Queue()
+        self._events = self._ctx.Queue()
+        self._cancel_flags = self._ctx.RawArray('B', progress_table.slots)
+        self._merge_semaphore = self._ctx.BoundedSemaphore(disk_space.MAX_MERGES_PER_DEVICE)
+        self._lock = threading.Lock()
+        self._processes = []
+        self._callbacks = {} # job ID -> callback(event, payload)
+        self._running = {} # job ID -> pid of the process running it
+        self._stopping = False
+        self._listener = threading.Thread(target=self._listen, name="download-pool-events", daemon=True)
+        self._listener.start()
+
+    def submit(self, job_id, slot, url, output_path, quality, video_format, enqueued_at, callback, stream=False, output_layout='flat', scratch_dir=None):
+        """
+        Queues a download. callback(event, payload) is called from the listener thread with
+        ('title', str), ('status', (status, message)) and finally ('finished', result dict
+        with 'status', 'message', 'filepath', 'telemetry' and, for completed downloads, 'title').
+        With stream, the download is converted while it arrives (downloader.stream_video).
+        output_layout picks the sub-folder below output_path (utils.output_paths.OUTPUT_LAYOUTS).
+        scratch_dir, if given, holds the part files until yt-dlp moves the finished file.
+        """
+        self._cancel_flags[slot] = 0
+        with self._lock:
+            self._callbacks[job_id] = callback
+            self._processes = [p for p in self._processes if p.is_alive()]
+            if len(self._callbacks) > len(self._processes) and len(self._processes) < self.max_workers:
+                process = self._ctx.Process(target=_worker_main, name=f"download-worker-{len(self._processes) + 1}", daemon=True,
+                                            args=(self._jobs, self._events, self.progress_table.name, self.progress_table.slots, self._cancel_flags, self._merge_semaphore))
+                process.start()
+                self._processes.append(process)
+                pool_logger.info(f"Started download worker process {process.pid} ({len(self._processes)} running)")
+        self._jobs.put({'job_id': job_id, 'slot': slot, 'url': url, 'output_path': output_path,
+                        'quality': quality, 'format': video_format, 'enqueued_at': enqueued_at, 'stream': stream,
+                        'output_layout': output_layout, 'scratch_dir': scratch_dir})
+
+    def cancel(self, slot, pause=False):
+        """Asks the job writing to this progress slot to stop; it reports 'cancelled'. With pause, it keeps its reserved file name."""
+        self._cancel_flags[slot] = PAUSE_FLAG if pause else CANCEL_FLAG
+
+    def _listen(self):
+        last_check = time.monotonic()
+        while not self._stopping:
+            if time.monotonic() - last_check >= LIVENESS_CHECK_SECONDS:
+                self._reap_dead_workers(); last_check = time.monotonic()
+            try:
+                event, job_id, payload = self._events.get(timeout=LIVENESS_CHECK_SECONDS)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                if event == 'started':
+                    self._running[job_id] = payload
+                    continue
+                callback = self._callbacks.get(job_id)
+                if event == 'finished':
+                    self._callbacks.pop(job_id, None); self._running.pop(job_id, None)
+            if callback:
+                callback(event, payload)
+
+    def _reap_dead_workers(self):
+        with self._lock:
+            alive = {p.pid for p in self._processes if p.is_alive()}
+            lost = [job_id for job_id, pid in self._running.items() if pid not in alive]
+            callbacks = [(job_id, self._callbacks.pop(job_id, None)) for job_id in lost]
+            for job_id in lost:
+                del self._running[job_id]
+        for job_id, callback in callbacks:
+            pool_logger.error(f"Download worker process running {job_id} exited unexpectedly.")
+            if callback:
+                callback('finished', {'status': 'failed', 'message': "Download worker process exited unexpectedly.",
+                                      'filepath': None, 'telemetry': None})
+
+    def shutdown(self):
+        """Stops the workers: idle ones exit, busy ones are terminated after SHUTDOWN_TIMEOUT."""
+        self._stopping = True
+        for slot in range(self.progress_table.slots):
+            self._cancel_flags[slot] = CANCEL_FLAG
+        for _ in self._processes:
+            self._jobs.put(None)
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        for process in self._processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.terminate()
+        pool_logger.info(f"Download process pool stopped ({len(self._processes)} workers).")
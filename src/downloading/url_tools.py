@@ -0,0 +1,85 @@
+import re
+
+# One pattern for every YouTube URL shape we accept. The video ID (always 11 characters),
+# the playlist ID or the channel path is captured, so differently written URLs of the same
+# video (youtu.be/, shorts/, extra query parameters, m./music. hosts) normalize to one key.
+YOUTUBE_URL_PATTERN = re.compile(r"""
+    ^(?:https?://)?(?:www\.|m\.|music\.)?
+    (?:
+        (?:youtube\.com|youtube-nocookie\.com)/(?:watch\?(?:[^\s#]*?&)?v=|shorts/|embed/|live/|v/)(?P<video>[A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])
+      | youtu\.be/(?P<short>[A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])
+      | youtube\.com/playlist\?(?:[^\s#]*?&)?list=(?P<playlist>[A-Za-z0-9_-]+)
+      | youtube\.com/(?P<channel>(?:@|channel/|c/|user/)[^/?#\s]+)(?P<tab>/(?:videos|streams|shorts))?/?(?:[?#]\S*)?$
+    )
+""", re.VERBOSE | re.IGNORECASE)
+# Separators between URLs in pasted text or imported files: whitespace, commas, semicolons.
+URL_SEPARATOR_PATTERN = re.compile(r"[\s,;]+")
+
+
+def classify_url(url):
+    """
+    Normalizes one URL.
+
+    YouTube URLs are reduced to their video or playlist ID. Other URLs are accepted with
+    the same rules as before ("watch?" / "youtu.be/" for videos, "playlist?" for
+    playlists) and are keyed by the URL itself.
+
+    Args:
+        url (str): A single URL.
+
+    Returns:
+        dict: {'kind': 'video'|'playlist'|'channel', 'id': str or None, 'key': str, 'url': str},
+              or None if the URL is not a video, playlist or channel URL. Channel URLs
+              point at one tab of the channel (its videos unless another tab is given).
+    """
+    url = url.strip()
+    match = YOUTUBE_URL_PATTERN.match(url)
+    if match:
+        video_id = match.group('video') or match.group('short')
+        if video_id:
+            return {'kind': 'video', 'id': video_id, 'key': f"yt:{video_id}", 'url': f"https://www.youtube.com/watch?v={video_id}"}
+        if match.group('channel'):
+            channel_tab = f"{match.group('channel')}{(match.group('tab') or '/videos').lower()}"
+            return {'kind': 'channel', 'id': channel_tab, 'key': f"ytchannel:{channel_tab}", 'url': f"https://www.youtube.com/{channel_tab}"}
+        playlist_id = match.group('playlist')
+        return {'kind': 'playlist', 'id': playlist_id, 'key': f"ytlist:{playlist_id}", 'url': f"https://www.youtube.com/playlist?list={playlist_id}"}
+    lowered = url.lower()
+    if "playlist?" in lowered:
+        return {'kind': 'playlist', 'id': None, 'key': url, 'url': url}
+    if "watch?" in lowered or "youtu.be/" in lowered:
+        return {'kind': 'video', 'id': None, 'key': url, 'url': url}
+    return None
+
+
+def video_key(video_id, url=None):
+    """Dedup key of a video known by its ID (e.g. a playlist entry), matching classify_url's keys."""
+    return f"yt:{video_id}" if video_id else url
+
+
+def parse_urls(text, is_known=None):
+    """
+    Splits pasted text or a file's content into URLs, normalizes them and drops duplicates.
+
+    Args:
+        text (str): URLs separated by newlines, whitespace, commas or semicolons.
+        is_known (callable): Optional is_known(key) -> bool for keys to skip (queued
+                             tasks, download history); should be O(1).
+
+    Returns:
+        dict: 'entries' (classify_url dicts, in input order, each key once),
+              'duplicates' (count of URLs already seen in the text or known),
+              'invalid' (list of tokens that are not video/playlist/channel URLs).
+    """
+    entries, invalid, seen, duplicates = [], [], set(), 0
+    for token in URL_SEPARATOR_PATTERN.split(text):
+        if not token:
+            continue
+        entry = classify_url(token)
+        if entry is None:
+            invalid.append(token)
+        elif entry['key'] in seen or (is_known and is_known(entry['key'])):
+            duplicates += 1
+        else:
+            seen.add(entry['key'])
+            entries.append(entry)
+    return {'entries': entries, 'duplicates': duplicates, 'invalid': invalid}
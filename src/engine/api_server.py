@@ -0,0 +1,180 @@
+import json
+import os
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from ..utils.logger import setup_logger
+from ..utils.telemetry import get_metrics_registry
+
+api_logger = setup_logger('JobAPI', 'application.log')
+
+# How often an idle /events stream sends a keep-alive line.
+EVENT_KEEPALIVE_SECONDS = 15
+
+# Spec fields that name where a job writes; they must stay inside the engine's output directories.
+OUTPUT_PATH_FIELDS = ('output_path', 'output_dir', 'output_filepath')
+
+
+class _JobAPIHandler(BaseHTTPRequestHandler):
+    """
+    Local JSON API on top of a JobEngine:
+
+        POST   /jobs              submit one job spec or a list of specs
+        GET    /jobs[?status=..]  list jobs
+        GET    /jobs/<id>         job status
+        DELETE /jobs/<id>         cancel (also POST /jobs/<id>/cancel)
+        GET    /events            newline-delimited JSON stream of progress/status events
+        GET    /health            engine statistics
+        GET    /metrics[?format=json]  task telemetry in the Prometheus text format (or JSON)
+
+    Requests that carry an Origin header come from a web page and are refused, so a site
+    open in a browser cannot drive the API. POST bodies must be sent as application/json.
+    """
+    server_version = "VersaDownloaderJobAPI/1.0"
+    protocol_version = "HTTP/1.0" # One request per connection; /events streams until the client disconnects
+
+    @property
+    def engine(self):
+        return self.server.engine
+
+    def log_message(self, format, *args):
+        api_logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status_code, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _path_parts(self):
+        parsed = urlparse(self.path)
+        return [p for p in parsed.path.split('/') if p], parse_qs(parsed.query)
+
+    def _from_browser(self):
+        """Refuses requests made by a web page (browsers always send Origin on cross-site requests)."""
+        if self.headers.get('Origin') is None:
+            return False
+        api_logger.warning(f"Refused {self.command} {self.path} from origin {self.headers['Origin']}")
+        self._send_json(403, {'error': 'Cross-origin requests are not allowed.'})
+        return True
+
+    def _check_output_paths(self, spec):
+        for field in OUTPUT_PATH_FIELDS:
+            if spec.get(field) and not self.server.is_output_path_allowed(spec[field]):
+                raise ValueError(f"'{field}' must be inside one of: {', '.join(self.server.output_roots)}")
+
+    def do_GET(self):
+        if self._from_browser():
+            return
+        parts, query = self._path_parts()
+        if parts == ['health']:
+            self._send_json(200, self.engine.stats())
+        elif parts == ['jobs']:
+            status = query.get('status', [None])[0]
+            self._send_json(200, {'jobs': self.engine.list_jobs(status)})
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            job = self.engine.get(parts[1])
+            self._send_json(200, job) if job else self._send_json(404, {'error': f"Unknown job {parts[1]}"})
+        elif parts == ['events']:
+            self._stream_events()
+        elif parts == ['metrics']:
+            self._send_metrics(query.get('format', ['prometheus'])[0])
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if self._from_browser():
+            return
+        parts, _ = self._path_parts()
+        if parts == ['jobs']:
+            if self.headers.get_content_type() != 'application/json':
+                self._send_json(415, {'error': "Content-Type must be application/json."})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'null')
+                specs = payload if isinstance(payload, list) else [payload]
+                if not all(isinstance(spec, dict) for spec in specs):
+                    raise ValueError("Expected a job object or a list of job objects.")
+                for spec in specs:
+                    self._check_output_paths(spec)
+                jobs = [self.engine.submit(spec) for spec in specs]
+            except ValueError as e: # Includes json.JSONDecodeError
+                self._send_json(400, {'error': str(e)})
+                return
+            self._send_json(201, {'jobs': jobs})
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'cancel':
+            self._cancel(parts[1])
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_DELETE(self):
+        if self._from_browser():
+            return
+        parts, _ = self._path_parts()
+        if len(parts) == 2 and parts[0] == 'jobs':
+            self._cancel(parts[1])
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def _send_metrics(self, fmt):
+        registry = get_metrics_registry()
+        if fmt == 'json':
+            body, content_type = registry.to_json().encode('utf-8'), 'application/json'
+        else:
+            body, content_type = registry.to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _cancel(self, job_id):
+        if self.engine.cancel(job_id):
+            self._send_json(202, {'id': job_id, 'cancelled': True})
+        elif self.engine.get(job_id):
+            self._send_json(409, {'id': job_id, 'cancelled': False, 'error': 'Job already finished.'})
+        else:
+            self._send_json(404, {'error': f"Unknown job {job_id}"})
+
+    def _stream_events(self):
+        events = self.engine.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            while not self.server.shutting_down.is_set():
+                try:
+                    event = events.get(timeout=EVENT_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    event = {'event': 'keepalive'}
+                self.wfile.write(json.dumps(event).encode('utf-8') + b'\n')
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self.engine.unsubscribe(events)
+
+
+class JobAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, engine, host='127.0.0.1', port=8765):
+        super().__init__((host, port), _JobAPIHandler)
+        self.engine = engine
+        self.shutting_down = threading.Event()
+        self.output_roots = sorted({os.path.realpath(d) for d in engine.default_dirs.values()})
+
+    def is_output_path_allowed(self, path):
+        """True if path resolves to one of the engine's default output directories or somewhere below them."""
+        path = os.path.realpath(path)
+        return any(os.path.commonpath([root, path]) == root for root in self.output_roots)
+
+    def shutdown(self):
+        self.shutting_down.set()
+        super().shutdown()
@@ -0,0 +1,324 @@
+import itertools
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from ..downloading import downloader
+from ..conversion import converter, loudness
+from ..utils.logger import setup_logger
+from ..utils.telemetry import TaskTelemetry, get_metrics_registry, kill_child
+from ..utils import scratch
+from ..utils.output_paths import DEFAULT_LAYOUT
+
+engine_logger = setup_logger('JobEngine', 'application.log')
+
+FINAL_STATUSES = ('completed', 'failed', 'cancelled')
+# Minimum interval between two 'progress' events of the same job.
+PROGRESS_EVENT_INTERVAL = 0.25
+# Finished jobs kept for status queries; older ones are pruned first.
+MAX_FINISHED_JOBS = 10000
+# Events are buffered per subscriber; a subscriber that falls this far behind loses events
+# rather than slowing down the workers.
+SUBSCRIBER_QUEUE_SIZE = 10000
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobEngine:
+    """
+    Headless download/conversion queue.
+
+    Runs the same downloader.download_video (with its retry/fallback logic) and
+    converter functions as the GUI workers, on two thread pools sized like the
+    GUI's concurrency limits. Jobs are plain dicts, as in MainWindow's queues.
+    Progress and status changes are published to subscribers as event dicts.
+    """
+
+    def __init__(self, max_concurrent_downloads=3, max_concurrent_conversions=2, default_download_dir=None, default_conversion_dir=None, scratch_dir=None):
+        self.max_concurrent = {'download': max_concurrent_downloads, 'conversion': max_concurrent_conversions}
+        self.default_dirs = {'download': default_download_dir or os.getcwd(), 'conversion': default_conversion_dir or os.getcwd()}
+        self.scratch_dir = scratch_dir or None # In-flight downloads and encodes; finished files are moved to their output directory
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._pending = {'download': queue.Queue(), 'conversion': queue.Queue()}
+        self._cancel_flags = {}
+        self._processes = {} # job_id -> ffmpeg subprocess of a running conversion, killed by cancel()
+        self._finished_order = deque()
+        self._subscribers = []
+        self._ids = itertools.count(1)
+        self._threads = []
+        self._stopping = threading.Event()
+
+    # --- Lifecycle ---
+
+    def start(self):
+        # Leftovers of an earlier run; swept in the background so start() does not wait on the disk
+        threading.Thread(target=scratch.cleanup_orphans, args=(self.scratch_dir,), kwargs={'download_dir': self.default_dirs['download']}, name="scratch-cleanup", daemon=True).start()
+        for kind, pending in self._pending.items():
+            for i in range(self.max_concurrent[kind]):
+                t = threading.Thread(target=self._worker_loop, args=(kind,), name=f"{kind}-worker-{i + 1}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        engine_logger.info(f"JobEngine started with {self.max_concurrent['download']} download and {self.max_concurrent['conversion']} conversion slots.")
+
+    def stop(self, cancel_running=True):
+        self._stopping.set()
+        if cancel_running:
+            for job_id in list(self.jobs):
+                self.cancel(job_id)
+        for kind, pending in self._pending.items():
+            for _ in range(self.max_concurrent[kind]):
+                pending.put(None)
+        engine_logger.info("JobEngine stopping.")
+
+    # --- Job API ---
+
+    def submit(self, spec):
+        """
+        Queues a job.
+
+        Args:
+            spec (dict): {'kind': 'download', 'url': ..., 'quality': 'best', 'format': 'mp4', 'output_path': ..., 'stream': False,
+                         'output_layout': 'flat'}
+                         or {'kind': 'conversion', 'input_filepath': ..., 'target_format': 'mp3',
+                         'output_dir': ..., 'task_subtype': None, 'quality_options': {...},
+                         'normalize_loudness': False}.
+
+        Returns:
+            dict: A copy of the created job.
+
+        Raises:
+            ValueError: If the spec is incomplete.
+        """
+        kind = spec.get('kind') or ('download' if spec.get('url') else 'conversion')
+        if kind == 'download':
+            if not spec.get('url'):
+                raise ValueError("Download jobs need a 'url'.")
+            job = {'url': spec['url'], 'quality': spec.get('quality', 'best'), 'format': spec.get('format', 'mp4'),
+                   'output_path': spec.get('output_path') or self.default_dirs['download'], 'title': spec['url'], 'stream': bool(spec.get('stream')),
+                   'output_layout': spec.get('output_layout') or DEFAULT_LAYOUT}
+        elif kind == 'conversion':
+            input_path = spec.get('input_filepath')
+            if not input_path or not spec.get('target_format'):
+                raise ValueError("Conversion jobs need 'input_filepath' and 'target_format'.")
+            subtype = spec.get('task_subtype') or converter.guess_task_subtype(input_path)
+            if not subtype:
+                raise ValueError(f"File type of '{input_path}' is not supported.")
+            output_dir = spec.get('output_dir') or self.default_dirs['conversion']
+            base_name = os.path.splitext(os.path.basename(input_path))[0]
+            job = {'input_filepath': input_path, 'target_format': spec['target_format'].lower(), 'task_subtype': subtype,
+                   'output_filepath': spec.get('output_filepath') or os.path.join(output_dir, f"{base_name}.{spec['target_format'].lower()}"),
+                   'quality_options': spec.get('quality_options') or {}, 'title': os.path.basename(input_path),
+                   'normalize_loudness': bool(spec.get('normalize_loudness')) and subtype in ('video', 'audio')}
+        else:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job_id = f"job_{next(self._ids)}_{int(time.time() * 1000)}"
+        job.update({'id': job_id, 'kind': kind, 'status': 'queued', 'percentage': 0.0, 'message': '',
+                    'filepath': None, 'created_at': time.time(), 'started_at': None, 'finished_at': None})
+        with self._lock:
+            self.jobs[job_id] = job
+            self._cancel_flags[job_id] = threading.Event()
+        self._publish({'event': 'status', 'job_id': job_id, 'status': 'queued', 'kind': kind})
+        self._pending[kind].put(job_id)
+        return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self, status=None):
+        with self._lock:
+            return [dict(j) for j in self.jobs.values() if status is None or j['status'] == status]
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+        return {'counts': counts, 'max_concurrent': dict(self.max_concurrent)}
+
+    def cancel(self, job_id):
+        """Cancels a queued or running job. Returns False if the job is unknown or already finished."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job or job['status'] in FINAL_STATUSES:
+                return False
+            self._cancel_flags[job_id].set()
+            was_queued = job['status'] == 'queued'
+            process = self._processes.get(job_id)
+        if was_queued: # A worker will skip it when it is dequeued
+            self._finish(job_id, 'cancelled', 'Cancelled before start.')
+        elif process:
+            kill_child(process)
+        return True
+
+    # --- Events ---
+
+    def subscribe(self):
+        """Returns a queue that receives every event published from now on."""
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+
+    def _publish(self, event):
+        event.setdefault('time', time.time())
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                pass
+
+    # --- Execution ---
+
+    def _worker_loop(self, kind):
+        pending = self._pending[kind]
+        while True:
+            job_id = pending.get()
+            if job_id is None or self._stopping.is_set():
+                return
+            with self._lock:
+                job = self.jobs.get(job_id)
+                if not job or job['status'] != 'queued':
+                    continue
+                job.update({'status': 'running', 'started_at': time.time()})
+                telemetry = TaskTelemetry(kind if kind == 'download' else f"{job['task_subtype']}_conversion", job_id, job['created_at'])
+            self._publish({'event': 'status', 'job_id': job_id, 'status': 'running', 'kind': kind})
+            try:
+                if kind == 'download':
+                    self._run_download(job, telemetry)
+                else:
+                    self._run_conversion(job, telemetry)
+            except Exception as e:
+                engine_logger.error(f"Job {job_id} crashed: {e}", exc_info=True)
+                self._finish(job_id, 'failed', f"Worker error: {e}")
+            with self._lock:
+                status = job['status']
+                job['telemetry'] = telemetry.to_dict()
+            get_metrics_registry().record_task(telemetry, status)
+
+    def _run_download(self, job, telemetry):
+        job_id = job['id']
+        cancel_flag = self._cancel_flags[job_id]
+        last_emit = [0.0]
+        result = {}
+
+        def _progress_hook(d):
+            if cancel_flag.is_set():
+                raise JobCancelled("Download cancelled via job API")
+            status = d.get('status')
+            if status == 'downloading':
+                telemetry.stop('metadata'); telemetry.stop('postprocess'); telemetry.start('transfer')
+                total = d.get('total_bytes') or d.get('total_bytes_estimate')
+                percentage = (d.get('downloaded_bytes', 0) / total * 100) if total else 0.0
+                title = d.get('info_dict', {}).get('title')
+                with self._lock:
+                    job['percentage'] = percentage
+                    if title:
+                        job['title'] = title
+                now = time.monotonic()
+                if now - last_emit[0] >= PROGRESS_EVENT_INTERVAL:
+                    last_emit[0] = now
+                    self._publish({'event': 'progress', 'job_id': job_id, 'percentage': percentage,
+                                   'downloaded_bytes': d.get('downloaded_bytes'), 'total_bytes': total,
+                                   'speed': d.get('speed'), 'eta': d.get('eta')})
+            elif status == 'retrying':
+                self._publish({'event': 'retrying', 'job_id': job_id, 'message': d.get('message'),
+                               'attempt_num': d.get('attempt_num'), 'max_retries': d.get('max_retries')})
+            elif status == 'finished':
+                telemetry.stop('transfer'); telemetry.start('postprocess')
+                telemetry.bytes += d.get('total_bytes') or d.get('downloaded_bytes') or 0
+                result['filepath'] = d.get('info_dict', {}).get('filepath') or d.get('filename')
+
+        def _postprocessor_hook(d):
+            if d.get('status') == 'finished' and d.get('info_dict', {}).get('filepath'):
+                result['filepath'] = d['info_dict']['filepath'] # Final path after merging/extraction
+
+        telemetry.start('metadata')
+        try:
+            fetch = downloader.stream_video if job.get('stream') else downloader.download_video
+            success, msg = fetch(
+                url=job['url'], output_path=job['output_path'], quality_label=job['quality'],
+                preferred_format=job['format'], progress_hooks=[_progress_hook], max_retries=2, task_id_for_hook=job_id,
+                output_layout=job['output_layout'], scratch_dir=self.scratch_dir, ydl_opts_override={'postprocessor_hooks': [_postprocessor_hook]})
+        except JobCancelled: # Raised from the hook outside yt-dlp's own error handling
+            success, msg = False, 'Download cancelled.'
+        telemetry.stop_all()
+        if cancel_flag.is_set():
+            self._finish(job_id, 'cancelled', 'Download cancelled.')
+        elif success:
+            self._finish(job_id, 'completed', msg, result.get('filepath'))
+        else:
+            self._finish(job_id, 'failed', msg)
+
+    def _run_conversion(self, job, telemetry):
+        job_id = job['id']
+        cancel_flag = self._cancel_flags[job_id]
+        encoding = [False, False] # 'starting' seen (the loudness analysis is over), encode ffmpeg started
+
+        def _progress_callback(data):
+            if data.get('status') == 'process_started': # Loudness analysis or encode; cancel() kills it
+                with self._lock:
+                    self._processes[job_id] = data['process']
+                encoding[1] = encoding[0]
+                if cancel_flag.is_set(): # Cancelled while ffmpeg was being launched
+                    kill_child(data['process'])
+            elif data.get('status') == 'starting':
+                encoding[0] = True
+                self._publish({'event': 'progress', 'job_id': job_id, 'message': data.get('message')})
+            elif data.get('status') in ('finished', 'error'):
+                telemetry.add_child_usage(data.get('cpu_seconds'), data.get('peak_rss_bytes'))
+
+        telemetry.start('encode')
+        try:
+            if job.get('normalize_loudness'):
+                success, msg_or_path = loudness.normalize_audio(
+                    job['input_filepath'], job['output_filepath'], job['target_format'], job['quality_options'], progress_callback=_progress_callback, scratch_dir=self.scratch_dir)
+            else:
+                success, msg_or_path = converter.convert_file(
+                    job['input_filepath'], job['output_filepath'], job['target_format'],
+                    job['task_subtype'], job['quality_options'], _progress_callback, self.scratch_dir)
+        finally:
+            with self._lock:
+                self._processes.pop(job_id, None)
+        telemetry.stop('encode')
+        if success and os.path.exists(msg_or_path):
+            telemetry.bytes = os.path.getsize(msg_or_path)
+        if cancel_flag.is_set() and not success: # A cancel that came after a successful encode is too late
+            if encoding[1] and not self.scratch_dir and os.path.exists(job['output_filepath']):
+                os.remove(job['output_filepath']) # Partial output of the killed ffmpeg; with a scratch dir the converter discarded it
+            self._finish(job_id, 'cancelled', 'Conversion cancelled.')
+        elif success:
+            self._finish(job_id, 'completed', f"Converted to {os.path.basename(msg_or_path)}", msg_or_path)
+        else:
+            self._finish(job_id, 'failed', msg_or_path)
+
+    def _finish(self, job_id, status, message, filepath=None):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job or job['status'] in FINAL_STATUSES:
+                return
+            job.update({'status': status, 'message': message, 'filepath': filepath, 'finished_at': time.time()})
+            if status == 'completed':
+                job['percentage'] = 100.0
+            self._finished_order.append(job_id)
+            while len(self._finished_order) > MAX_FINISHED_JOBS:
+                old_id = self._finished_order.popleft()
+                self.jobs.pop(old_id, None)
+                self._cancel_flags.pop(old_id, None)
+        log = engine_logger.info if status == 'completed' else engine_logger.warning
+        log(f"Job {job_id} {status}: {message}")
+        self._publish({'event': 'status', 'job_id': job_id, 'status': status, 'message': message, 'filepath': filepath})
@@ -0,0 +1,57 @@
+import argparse
+import signal
+import sys
+import threading
+
+from src.config.settings_manager import SettingsManager
+from src.engine.job_engine import JobEngine
+from src.engine.api_server import JobAPIServer
+from src.utils.logger import setup_logger
+
+headless_logger = setup_logger('headless', 'application.log', console_out=True)
+
+def main(argv=None):
+    """
+    Runs the download/conversion engine without a GUI and serves the local job API.
+
+    Concurrency limits, default output directories and the scratch directory come from
+    the same settings file as the GUI unless overridden on the command line.
+    """
+    parser = argparse.ArgumentParser(description="VersaDownloader headless engine with a local job API")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind the job API to (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the job API (default: 8765)")
+    parser.add_argument("--max-downloads", type=int, help="Concurrent downloads (default: from settings)")
+    parser.add_argument("--max-conversions", type=int, help="Concurrent conversions (default: from settings)")
+    parser.add_argument("--download-dir", help="Default download directory (default: from settings)")
+    parser.add_argument("--conversion-dir", help="Default conversion output directory (default: from settings)")
+    parser.add_argument("--scratch-dir", help="Directory for part files and encodes in progress (default: from settings)")
+    args = parser.parse_args(argv)
+
+    settings = SettingsManager()
+    engine = JobEngine(
+        max_concurrent_downloads=args.max_downloads or settings.get_setting('max_concurrent_downloads'),
+        max_concurrent_conversions=args.max_conversions or settings.get_setting('max_concurrent_conversions'),
+        default_download_dir=args.download_dir or settings.get_setting('download_dir'),
+        default_conversion_dir=args.conversion_dir or settings.get_setting('conversion_output_dir'),
+        scratch_dir=args.scratch_dir or settings.get_setting('scratch_dir'),
+    )
+    engine.start()
+    server = JobAPIServer(engine, args.host, args.port)
+
+    def _shutdown(signum, frame):
+        headless_logger.info(f"Received signal {signum}, shutting down.")
+        threading.Thread(target=server.shutdown, daemon=True).start() # shutdown() blocks until serve_forever returns
+
+    signal.signal(signal.SIGINT, _shutdown)
+    signal.signal(signal.SIGTERM, _shutdown)
+
+    headless_logger.info(f"Job API listening on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        engine.stop()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
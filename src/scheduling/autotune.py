@@ -0,0 +1,222 @@
+import os
+import time
+
+from ..utils.logger import setup_logger
+
+autotune_logger = setup_logger('AutoTune', 'application.log')
+
+# Seconds between two tuning decisions. Shorter windows make throughput samples too noisy.
+DOWNLOAD_TUNE_INTERVAL = 15.0
+CONVERSION_TUNE_INTERVAL = 10.0
+# Upper bound for auto-tuned downloads (the settings spinbox stops at 10).
+MAX_AUTO_DOWNLOADS = 16
+# An added download slot must raise aggregate throughput by this fraction to be kept.
+MIN_THROUGHPUT_GAIN = 0.05
+# Failure share within one window that triggers a multiplicative decrease.
+ERROR_RATE_LIMIT = 0.3
+DECREASE_FACTOR = 0.7
+# After a plateau or back-off, wait this many windows before probing upwards again.
+HOLD_WINDOWS = 4
+# System is considered saturated above these levels (1-minute load per core, PSI "some" avg10 in %).
+MAX_LOAD_PER_CORE = 1.25
+MAX_PRESSURE = 40.0
+# Conversions are not given fewer ffmpeg threads than this, so encoders keep some internal parallelism.
+MIN_THREADS_PER_CONVERSION = 2
+
+
+def _read_pressure(resource):
+    """Returns the 'some avg10' stall percentage from /proc/pressure/<resource>, or None."""
+    try:
+        with open(f"/proc/pressure/{resource}") as f:
+            for line in f:
+                if line.startswith('some'):
+                    return float(line.split()[1].split('=')[1])
+    except (OSError, IndexError, ValueError):
+        pass
+    return None
+
+
+def read_system_load():
+    """
+    Samples CPU/IO saturation.
+
+    Returns:
+        dict: 'load_per_core' (1-minute load average / cores, None on Windows),
+              'cpu_pressure' and 'io_pressure' (Linux PSI, None where unavailable).
+    """
+    cores = os.cpu_count() or 1
+    try:
+        load_per_core = os.getloadavg()[0] / cores
+    except (AttributeError, OSError):
+        load_per_core = None
+    return {'load_per_core': load_per_core, 'cpu_pressure': _read_pressure('cpu'), 'io_pressure': _read_pressure('io')}
+
+
+def _saturation_reason(load):
+    if load['load_per_core'] is not None and load['load_per_core'] > MAX_LOAD_PER_CORE:
+        return f"load/core {load['load_per_core']:.2f}"
+    for key in ('cpu_pressure', 'io_pressure'):
+        if load[key] is not None and load[key] > MAX_PRESSURE:
+            return f"{key.replace('_', ' ')} {load[key]:.0f}%"
+    return None
+
+
+def _format_load(load):
+    parts = [f"load/core {load['load_per_core']:.2f}" if load['load_per_core'] is not None else None,
+             f"cpu psi {load['cpu_pressure']:.0f}%" if load['cpu_pressure'] is not None else None,
+             f"io psi {load['io_pressure']:.0f}%" if load['io_pressure'] is not None else None]
+    return ", ".join(p for p in parts if p) or "load n/a"
+
+
+class _AIMDTuner:
+    """Shared bookkeeping: the current limit, its bounds, the tuning window and result counts."""
+
+    def __init__(self, name, initial, minimum, maximum, interval, load_reader):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = min(max(initial, minimum), self.maximum)
+        self.interval = interval
+        self.read_load = load_reader or read_system_load
+        self._window_started = time.monotonic()
+        self._successes = 0
+        self._failures = 0
+        self._hold = 0
+
+    def observe_result(self, succeeded):
+        if succeeded:
+            self._successes += 1
+        else:
+            self._failures += 1
+
+    def _set_limit(self, new_limit, reason):
+        new_limit = min(max(new_limit, self.minimum), self.maximum)
+        if new_limit != self.limit:
+            self.limit, previous = new_limit, self.limit
+            autotune_logger.info(f"{self.name}: {previous} -> {new_limit} slots{self._describe_limit()} ({reason})")
+        else:
+            autotune_logger.debug(f"{self.name}: staying at {self.limit} slots ({reason})")
+
+    def _describe_limit(self):
+        return ""
+
+    def _error_rate(self):
+        finished = self._successes + self._failures
+        return self._failures / finished if finished else 0.0
+
+    def tick(self, active, queued):
+        """
+        Called periodically with the number of running and queued tasks. Makes at most
+        one decision per interval.
+
+        Returns:
+            int: The (possibly changed) concurrency limit.
+        """
+        now = time.monotonic()
+        elapsed = now - self._window_started
+        if elapsed < self.interval:
+            return self.limit
+        self._decide(elapsed, active, queued)
+        self._window_started = now
+        self._successes = self._failures = 0
+        return self.limit
+
+
+class DownloadConcurrencyTuner(_AIMDTuner):
+    """
+    AIMD controller for parallel downloads.
+
+    Adds one slot per window while aggregate throughput keeps growing and there is
+    queued work to use it. It returns to the previous limit when an extra slot no
+    longer pays off (a plateau). It cuts the limit multiplicatively when failures
+    rise or the machine is saturated.
+    """
+
+    def __init__(self, initial, minimum=1, maximum=MAX_AUTO_DOWNLOADS, interval=DOWNLOAD_TUNE_INTERVAL, load_reader=None):
+        super().__init__('downloads', initial, minimum, maximum, interval, load_reader)
+        self._task_bytes = {}
+        self._window_bytes = 0
+        self._previous_throughput = None
+        self._last_action = None
+
+    def observe_bytes(self, task_id, downloaded_bytes):
+        """Feeds a progress update (cumulative downloaded_bytes of one task)."""
+        if downloaded_bytes is None:
+            return
+        previous = self._task_bytes.get(task_id, 0)
+        self._window_bytes += downloaded_bytes - previous if downloaded_bytes >= previous else downloaded_bytes # A new stream/attempt restarts the count
+        self._task_bytes[task_id] = downloaded_bytes
+
+    def forget(self, task_id):
+        self._task_bytes.pop(task_id, None)
+
+    def _decide(self, elapsed, active, queued):
+        throughput = self._window_bytes / elapsed
+        self._window_bytes = 0
+        load = self.read_load()
+        summary = f"{throughput / 1e6:.2f} MB/s, {self._failures} failed/{self._successes} ok, {_format_load(load)}"
+        saturated = _saturation_reason(load)
+        error_rate = self._error_rate()
+
+        if self._failures >= 2 and error_rate > ERROR_RATE_LIMIT:
+            self._set_limit(int(self.limit * DECREASE_FACTOR), f"error rate {error_rate:.0%}; {summary}")
+            self._last_action, self._hold = 'decrease', HOLD_WINDOWS
+        elif saturated:
+            self._set_limit(int(self.limit * DECREASE_FACTOR), f"saturated: {saturated}; {summary}")
+            self._last_action, self._hold = 'decrease', HOLD_WINDOWS
+        elif active < self.limit:
+            # Slots were idle, so this window says nothing about what one more slot would give.
+            autotune_logger.debug(f"downloads: {active}/{self.limit} slots busy, not probing ({summary})")
+            self._last_action = None
+        elif self._last_action == 'increase' and self._previous_throughput and throughput < self._previous_throughput * (1 + MIN_THROUGHPUT_GAIN):
+            self._set_limit(self.limit - 1, f"plateau: {throughput / 1e6:.2f} MB/s vs {self._previous_throughput / 1e6:.2f} MB/s with one slot fewer; {summary}")
+            self._last_action, self._hold = 'plateau', HOLD_WINDOWS
+        elif self._hold > 0:
+            self._hold -= 1
+            self._last_action = None
+        elif queued > 0 and self.limit < self.maximum:
+            self._set_limit(self.limit + 1, f"probing, throughput still scaling; {summary}")
+            self._last_action = 'increase'
+        else:
+            self._last_action = None
+        self._previous_throughput = throughput
+
+
+class ConversionConcurrencyTuner(_AIMDTuner):
+    """
+    Sizes parallel conversions to the CPU cores.
+
+    ffmpeg encoders are multi-threaded themselves, so N parallel conversions each
+    get at most cores // N threads (see ffmpeg_threads(); MainWindow caps the
+    scheduler's CPU reservation with it) instead of every ffmpeg process starting
+    one thread per core. Slots are added while there is queued work and the
+    CPU is not saturated. Saturation or failures cut the limit multiplicatively.
+    """
+
+    def __init__(self, initial, cores=None, interval=CONVERSION_TUNE_INTERVAL, load_reader=None):
+        self.cores = cores or os.cpu_count() or 1
+        super().__init__('conversions', initial, 1, max(self.cores // MIN_THREADS_PER_CONVERSION, 1), interval, load_reader)
+
+    def ffmpeg_threads(self):
+        """Threads to give one ffmpeg process at the current limit."""
+        return max(self.cores // self.limit, 1)
+
+    def _describe_limit(self):
+        return f", {self.ffmpeg_threads()} ffmpeg threads each"
+
+    def _decide(self, elapsed, active, queued):
+        load = self.read_load()
+        summary = f"{self._failures} failed/{self._successes} ok, {_format_load(load)}"
+        saturated = _saturation_reason(load)
+        error_rate = self._error_rate()
+
+        if self._failures >= 2 and error_rate > ERROR_RATE_LIMIT:
+            self._set_limit(int(self.limit * DECREASE_FACTOR), f"error rate {error_rate:.0%}; {summary}")
+            self._hold = HOLD_WINDOWS
+        elif saturated and active >= self.limit:
+            self._set_limit(int(self.limit * DECREASE_FACTOR), f"saturated: {saturated}; {summary}")
+            self._hold = HOLD_WINDOWS
+        elif self._hold > 0:
+            self._hold -= 1
+        elif queued > 0 and active >= self.limit and self.limit < self.maximum:
+            self._set_limit(self.limit + 1, f"queued work and CPU headroom; {summary}")
@@ -0,0 +1,136 @@
+import os
+import shutil
+import threading
+
+from ..utils.logger import setup_logger
+
+disk_logger = setup_logger('DiskSpace', 'application.log')
+
+# Free space every admission leaves untouched, for logs, caches and the rest of the system.
+SPACE_MARGIN_BYTES = 512 * 1024 * 1024
+# Expected size of a download before yt-dlp reports its total_bytes, by quality label.
+DOWNLOAD_SIZE_GUESSES = {
+    'audio': 16 * 1024 * 1024,
+    '480p': 200 * 1024 * 1024,
+    '720p': 400 * 1024 * 1024,
+    '1080p': 800 * 1024 * 1024,
+    'best': 1536 * 1024 * 1024,
+}
+# yt-dlp postprocessors that read a finished download and write a second file of about
+# the same size next to it; only MAX_MERGES_PER_DEVICE of them run at once per device.
+MERGE_POSTPROCESSORS = ('Merger', 'ExtractAudio', 'VideoConvertor', 'VideoRemuxer')
+MAX_MERGES_PER_DEVICE = 1
+# A merge waits at most this long for a slot and then runs anyway, so a slot leaked by a
+# worker process that died mid-merge cannot stall every later download.
+MERGE_WAIT_SECONDS = 600
+
+
+def _existing_ancestor(path):
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def device_id(path):
+    """ID of the filesystem path is (or will be) on; works for directories that do not exist yet."""
+    try:
+        return os.stat(_existing_ancestor(path)).st_dev
+    except OSError:
+        return None
+
+
+def free_bytes(path):
+    """Bytes available to this user on path's filesystem, or None if it cannot be queried."""
+    try:
+        return shutil.disk_usage(_existing_ancestor(path)).free
+    except OSError:
+        return None
+
+
+def estimate_download_bytes(quality):
+    """Space a download of a quality label is assumed to need until its real size is known."""
+    quality = quality.lower()
+    if quality.startswith('audio'):
+        return DOWNLOAD_SIZE_GUESSES['audio']
+    return DOWNLOAD_SIZE_GUESSES.get(quality, DOWNLOAD_SIZE_GUESSES['best'])
+
+
+def download_space_needed(total_bytes, downloaded_bytes=0):
+    """
+    Space a running download still needs: the rest of the stream being downloaded, plus
+    a copy of it for the merged or extracted file that yt-dlp writes before deleting the parts.
+    """
+    return max(2 * total_bytes - (downloaded_bytes or 0), 0)
+
+
+def estimate_conversion_bytes(input_file_path, media_info=None, outputs=1):
+    """
+    Space a conversion's outputs are assumed to need: the probed bit rate times the duration
+    (the input's own size when the probe lacks either) for each output file.
+    """
+    size = None
+    fmt = (media_info or {}).get('format') or {}
+    try:
+        size = float(fmt['bit_rate']) * float(fmt['duration']) / 8
+    except (KeyError, TypeError, ValueError):
+        try:
+            size = os.path.getsize(input_file_path)
+        except OSError:
+            size = 0
+    return int(size) * max(outputs, 1)
+
+
+_merge_semaphores = {}
+_merge_lock = threading.Lock()
+_shared_merge_semaphore = None
+
+
+def set_shared_merge_semaphore(semaphore):
+    """Makes every merge in this process use semaphore (a multiprocessing one shared by pool workers) instead of the per-device ones."""
+    global _shared_merge_semaphore
+    _shared_merge_semaphore = semaphore
+
+
+def _merge_semaphore(path):
+    if _shared_merge_semaphore is not None:
+        return _shared_merge_semaphore
+    with _merge_lock:
+        device = device_id(path)
+        if device not in _merge_semaphores:
+            _merge_semaphores[device] = threading.BoundedSemaphore(MAX_MERGES_PER_DEVICE)
+        return _merge_semaphores[device]
+
+
+class MergeGuard:
+    """
+    yt-dlp postprocessor hook that holds the merge slot of the output's device while one of
+    MERGE_POSTPROCESSORS runs, so parallel downloads do not all merge onto one disk at once.
+    Call release() after the download in any case; a failed merge never reports 'finished'.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self._held = None
+
+    def __call__(self, d):
+        if d.get('postprocessor') not in MERGE_POSTPROCESSORS:
+            return
+        if d.get('status') == 'started' and self._held is None:
+            semaphore = _merge_semaphore(self.output_path)
+            if not semaphore.acquire(False):
+                disk_logger.info(f"Waiting for a free merge slot on the device of {self.output_path}")
+                if not semaphore.acquire(True, MERGE_WAIT_SECONDS):
+                    disk_logger.warning(f"No merge slot freed up within {MERGE_WAIT_SECONDS} s; merging into {self.output_path} anyway.")
+                    return
+            self._held = semaphore
+        elif d.get('status') == 'finished':
+            self.release()
+
+    def release(self):
+        if self._held is not None:
+            self._held.release()
+            self._held = None
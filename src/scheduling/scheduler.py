@@ -0,0 +1,324 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from .disk_space import SPACE_MARGIN_BYTES, device_id, free_bytes
+from ..utils.logger import setup_logger
+
+scheduler_logger = setup_logger('Scheduler', 'application.log')
+
+RESOURCES = ('network', 'cpu', 'disk')
+# A priority step is worth this many seconds of waiting: a task with priority p is ordered
+# as if it had been queued p * AGING_SECONDS earlier. Low-priority work therefore still runs
+# once it has waited long enough (aging), and the order never changes while tasks wait.
+AGING_SECONDS = 900.0
+# Urgent tasks go ahead of anything queued within the last day; low-priority tasks wait behind
+# normal tasks queued up to an hour after them.
+PRIORITY_URGENT = 96
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -4
+PRIORITY_LEVELS = {'Urgent': PRIORITY_URGENT, 'Normal': PRIORITY_NORMAL, 'Low': PRIORITY_LOW}
+# Concurrent disk-heavy tasks (downloads writing, merges, encodes writing output).
+DEFAULT_DISK_CAPACITY = 4.0
+# Queued tasks inspected per scheduling pass when the head of the queue does not fit.
+BACKFILL_DEPTH = 32
+# A head task that has been skipped for longer than this reserves the resources it needs:
+# smaller tasks stop being backfilled in front of it until it can start.
+STARVATION_SECONDS = 60.0
+# Pixels per second of video that one encoder thread is assumed to keep up with (720p30).
+PIXELS_PER_CPU = 1280 * 720 * 30
+
+
+def estimate_download_cost(quality, video_format):
+    """
+    Cost of a yt-dlp download: one network slot and disk writes. Merging separate
+    video/audio streams and extracting audio run ffmpeg inside yt-dlp, which needs
+    CPU as well.
+    """
+    if quality.lower().startswith('audio'):
+        return {'network': 1.0, 'cpu': 1.0, 'disk': 0.5} # FFmpegExtractAudio transcodes
+    return {'network': 1.0, 'cpu': 0.5, 'disk': 1.0} # Stream copy merge
+
+
+def estimate_conversion_cost(task_subtype, media_info=None, cores=None):
+    """
+    Cost of a conversion, from ffprobe data when it is available.
+
+    Video encodes are weighted by their pixel rate (width * height * fps), so a 1080p
+    transcode claims several cores and a 480p one a single core. The number of cores
+    is also the thread count ffmpeg should be given, so admitted work never asks for
+    more threads than the machine has.
+    """
+    cores = cores or os.cpu_count() or 1
+    if task_subtype == 'video':
+        cpu = 2.0
+        for stream in (media_info or {}).get('streams', []):
+            if stream.get('codec_type') == 'video' and stream.get('width') and stream.get('height'):
+                try:
+                    num, den = (stream.get('avg_frame_rate') or '30/1').split('/')
+                    fps = float(num) / float(den) if float(den) else 30.0
+                except ValueError:
+                    fps = 30.0
+                cpu = stream['width'] * stream['height'] * (fps or 30.0) / PIXELS_PER_CPU
+                break
+        return {'network': 0.0, 'cpu': float(min(max(round(cpu), 1), cores)), 'disk': 1.0}
+    if task_subtype == 'audio':
+        return {'network': 0.0, 'cpu': 1.0, 'disk': 0.5}
+    return {'network': 0.0, 'cpu': 1.0, 'disk': 0.5} # image / document
+
+
+class ResourceScheduler:
+    """
+    One admission queue for downloads and conversions.
+
+    Each task declares a cost per resource class (network, cpu, disk). A task starts
+    only while the costs of the running tasks plus its own fit the capacities, and its
+    kind is below its own concurrency limit. Queued tasks are ordered by
+    enqueued_at - priority * AGING_SECONDS, in one heap per kind whose heads are merged,
+    so tasks of a kind at its limit are passed over without being inspected and never
+    hold back other kinds. When the head of the queue does not fit, smaller tasks behind
+    it are backfilled so the machine stays busy, until the head has waited STARVATION_SECONDS.
+
+    Costs may be given as a callable that is evaluated when the task is considered, so
+    estimates can use probe data that arrived after the task was queued.
+
+    An urgent task that cannot start can name a running lower-priority task of the same
+    kind to preempt (see preemption_victim()). The caller stops that task and submits it
+    again; its resources are only handed over once it is released.
+
+    A task may also reserve disk space: (directory, bytes), or a callable returning that.
+    It is held back while the bytes, plus what running tasks reserved on the same
+    filesystem and SPACE_MARGIN_BYTES, exceed the free space there. Running tasks shrink
+    their reservation with update_space() as their real size becomes known.
+    """
+
+    def __init__(self, capacities=None, kind_limits=None):
+        cores = float(os.cpu_count() or 1)
+        self.capacities = {'network': 3.0, 'cpu': cores, 'disk': DEFAULT_DISK_CAPACITY}
+        self.capacities.update(capacities or {})
+        self.kind_limits = dict(kind_limits or {})
+        self._lock = threading.Lock()
+        self._heaps = {} # kind -> heap of (order key, seq, entry)
+        self._queued = {}
+        self._running = {}
+        self._in_use = {r: 0.0 for r in RESOURCES}
+        self._running_per_kind = {}
+        self._preempting = set()
+        self._space_in_use = {} # device -> bytes reserved by running tasks
+        self._running_space = {} # task_id -> (device, bytes)
+        self._waiting_for_space = set()
+        self._seq = itertools.count()
+
+    # --- Configuration ---
+
+    def set_capacity(self, resource, value):
+        with self._lock:
+            self.capacities[resource] = float(value)
+
+    def set_kind_limit(self, kind, limit):
+        with self._lock:
+            self.kind_limits[kind] = limit
+
+    # --- Queue ---
+
+    def submit(self, task_id, kind, cost, priority=0, enqueued_at=None, space=None):
+        """Queues a task (re-queues it if it is already known). space: optional (directory, bytes) or a callable returning it."""
+        enqueued_at = time.time() if enqueued_at is None else enqueued_at
+        entry = {'task_id': task_id, 'kind': kind, 'cost': cost, 'priority': priority, 'enqueued_at': enqueued_at, 'space': space}
+        with self._lock:
+            self._queued[task_id] = entry
+            heapq.heappush(self._heaps.setdefault(kind, []), (enqueued_at - priority * AGING_SECONDS, next(self._seq), entry))
+
+    def remove(self, task_id):
+        """Drops a queued task. Returns False if it was not queued."""
+        with self._lock:
+            self._waiting_for_space.discard(task_id)
+            return self._queued.pop(task_id, None) is not None # Its heap entry is skipped lazily
+
+    def is_queued(self, task_id):
+        return task_id in self._queued
+
+    def waiting_for_space(self):
+        """IDs of the queued tasks the last scheduling pass held back for lack of disk space."""
+        with self._lock:
+            return set(self._waiting_for_space)
+
+    def queued_count(self, kind=None):
+        with self._lock:
+            return sum(1 for e in self._queued.values() if kind is None or e['kind'] == kind)
+
+    # --- Admission ---
+
+    def _resolve_cost(self, entry):
+        cost = entry['cost']() if callable(entry['cost']) else entry['cost']
+        # A task larger than a capacity would never start; it may use the whole resource instead.
+        return {r: min(float(cost.get(r, 0.0)), self.capacities.get(r, 0.0)) for r in RESOURCES}
+
+    def _resolve_space(self, entry):
+        space = entry['space']() if callable(entry['space']) else entry['space']
+        if not space:
+            return None
+        directory, nbytes = space
+        return device_id(directory), directory, int(nbytes)
+
+    def _space_fits(self, space, free_cache):
+        # free_cache: device -> free bytes, so each filesystem is queried once per pass.
+        if space is None:
+            return True
+        device, directory, nbytes = space
+        if device not in free_cache:
+            free_cache[device] = free_bytes(directory)
+        if free_cache[device] is None:
+            return True # Unknown free space does not block work
+        return nbytes + self._space_in_use.get(device, 0) + SPACE_MARGIN_BYTES <= free_cache[device]
+
+    def _at_kind_limit(self, kind):
+        return kind in self.kind_limits and self._running_per_kind.get(kind, 0) >= self.kind_limits[kind]
+
+    def _fits(self, kind, cost):
+        if self._at_kind_limit(kind):
+            return False
+        return all(self._in_use[r] + cost[r] <= self.capacities[r] + 1e-9 for r in RESOURCES)
+
+    def next_ready(self):
+        """
+        Admits as many queued tasks as currently fit and marks them running.
+
+        Returns:
+            list: (task_id, kind, cost) tuples to start, in scheduling order.
+        """
+        admitted, skipped = [], []
+        reserved = set() # Resources held back for a starving head task
+        free_cache = {}
+        now = time.time()
+        with self._lock:
+            self._waiting_for_space.clear()
+            inspected = 0
+            while inspected < BACKFILL_DEPTH:
+                # Next entry in scheduling order among the kinds below their limit; the queued
+                # tasks of a full kind cannot start this pass and do not use up the depth.
+                heads = [(heap[0][:2], kind) for kind, heap in self._heaps.items() if heap and not self._at_kind_limit(kind)]
+                if not heads:
+                    break
+                key, seq, entry = heapq.heappop(self._heaps[min(heads)[1]])
+                if self._queued.get(entry['task_id']) is not entry:
+                    continue # Removed or re-submitted
+                inspected += 1
+                cost = self._resolve_cost(entry)
+                blocked_by_reservation = any(cost[r] > 0 for r in reserved)
+                if not blocked_by_reservation and self._fits(entry['kind'], cost):
+                    space = self._resolve_space(entry)
+                    if not self._space_fits(space, free_cache):
+                        self._waiting_for_space.add(entry['task_id']) # Not a starving head: space is freed by the user, not by other tasks
+                        skipped.append((key, seq, entry))
+                        continue
+                    del self._queued[entry['task_id']]
+                    self._running[entry['task_id']] = (entry['kind'], cost, entry['priority'], now)
+                    self._running_per_kind[entry['kind']] = self._running_per_kind.get(entry['kind'], 0) + 1
+                    for r in RESOURCES:
+                        self._in_use[r] += cost[r]
+                    if space:
+                        self._running_space[entry['task_id']] = (space[0], space[2])
+                        self._space_in_use[space[0]] = self._space_in_use.get(space[0], 0) + space[2]
+                    admitted.append((entry['task_id'], entry['kind'], cost))
+                    continue
+                skipped.append((key, seq, entry))
+                if now - entry['enqueued_at'] > STARVATION_SECONDS:
+                    reserved.update(r for r in RESOURCES if cost[r] > 0)
+            for item in skipped:
+                heapq.heappush(self._heaps[item[2]['kind']], item)
+        for task_id, kind, cost in admitted:
+            scheduler_logger.debug(f"Admitted {kind} task {task_id} with cost {cost}; in use {self.usage()['in_use']}")
+        return admitted
+
+    def release(self, task_id):
+        """Returns the resources of a running task. Returns False if it was not running."""
+        with self._lock:
+            running = self._running.pop(task_id, None)
+            if running is None:
+                return False
+            kind, cost = running[:2]
+            self._preempting.discard(task_id)
+            self._running_per_kind[kind] = max(self._running_per_kind.get(kind, 0) - 1, 0)
+            for r in RESOURCES:
+                self._in_use[r] = max(self._in_use[r] - cost[r], 0.0)
+            self._update_space(task_id, 0)
+            self._running_space.pop(task_id, None)
+            return True
+
+    def update_space(self, task_id, nbytes):
+        """Replaces the disk space a running task reserved, e.g. once its real size is known or part of it is written."""
+        with self._lock:
+            self._update_space(task_id, nbytes)
+
+    def _update_space(self, task_id, nbytes):
+        # Called with self._lock held.
+        if task_id not in self._running_space:
+            return
+        device, old_bytes = self._running_space[task_id]
+        self._running_space[task_id] = (device, int(nbytes))
+        self._space_in_use[device] = max(self._space_in_use.get(device, 0) - old_bytes + int(nbytes), 0)
+
+    def preemption_victim(self, min_priority=PRIORITY_URGENT, kinds=None):
+        """
+        Picks a running task to stop so that a waiting high-priority task can start.
+
+        Looks at the first queued task (in scheduling order) with at least min_priority
+        that does not fit, ignoring capacity that tasks already being preempted will free.
+        The victim is a running task of the same kind with a lower priority, and stopping
+        it must be enough for the waiting task to fit. Among those, the lowest priority
+        and then the most recently started one is chosen. It stays accounted for until
+        release() is called.
+
+        Args:
+            min_priority (int): Only tasks of at least this priority may preempt.
+            kinds (iterable): Task kinds that can be preempted (e.g. only resumable ones).
+
+        Returns:
+            tuple: (victim_task_id, waiting_task_id), or None.
+        """
+        with self._lock:
+            waiting = None
+            heaps = [heap for kind, heap in self._heaps.items() if kinds is None or kind in kinds]
+            for _, _, entry in heapq.nsmallest(BACKFILL_DEPTH, itertools.chain.from_iterable(heaps)):
+                if self._queued.get(entry['task_id']) is entry and entry['priority'] >= min_priority:
+                    waiting = entry
+                    break
+            if waiting is None:
+                return None
+            kind, cost = waiting['kind'], self._resolve_cost(waiting)
+            in_use = dict(self._in_use)
+            running_of_kind = self._running_per_kind.get(kind, 0)
+            for task_id in self._preempting: # Capacity that is already being handed over
+                r_kind, r_cost = self._running[task_id][:2]
+                running_of_kind -= r_kind == kind
+                for r in RESOURCES:
+                    in_use[r] -= r_cost[r]
+
+            def fits_without(freed_cost, freed_slots):
+                if kind in self.kind_limits and running_of_kind - freed_slots >= self.kind_limits[kind]:
+                    return False
+                return all(in_use[r] - freed_cost[r] + cost[r] <= self.capacities[r] + 1e-9 for r in RESOURCES)
+
+            if fits_without({r: 0.0 for r in RESOURCES}, 0):
+                return None # It can start once the pending preemptions complete
+            candidates = sorted(((r_prio, -started, task_id, r_cost) for task_id, (r_kind, r_cost, r_prio, started) in self._running.items()
+                                 if r_kind == kind and r_prio < waiting['priority'] and task_id not in self._preempting))
+            for _, _, task_id, r_cost in candidates:
+                if fits_without(r_cost, 1):
+                    self._preempting.add(task_id)
+                    scheduler_logger.info(f"Preempting {kind} task {task_id} for higher-priority task {waiting['task_id']}")
+                    return task_id, waiting['task_id']
+            return None
+
+    def running_cost(self, task_id):
+        running = self._running.get(task_id)
+        return dict(running[1]) if running else None
+
+    def usage(self):
+        with self._lock:
+            return {'capacities': dict(self.capacities), 'in_use': dict(self._in_use),
+                    'running': dict(self._running_per_kind), 'queued': len(self._queued),
+                    'space_reserved': sum(self._space_in_use.values()), 'waiting_for_space': len(self._waiting_for_space)}
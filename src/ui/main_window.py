@@ -3,27 +3,54 @@ from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, QHBoxLayout,
     QFormLayout, QLabel, QLineEdit, QComboBox, QPushButton, QGroupBox,
     QTableWidget, QHeaderView, QAbstractItemView, QProgressBar, QFileDialog,
-    QTableWidgetItem, QMessageBox
+    QTableWidgetItem, QMessageBox, QCheckBox, QSpinBox
 )
 from PyQt6.QtCore import QSize, Qt, QTimer
-from PyQt6.QtGui import QIcon, QAction
+from PyQt6.QtGui import QIcon, QAction, QPixmap
 
-from src.ui.workers import DownloadWorker, WorkerThread
+from src.ui.workers import DownloadWorker, ProcessDownloadWorker, ConversionWorker, EncoderCalibrationWorker, ThumbnailLoader, WorkerThread
 from src.config.settings_manager import SettingsManager
 from src.ui.settings_dialog import SettingsDialog
+from src.ui.metrics_dialog import MetricsDialog, format_task_telemetry
 from src.utils.notifications import send_system_notification # Added
+from src.conversion import converter
+from src.scheduling.autotune import DownloadConcurrencyTuner, ConversionConcurrencyTuner
+from src.scheduling.scheduler import ResourceScheduler, estimate_download_cost, estimate_conversion_cost, PRIORITY_LEVELS, PRIORITY_NORMAL
+from src.scheduling.disk_space import estimate_download_bytes, estimate_conversion_bytes, download_space_needed
+from src.conversion.probe_cache import get_probe_cache
+from src.conversion.profiles import ENCODING_PROFILES, get_encoder_calibration
+from src.downloading.url_tools import parse_urls, video_key
+from src.downloading.history import get_download_history
+from src.downloading.process_pool import DownloadProcessPool
+from src.utils.output_paths import safe_name
+from src.utils import scratch
+from src.utils.progress_table import ProgressTable, ProgressWriter, STATE_DOWNLOADING, STATE_CONVERTING
 import src.ui.themes as themes 
+import atexit
 import os
+import re
+import threading
 import time
+from collections import Counter
+
+# Running tasks' progress is read from the shared progress table at about the display frame rate.
+PROGRESS_POLL_MS = 33
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
 
         self.download_queue = {}
+        self.status_counts = {'download': Counter(), 'conversion': Counter()} # Tasks per status, kept in step by _add_task/_set_task_status/_remove_task
+        self._control_update_pending = False
+        self.url_key_tasks = {} # url_tools key -> task ID of the latest download of that video/playlist
+        self._row_items = {} # task ID -> its '#' cell item, so a row is found without scanning the table
         self.task_id_counter = 0
         self.active_downloads = 0
         
+        self.scheduler = ResourceScheduler() # Shared admission control for downloads and conversions
+        self._space_blocked = set() # Queued tasks shown as waiting for disk space
         self.settings_manager = SettingsManager()
         # Initialize attributes that load_and_apply_settings will use.
         self.output_dir_display = None 
@@ -33,21 +60,38 @@ class MainWindow(QMainWindow):
         self.add_queue_button = None
         self.url_input = None 
         self.pause_selected_button = None
+        self.resume_selected_button = None
         self.cancel_selected_button = None
         self.clear_finished_tasks_button = None
         self.status_table = None
+        self.metrics_dialog = None
         self.current_theme = self.settings_manager.get_setting('theme') 
 
         self.load_and_apply_settings() # Load settings that don't depend on UI created yet
+        threading.Thread(target=scratch.cleanup_orphans, args=(self.settings_manager.get_setting('scratch_dir'),), kwargs={'download_dir': self.settings_manager.get_setting('download_dir')}, name="scratch-cleanup", daemon=True).start() # Leftovers of an earlier session
+        self.settings_manager.subscribe(self.on_setting_changed, ('max_concurrent_downloads', 'max_concurrent_conversions', 'auto_tune_concurrency', 'auto_clear_completed', 'preempt_for_urgent', 'download_worker_mode'))
 
         self.queue_check_timer = QTimer(self)
-        self.queue_check_timer.timeout.connect(self.process_download_queue)
-        self.queue_check_timer.timeout.connect(self.process_conversion_queue)
+        self.queue_check_timer.timeout.connect(self.autotune_concurrency)
+        self.queue_check_timer.timeout.connect(self.schedule_tasks)
         self.queue_check_timer.timeout.connect(self.update_control_states) 
+        self.queue_check_timer.timeout.connect(self.update_conversion_etas)
+        self.queue_check_timer.timeout.connect(self.load_visible_thumbnails) # Picks up new and newly finished rows
         self.queue_check_timer.start(1000)
 
+        try: self.progress_table = ProgressTable(); atexit.register(self.progress_table.close) # Workers write progress here instead of emitting it
+        except OSError as e: self.progress_table = None; print(f"Shared progress table unavailable, using progress signals: {e}")
+        self._progress_slots = {} # task ID -> [slot, sequence number last shown]
+        self.download_pool = None # DownloadProcessPool, started with the first download in 'process' mode
+        self.progress_poll_timer = QTimer(self); self.progress_poll_timer.setInterval(PROGRESS_POLL_MS)
+        self.progress_poll_timer.timeout.connect(self.poll_progress_table)
+
         self.conversion_queue = {}
         self.active_conversions = 0
+        self._predicted_conversions = set() # Running conversions with a predicted encode time (ETR countdown)
+        self.thumbnail_loader = ThumbnailLoader(self); self.thumbnail_loader.ready_signal.connect(self.handle_thumbnail_ready)
+        self._thumbnail_requests = {} # task ID -> video path whose sprite sheet was requested
+        self.calibration_thread = None
 
         self.setWindowTitle("VersaDownloader & Converter")
         self.setMinimumSize(QSize(800, 600))
@@ -67,7 +111,7 @@ class MainWindow(QMainWindow):
         if self.output_dir_display: self.output_dir_display.setText(self.default_output_directory)
         if self.conv_output_dir_display: self.conv_output_dir_display.setText(self.default_conversion_output_directory)
         
-        if self.status_table: self.status_table.itemSelectionChanged.connect(self.update_selection_dependent_buttons)
+        if self.status_table: self.status_table.itemSelectionChanged.connect(self.update_selection_dependent_buttons); self.status_table.itemSelectionChanged.connect(self.show_selected_preview)
 
         self.update_control_states() 
         self.apply_current_theme() # Apply theme after UI is fully built
@@ -78,13 +122,20 @@ class MainWindow(QMainWindow):
         downloader_layout = QVBoxLayout(self.downloader_tab)
         url_group = QGroupBox("YouTube URL"); url_layout = QHBoxLayout(url_group)
         url_layout.addWidget(QLabel("YouTube URL:"))
-        self.url_input = QLineEdit(); self.url_input.setToolTip("Enter YouTube video or playlist URL here.")
+        self.url_input = QLineEdit(); self.url_input.setToolTip("Enter YouTube video, playlist or channel URL here.")
         url_layout.addWidget(self.url_input); downloader_layout.addWidget(url_group)
         options_group = QGroupBox("Download Options"); options_form_layout = QFormLayout(options_group)
         self.quality_combo = QComboBox(); self.quality_combo.addItems(["Best", "1080p", "720p", "480p", "Audio Only"])
         self.quality_combo.setToolTip("Select video/audio quality."); options_form_layout.addRow(QLabel("Quality:"), self.quality_combo)
         self.format_combo = QComboBox(); self.format_combo.addItems(["MP4", "MKV", "WebM", "MP3", "M4A", "OGG"]) 
         self.format_combo.setToolTip("Select output format."); options_form_layout.addRow(QLabel("Format:"), self.format_combo)
+        self.priority_combo = QComboBox(); self.priority_combo.addItems(list(PRIORITY_LEVELS)); self.priority_combo.setCurrentText("Normal")
+        self.priority_combo.setToolTip("Urgent tasks start before queued normal/low ones (and can pause a running low-priority download)."); options_form_layout.addRow(QLabel("Priority:"), self.priority_combo)
+        self.playlist_sync_checkbox = QCheckBox("Only queue new items")
+        self.playlist_sync_checkbox.setToolTip("Playlists and channels skip videos already downloaded to their folder (or in the download history); channels stop listing at the first known videos."); options_form_layout.addRow(QLabel("Playlist Sync:"), self.playlist_sync_checkbox)
+        self.stream_checkbox = QCheckBox("Convert while downloading"); self.stream_checkbox.setChecked(self.settings_manager.get_setting('stream_downloads'))
+        self.stream_checkbox.setToolTip("Pipe the download straight into FFmpeg, so only the final file is written and encoding starts with the first bytes.\nVideos that need separate video and audio streams merged are downloaded to a file first, as usual.\nA paused streamed download starts over when resumed.")
+        self.stream_checkbox.toggled.connect(lambda checked: self.settings_manager.set_setting('stream_downloads', checked)); options_form_layout.addRow(QLabel("Streaming:"), self.stream_checkbox)
         output_dir_layout = QHBoxLayout(); self.output_dir_display = QLineEdit() 
         self.output_dir_display.setReadOnly(True); self.browse_button = QPushButton("Browse...")
         self.browse_button.setToolTip("Browse for download directory."); self.browse_button.clicked.connect(self.browse_output_directory) 
@@ -93,16 +144,20 @@ class MainWindow(QMainWindow):
         actions_group = QGroupBox("Actions"); actions_layout = QHBoxLayout(actions_group)
         self.add_queue_button = QPushButton("Add to Queue"); self.add_queue_button.setToolTip("Add URL to queue.")
         self.add_queue_button.clicked.connect(self.add_item_to_queue); 
+        self.import_urls_button = QPushButton("Import URLs..."); self.import_urls_button.setToolTip("Queue every video/playlist URL from a text file (duplicates and past downloads are skipped).")
+        self.import_urls_button.clicked.connect(self.import_urls_from_file)
         if self.url_input: self.url_input.textChanged.connect(self.update_control_states) 
         self.start_downloads_button = QPushButton("Start Downloads"); self.start_downloads_button.setToolTip("Start queued downloads.")
         self.start_downloads_button.clicked.connect(self.process_download_queue) 
         self.pause_selected_button = QPushButton("Pause Selected"); self.pause_selected_button.setToolTip("Pause selected tasks.")
         self.pause_selected_button.clicked.connect(self.pause_selected_tasks) 
+        self.resume_selected_button = QPushButton("Resume Selected"); self.resume_selected_button.setToolTip("Resume paused tasks where they stopped.")
+        self.resume_selected_button.clicked.connect(self.resume_selected_tasks) 
         self.cancel_selected_button = QPushButton("Cancel Selected"); self.cancel_selected_button.setToolTip("Cancel selected tasks.")
         self.cancel_selected_button.clicked.connect(self.cancel_selected_tasks) 
         self.clear_finished_tasks_button = QPushButton("Clear Finished"); self.clear_finished_tasks_button.setToolTip("Remove finished tasks.")
         self.clear_finished_tasks_button.clicked.connect(self.clear_finished_tasks) 
-        for btn in [self.add_queue_button, self.start_downloads_button, self.pause_selected_button, self.cancel_selected_button, self.clear_finished_tasks_button]: actions_layout.addWidget(btn)
+        for btn in [self.add_queue_button, self.import_urls_button, self.start_downloads_button, self.pause_selected_button, self.resume_selected_button, self.cancel_selected_button, self.clear_finished_tasks_button]: actions_layout.addWidget(btn)
         actions_layout.addStretch(); downloader_layout.addWidget(actions_group); downloader_layout.addStretch()
 
     def create_converter_tab(self):
@@ -116,6 +171,27 @@ class MainWindow(QMainWindow):
         self.conv_format_combo = QComboBox()
         self.conv_format_combo.addItems(["MP4 (Video)", "MKV (Video)", "AVI (Video)", "MOV (Video)", "WebM (Video)", "MP3 (Audio)", "AAC (Audio)", "WAV (Audio)", "OGG (Audio)", "FLAC (Audio)", "M4A (Audio)", "PNG (Image)", "JPG (Image)", "WEBP (Image)", "PDF (Document)"])
         self.conv_format_combo.setToolTip("Select target conversion format."); conv_input_layout.addRow(QLabel("Target Format:"), self.conv_format_combo)
+        self.conv_extra_formats_input = QLineEdit(); self.conv_extra_formats_input.setPlaceholderText("e.g. mp3, webm")
+        self.conv_extra_formats_input.setToolTip("More video/audio formats to produce from each video/audio file.\nAll formats are encoded in one FFmpeg run, so the file is decoded only once.")
+        conv_input_layout.addRow(QLabel("Also Convert To:"), self.conv_extra_formats_input)
+        conv_profile_layout = QHBoxLayout(); self.conv_profile_combo = QComboBox()
+        for key, profile in ENCODING_PROFILES.items(): self.conv_profile_combo.addItem(profile['label'], key)
+        self.conv_profile_combo.setToolTip("Fast Draft: quick, larger files. Balanced: the usual trade-off. Archival: slow, near-transparent quality.\nSize-Targeted: bitrate computed from the file's duration to reach the target size.")
+        self.conv_profile_combo.setCurrentIndex(max(self.conv_profile_combo.findData(self.settings_manager.get_setting('conversion_profile')), 0))
+        self.conv_profile_combo.currentIndexChanged.connect(self.conversion_profile_changed)
+        self.conv_calibrate_button = QPushButton("Calibrate Speed"); self.conv_calibrate_button.setToolTip("Measure each profile's encode speed on this machine, so the time to finish of video conversions can be predicted.")
+        self.conv_calibrate_button.clicked.connect(self.start_encoder_calibration)
+        conv_profile_layout.addWidget(self.conv_profile_combo); conv_profile_layout.addWidget(self.conv_calibrate_button); conv_input_layout.addRow(QLabel("Profile:"), conv_profile_layout)
+        self.conv_target_size_spin = QSpinBox(); self.conv_target_size_spin.setRange(1, 1000000); self.conv_target_size_spin.setSuffix(" MB")
+        self.conv_target_size_spin.setValue(self.settings_manager.get_setting('target_size_mb')); self.conv_target_size_spin.setToolTip("Size of each output file with the Size-Targeted profile.")
+        self.conv_target_size_spin.valueChanged.connect(lambda value: self.settings_manager.set_setting('target_size_mb', value))
+        conv_input_layout.addRow(QLabel("Target Size:"), self.conv_target_size_spin); self.conversion_profile_changed()
+        self.conv_loudness_checkbox = QCheckBox("Normalize (EBU R128, -16 LUFS)"); self.conv_loudness_checkbox.setChecked(self.settings_manager.get_setting('normalize_loudness'))
+        self.conv_loudness_checkbox.setToolTip("Measure each file's loudness, then encode it at -16 LUFS with a true peak of -1.5 dBTP.\nMeasurements are cached by file content, so converting the same file again skips the analysis.")
+        self.conv_loudness_checkbox.toggled.connect(lambda checked: self.settings_manager.set_setting('normalize_loudness', checked))
+        conv_input_layout.addRow(QLabel("Loudness:"), self.conv_loudness_checkbox)
+        self.conv_priority_combo = QComboBox(); self.conv_priority_combo.addItems(list(PRIORITY_LEVELS)); self.conv_priority_combo.setCurrentText("Normal")
+        self.conv_priority_combo.setToolTip("Urgent conversions start before queued normal/low ones."); conv_input_layout.addRow(QLabel("Priority:"), self.conv_priority_combo)
         converter_main_layout.addWidget(conv_input_group)
         conv_output_group = QGroupBox("Output Options"); conv_output_layout = QFormLayout(conv_output_group)
         conv_output_dir_inner_layout = QHBoxLayout(); self.conv_output_dir_display = QLineEdit() 
@@ -140,7 +216,9 @@ class MainWindow(QMainWindow):
         header.setSectionResizeMode(4, QHeaderView.ResizeMode.ResizeToContents) 
         header.setSectionResizeMode(5, QHeaderView.ResizeMode.ResizeToContents) 
         header.setSectionResizeMode(6, QHeaderView.ResizeMode.ResizeToContents); self.status_table.setColumnWidth(6, 120) 
-        status_layout.addWidget(self.status_table); self.main_layout.addWidget(status_group)
+        self.status_table.setIconSize(QSize(48, 27)); self.status_table.verticalScrollBar().valueChanged.connect(self.load_visible_thumbnails)
+        self.preview_label = QLabel(); self.preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter); self.preview_label.hide() # Sprite sheet of the selected video
+        status_layout.addWidget(self.status_table); status_layout.addWidget(self.preview_label); self.main_layout.addWidget(status_group)
 
     def browse_output_directory(self):
         directory = QFileDialog.getExistingDirectory(self, "Select Output Directory", self.output_dir_display.text() or self.default_output_directory)
@@ -159,14 +237,29 @@ class MainWindow(QMainWindow):
         self.default_conversion_output_directory = self.settings_manager.get_setting('conversion_output_dir')
         if self.conv_output_dir_display: self.conv_output_dir_display.setText(self.default_conversion_output_directory)
         os.makedirs(self.default_conversion_output_directory, exist_ok=True)
-        self.MAX_CONCURRENT_DOWNLOADS = self.settings_manager.get_setting('max_concurrent_downloads')
-        self.MAX_CONCURRENT_CONVERSIONS = self.settings_manager.get_setting('max_concurrent_conversions')
+        self._apply_concurrency_settings()
         self.auto_clear_completed = self.settings_manager.get_setting('auto_clear_completed')
+        self.preempt_for_urgent = self.settings_manager.get_setting('preempt_for_urgent')
+        self.download_worker_mode = self.settings_manager.get_setting('download_worker_mode')
         new_theme = self.settings_manager.get_setting('theme')
         if self.current_theme != new_theme: self.current_theme = new_theme # Update internal state
         # Actual application of theme QSS is now in apply_current_theme, called after UI setup
         self.update_control_states()
 
+    def _apply_concurrency_settings(self):
+        self.MAX_CONCURRENT_DOWNLOADS = self.settings_manager.get_setting('max_concurrent_downloads')
+        self.MAX_CONCURRENT_CONVERSIONS = self.settings_manager.get_setting('max_concurrent_conversions')
+        if self.settings_manager.get_setting('auto_tune_concurrency'): # The configured limits become starting points
+            self.download_tuner = DownloadConcurrencyTuner(self.MAX_CONCURRENT_DOWNLOADS); self.conversion_tuner = ConversionConcurrencyTuner(self.MAX_CONCURRENT_CONVERSIONS)
+            self.MAX_CONCURRENT_DOWNLOADS = self.download_tuner.limit; self.MAX_CONCURRENT_CONVERSIONS = self.conversion_tuner.limit
+        else: self.download_tuner = self.conversion_tuner = None
+
+    def on_setting_changed(self, key, value):
+        """SettingsManager subscriber: limits and switches take effect at once, without touching running tasks."""
+        if key in ('max_concurrent_downloads', 'max_concurrent_conversions', 'auto_tune_concurrency'):
+            self._apply_concurrency_settings(); self.schedule_tasks() # Raised limits start queued tasks now; lowered ones just start fewer
+        elif key in ('auto_clear_completed', 'preempt_for_urgent', 'download_worker_mode'): setattr(self, key, value)
+
     def apply_current_theme(self):
         app = QApplication.instance()
         if app: # Ensure app instance exists
@@ -178,68 +271,272 @@ class MainWindow(QMainWindow):
         menu_bar = self.menuBar(); file_menu = menu_bar.addMenu("&File")
         settings_action = QAction("&Settings", self); settings_action.triggered.connect(self.open_settings_dialog)
         file_menu.addAction(settings_action)
+        view_menu = menu_bar.addMenu("&View")
+        metrics_action = QAction("&Performance Metrics", self); metrics_action.triggered.connect(self.open_metrics_dialog)
+        view_menu.addAction(metrics_action)
 
     def open_settings_dialog(self):
         dialog = SettingsDialog(self.settings_manager, self)
         if dialog.exec(): self.load_and_apply_settings(); self.apply_current_theme(); QMessageBox.information(self, "Settings Applied", "Settings updated.")
 
+    def open_metrics_dialog(self):
+        if not self.metrics_dialog: self.metrics_dialog = MetricsDialog(self)
+        self.metrics_dialog.refresh(); self.metrics_dialog.show(); self.metrics_dialog.raise_()
+
     def add_item_to_queue(self):
-        url = self.url_input.text().strip(); quality = self.quality_combo.currentText(); video_format = self.format_combo.currentText().lower(); output_dir = self.output_dir_display.text()
-        if not url: QMessageBox.warning(self, "Missing URL", "Please enter a YouTube URL."); return
+        text = self.url_input.text().strip(); output_dir = self.output_dir_display.text()
+        if not text: QMessageBox.warning(self, "Missing URL", "Please enter a YouTube URL."); return
         if not output_dir: QMessageBox.warning(self, "Missing Output Directory", "Please select download output directory."); return
-        task_id = self.generate_task_id(); is_playlist = "playlist?" in url.lower(); is_video = "watch?" in url.lower() or "youtu.be/" in url.lower()
-        if is_playlist:
-            playlist_fetch_task_id = f"pl_fetch_{task_id}"
-            worker_obj = DownloadWorker(playlist_fetch_task_id, 'playlist_info_fetch', url, output_dir, quality, video_format)
-            thread = WorkerThread(worker_obj); worker_obj.playlist_entry_signal.connect(self.handle_playlist_entry); worker_obj.finished_signal.connect(self.handle_worker_finished)
-            self.download_queue[playlist_fetch_task_id] = {'url': url, 'type': 'Playlist Info Fetch', 'status': 'fetching_info', 'worker_thread': thread, 'worker_obj': worker_obj, 'title': f"Playlist: {url}"}
-            self.add_or_update_table_row(playlist_fetch_task_id, f"Playlist: {url}", "Info Fetch", "Fetching..."); thread.start(); self.url_input.clear()
-        elif is_video:
-            self.download_queue[task_id] = {'url': url, 'type': 'Single Video Download', 'status': 'queued', 'quality': quality, 'format': video_format, 'output_path': output_dir, 'title': url}
-            self.add_or_update_table_row(task_id, url, "Video Download", "Queued"); self.url_input.clear()
+        result = self.ingest_urls(text) # The field may hold several pasted URLs
+        if result['entries']: self.url_input.clear()
+        elif result['duplicates']: QMessageBox.information(self, "Already Queued", "This video is already in the queue or was downloaded before.")
         else: QMessageBox.warning(self, "Invalid URL", "Please enter a valid YouTube video or playlist URL.")
-        self.update_control_states()
+
+    def import_urls_from_file(self):
+        if not self.output_dir_display.text(): QMessageBox.warning(self, "Missing Output Directory", "Please select download output directory."); return
+        path, _ = QFileDialog.getOpenFileName(self, "Import URLs", os.path.expanduser("~"), "Text Files (*.txt *.csv *.list);;All Files (*)")
+        if not path: return
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f: text = f.read()
+        except OSError as e: QMessageBox.warning(self, "Import Failed", f"Could not read {path}: {e}"); return
+        result = self.ingest_urls(text)
+        QMessageBox.information(self, "Import Finished", f"Queued {len(result['entries'])} URL(s). Skipped {result['duplicates']} duplicate(s) and {len(result['invalid'])} invalid line(s).")
+
+    def is_known_url_key(self, key):
+        """True if the video/playlist is queued or running, or was downloaded before (download history)."""
+        info = self.download_queue.get(self.url_key_tasks.get(key))
+        return (info is not None and info['status'] not in ['completed', 'failed', 'cancelled']) or key in get_download_history()
+
+    def ingest_urls(self, text):
+        """
+        Queues every video/playlist URL in text. URLs are normalized to video/playlist IDs
+        and deduplicated against each other, the queue and the download history. Playlists
+        start their info fetch; videos are added to the table in one batch.
+        """
+        quality = self.quality_combo.currentText(); video_format = self.format_combo.currentText().lower(); output_dir = self.output_dir_display.text()
+        priority = PRIORITY_LEVELS[self.priority_combo.currentText()]
+        result = parse_urls(text, self.is_known_url_key); new_rows = []
+        for entry in result['entries']:
+            task_id = self.generate_task_id(); self.url_key_tasks[entry['key']] = task_id if entry['kind'] == 'video' else f"pl_fetch_{task_id}"
+            if entry['kind'] != 'video': self.start_playlist_fetch(task_id, entry['url'], quality, video_format, output_dir, priority, self.playlist_sync_checkbox.isChecked(), self.stream_checkbox.isChecked()); continue
+            self._add_task('download', task_id, {'url': entry['url'], 'url_key': entry['key'], 'type': 'Video Download', 'status': 'queued', 'quality': quality, 'format': video_format, 'output_path': output_dir, 'title': entry['url'], 'enqueued_at': time.time(), 'priority': priority, 'stream': self.stream_checkbox.isChecked()})
+            self.scheduler.submit(task_id, 'download', estimate_download_cost(quality, video_format), priority, self.download_queue[task_id]['enqueued_at'], space=lambda t=task_id: self._download_space(t))
+            new_rows.append((task_id, entry['url'], "Video Download", self.queued_status_text(priority)))
+        self.add_table_rows(new_rows); self.update_control_states()
+        return result
+
+    def start_playlist_fetch(self, task_id, url, quality, video_format, output_dir, priority, sync=False, stream=False):
+        """Lists a playlist/channel and queues its items; with sync, only items not downloaded yet (see PlaylistSync)."""
+        playlist_fetch_task_id = f"pl_fetch_{task_id}"
+        worker_obj = DownloadWorker(playlist_fetch_task_id, 'playlist_sync' if sync else 'playlist_info_fetch', url, output_dir, quality, video_format)
+        thread = WorkerThread(worker_obj, self); worker_obj.playlist_entry_signal.connect(self.handle_playlist_entry); worker_obj.finished_signal.connect(self.handle_worker_finished)
+        self._add_task('download', playlist_fetch_task_id, {'url': url, 'type': 'Playlist Info Fetch', 'status': 'fetching_info', 'worker_thread': thread, 'worker_obj': worker_obj, 'title': f"Playlist: {url}", 'priority': priority, 'stream': stream})
+        self.add_or_update_table_row(playlist_fetch_task_id, f"Playlist: {url}", "Playlist Sync" if sync else "Info Fetch", "Fetching..."); thread.start()
 
     def handle_playlist_entry(self, data):
-        video_task_id = data['task_id']; playlist_title = "".join(c for c in data.get('playlist_title', 'pl') if c.isalnum()or c in (' ','-','_')).rstrip()
+        video_task_id = data['task_id']; playlist_title = safe_name(data.get('playlist_title'), 'pl')
         item_output_path = os.path.join(data['output_path'], playlist_title)
-        self.download_queue[video_task_id] = {'url':data['original_url'],'yt_id':data['id'],'type':'Video Download','status':'queued','quality':data['quality'],'format':data['video_format'],'output_path':item_output_path,'title':data['title']}
-        self.add_or_update_table_row(video_task_id, data['title'], "Video Download", "Queued"); self.update_control_states()
+        playlist_task = self.download_queue.get(data.get('playlist_task_id'), {}); priority = playlist_task.get('priority', PRIORITY_NORMAL) # Items inherit the playlist's priority and streaming
+        if data.get('sync') and self.is_known_url_key(video_key(data['id'], data['original_url'])): return # Still queued from an earlier sync
+        self.url_key_tasks[video_key(data['id'], data['original_url'])] = video_task_id
+        self._add_task('download', video_task_id, {'url':data['original_url'],'url_key':video_key(data['id'], data['original_url']),'yt_id':data['id'],'type':'Video Download','status':'queued','quality':data['quality'],'format':data['video_format'],'output_path':item_output_path,'title':data['title'],'enqueued_at':time.time(),'priority':priority,'stream':playlist_task.get('stream',False)})
+        self.scheduler.submit(video_task_id, 'download', estimate_download_cost(data['quality'], data['video_format']), priority, self.download_queue[video_task_id]['enqueued_at'], space=lambda t=video_task_id: self._download_space(t))
+        self.add_or_update_table_row(video_task_id, data['title'], "Video Download", self.queued_status_text(priority)); self.update_control_states()
 
     def find_row_by_task_id(self, task_id):
-        for r in range(self.status_table.rowCount()):
-            if self.status_table.item(r,0) and self.status_table.item(r,0).data(Qt.ItemDataRole.UserRole) == task_id: return r
-        return -1
+        item = self._row_items.get(task_id)
+        return self.status_table.row(item) if item is not None else -1
+
+    def _fill_row(self, row, task_id, display_name, item_type_str, status_str):
+        id_display = task_id.split('_')[1] if ('_' in task_id and len(task_id.split('_')) > 1) else task_id
+        id_item = QTableWidgetItem(id_display); id_item.setData(Qt.ItemDataRole.UserRole, task_id)
+        self.status_table.setItem(row,0,id_item); self._row_items[task_id] = id_item
+        name_item = self.status_table.item(row,1)
+        if name_item is None: name_item = QTableWidgetItem(); self.status_table.setItem(row,1,name_item) # Reused afterwards so its thumbnail icon stays
+        name_item.setText(display_name); self.status_table.setItem(row,2,QTableWidgetItem(item_type_str))
+        status_item = self.status_table.item(row,6)
+        if status_item is None: status_item = QTableWidgetItem(); self.status_table.setItem(row,6,status_item)
+        status_item.setText(status_str); status_item.setToolTip("") 
 
     def add_or_update_table_row(self, task_id, display_name, item_type_str, status_str):
         row = self.find_row_by_task_id(task_id)
         if row == -1: row = self.status_table.rowCount(); self.status_table.insertRow(row)
-        id_display = task_id.split('_')[1] if ('_' in task_id and len(task_id.split('_')) > 1) else task_id
-        id_item = QTableWidgetItem(id_display); id_item.setData(Qt.ItemDataRole.UserRole, task_id)
-        self.status_table.setItem(row,0,id_item)
+        self._fill_row(row, task_id, display_name, item_type_str, status_str)
         if not self.status_table.cellWidget(row,3): prog_bar = QProgressBar(); prog_bar.setValue(0); prog_bar.setTextVisible(True); self.status_table.setCellWidget(row,3,prog_bar)
-        self.status_table.setItem(row,1,QTableWidgetItem(display_name)); self.status_table.setItem(row,2,QTableWidgetItem(item_type_str))
-        status_item = self.status_table.item(row,6) or QTableWidgetItem(); self.status_table.setItem(row,6,status_item)
-        status_item.setText(status_str); status_item.setToolTip("") 
 
-    def process_download_queue(self):
-        if self.active_downloads >= self.MAX_CONCURRENT_DOWNLOADS: return
-        for task_id, details in list(self.download_queue.items()):
-            if self.active_downloads >= self.MAX_CONCURRENT_DOWNLOADS: break
-            if details['status'] == 'queued' and details['type'] == 'Video Download':
-                os.makedirs(details['output_path'], exist_ok=True)
-                worker = DownloadWorker(task_id=task_id, item_id=details.get('yt_id',task_id), task_type='single_video_download', url=details['url'], output_path=details['output_path'], quality=details['quality'], video_format=details['format'])
-                thread = WorkerThread(worker); worker.progress_signal.connect(self.update_download_progress); worker.finished_signal.connect(self.handle_worker_finished)
-                details.update({'worker_thread':thread,'worker_obj':worker,'status':'starting'})
-                self.add_or_update_table_row(task_id,details['title'],details['type'],"Starting...");thread.start();self.active_downloads+=1
+    def add_table_rows(self, rows):
+        """Appends many (task_id, name, type, status) rows with one model update. Progress bars are created when a task starts."""
+        if not rows: return
+        self.status_table.setUpdatesEnabled(False); first = self.status_table.rowCount(); self.status_table.setRowCount(first + len(rows))
+        for offset, (task_id, display_name, item_type_str, status_str) in enumerate(rows): self._fill_row(first + offset, task_id, display_name, item_type_str, status_str)
+        self.status_table.setUpdatesEnabled(True)
+
+    def _thumbnail_source(self, task_id):
+        """Video file shown for a row: a finished download, the output of a finished video conversion, or the input of a video conversion."""
+        if task_id in self.download_queue: path = self.download_queue[task_id].get('filepath')
+        elif task_id in self.conversion_queue and self.conversion_queue[task_id]['task_subtype'] == 'video':
+            info = self.conversion_queue[task_id]; path = info.get('output_filepath_actual')
+            if not path or converter.guess_task_subtype(path) != 'video': path = info['input_filepath'] # Audio-only output
+        else: return None
+        return path if path and converter.guess_task_subtype(path) == 'video' else None
+
+    def load_visible_thumbnails(self):
+        """Requests sprite sheets for the rows scrolled into view; rows that are never shown are never processed."""
+        if not self.status_table or not self.status_table.rowCount(): return
+        first = self.status_table.rowAt(0); last = self.status_table.rowAt(self.status_table.viewport().height() - 1)
+        if first == -1: return
+        for row in range(first, (self.status_table.rowCount() - 1 if last == -1 else last) + 1):
+            id_item = self.status_table.item(row,0); task_id = id_item.data(Qt.ItemDataRole.UserRole) if id_item else None
+            path = self._thumbnail_source(task_id) if task_id else None
+            if not path or self._thumbnail_requests.get(task_id) == path or not os.path.exists(path): continue
+            self._thumbnail_requests[task_id] = path; self.thumbnail_loader.request(task_id, path)
+
+    def handle_thumbnail_ready(self, data):
+        """Shows the first frame as the icon of the row's name; the whole sheet appears below the table when the row is selected."""
+        info = self.download_queue.get(data['id']) or self.conversion_queue.get(data['id']); row = self.find_row_by_task_id(data['id']); sheet = data['sheet']
+        if not info or row == -1 or not sheet or self._thumbnail_requests.get(data['id']) != data['path']: return
+        pixmap = QPixmap(sheet['sheet_path'])
+        if pixmap.isNull(): return
+        info['thumbnail_sheet'] = sheet
+        if self.status_table.item(row,1): self.status_table.item(row,1).setIcon(QIcon(pixmap.copy(0, 0, sheet['tile_width'], sheet['tile_height'])))
+        if data['id'] in self.get_selected_task_ids(): self.show_selected_preview()
+
+    def show_selected_preview(self):
+        """Shows the sprite sheet of the selected row (one row only) below the table."""
+        task_ids = self.get_selected_task_ids(); info = (self.download_queue.get(task_ids[0]) or self.conversion_queue.get(task_ids[0])) if len(task_ids) == 1 else None
+        sheet = info.get('thumbnail_sheet') if info else None; pixmap = QPixmap(sheet['sheet_path']) if sheet else None
+        if not pixmap or pixmap.isNull(): self.preview_label.hide(); return
+        self.preview_label.setPixmap(pixmap); self.preview_label.setToolTip("Frames at " + ", ".join(f"{int(t) // 60}:{int(t) % 60:02d}" for t in sheet['timestamps'])); self.preview_label.show()
+
+    def remove_table_row(self, task_id):
+        row = self.find_row_by_task_id(task_id)
+        if row != -1: self.status_table.removeRow(row)
+        self._row_items.pop(task_id, None); self._thumbnail_requests.pop(task_id, None)
+
+    def process_download_queue(self): self.schedule_tasks()
+
+    def schedule_tasks(self):
+        """Starts every queued download and conversion the scheduler admits right now."""
+        self.scheduler.set_capacity('network', self.MAX_CONCURRENT_DOWNLOADS)
+        self.scheduler.set_kind_limit('download', self.MAX_CONCURRENT_DOWNLOADS); self.scheduler.set_kind_limit('conversion', self.MAX_CONCURRENT_CONVERSIONS)
+        for task_id, kind, cost in self.scheduler.next_ready():
+            details = (self.download_queue if kind == 'download' else self.conversion_queue).get(task_id)
+            if not details or details['status'] != 'queued': self.scheduler.release(task_id); continue
+            if kind == 'download': self._start_download(task_id, details)
+            elif details.get('worker_obj'): self._resume_conversion(task_id, details) # Suspended ffmpeg, continue it
+            else: self._start_conversion(task_id, details, cost)
+        blocked = self.scheduler.waiting_for_space()
+        for task_id in blocked ^ self._space_blocked: self._show_space_wait(task_id, task_id in blocked)
+        self._space_blocked = blocked
+        if self.preempt_for_urgent: self.preempt_for_waiting_task()
         self.update_control_states()
 
+    def _show_space_wait(self, task_id, waiting):
+        """Shows (or clears) 'Waiting for disk space' on a queued task's row."""
+        kind = 'download' if task_id in self.download_queue else 'conversion'; info = (self.download_queue if kind == 'download' else self.conversion_queue).get(task_id)
+        if not info or info['status'] != 'queued': return
+        type_str = info.get('type','Video Download') if kind == 'download' else f"{info['task_subtype'].capitalize()} Conv."
+        self.add_or_update_table_row(task_id, info.get('title',''), type_str, "Waiting for disk space" if waiting else self.queued_status_text(info.get('priority', PRIORITY_NORMAL)))
+
+    def queued_status_text(self, priority):
+        label = next((name for name, value in PRIORITY_LEVELS.items() if value == priority), None)
+        return "Queued" if priority == PRIORITY_NORMAL or not label else f"Queued ({label})"
+
+    def preempt_for_waiting_task(self):
+        """Stops a running lower-priority download when an urgent one is waiting; it is requeued and resumes from its .part file."""
+        victim = self.scheduler.preemption_victim(kinds=('download',)) # Only downloads: not every conversion can be suspended (images, documents, no SIGSTOP on Windows), and a suspended ffmpeg keeps its memory
+        if not victim: return
+        victim_id, waiting_id = victim; info = self.download_queue.get(victim_id)
+        if not info or not info.get('worker_obj'): self.scheduler.release(victim_id); return
+        info['interrupt'] = 'preempt'; info['worker_obj'].cancel(pause=True)
+        self.add_or_update_table_row(victim_id, info.get('title',''), info.get('type','Video Download'), "Pausing for urgent task...")
+
+    def requeue_task(self, task_id, kind, note=""):
+        """Queues a preempted or paused task again with its original priority and enqueue time, so it keeps its place."""
+        info = (self.download_queue if kind == 'download' else self.conversion_queue)[task_id]; priority = info.get('priority', PRIORITY_NORMAL)
+        if kind == 'download': cost = estimate_download_cost(info['quality'], info['format']); space = lambda t=task_id: self._download_space(t); type_str = info.get('type','Video Download')
+        else: cost = lambda p=info['input_filepath'], st=info['task_subtype']: self.estimate_conversion_cost(p, st); space = lambda t=task_id: self._conversion_space(t); type_str = f"{info['task_subtype'].capitalize()} Conv."
+        self._set_task_status(kind, task_id, 'queued'); self.scheduler.submit(task_id, kind, cost, priority, info.get('enqueued_at'), space=space)
+        self.add_or_update_table_row(task_id, info.get('title',''), type_str, self.queued_status_text(priority) + note)
+        prog_bar=self.status_table.cellWidget(self.find_row_by_task_id(task_id),3)
+        if isinstance(prog_bar, QProgressBar) and kind == 'download': prog_bar.setRange(0,100); prog_bar.setTextVisible(True)
+
+    def _park_interrupted_download(self, task_id):
+        """A download stopped for preemption or by Pause has exited; its .part file stays on disk for the resume."""
+        info = self.download_queue[task_id]; reason = info.pop('interrupt'); self._release_progress_slot(task_id)
+        if self.scheduler.release(task_id): self.active_downloads=max(0,self.active_downloads-1)
+        info.update({'worker_thread':None,'worker_obj':None})
+        if self.download_tuner: self.download_tuner.forget(task_id)
+        if reason == 'preempt': self.requeue_task(task_id, 'download', " - preempted"); return
+        self._set_task_status('download', task_id, 'paused'); self.add_or_update_table_row(task_id, info.get('title',''), info.get('type','Video Download'), "Paused")
+        prog_bar=self.status_table.cellWidget(self.find_row_by_task_id(task_id),3)
+        if isinstance(prog_bar, QProgressBar): prog_bar.setRange(0,100); prog_bar.setTextVisible(True)
+
+    def _progress_writer_for(self, task_id):
+        """Gives a starting task a slot in the progress table; None (progress by signal) if there is no free slot."""
+        slot = self.progress_table.allocate() if self.progress_table else None
+        if slot is None: return None
+        self._progress_slots[task_id] = [slot, self.progress_table.seq(slot)]
+        if not self.progress_poll_timer.isActive(): self.progress_poll_timer.start()
+        return ProgressWriter(self.progress_table, slot)
+
+    def _release_progress_slot(self, task_id):
+        """Frees a task's slot once its worker has stopped writing to it."""
+        entry = self._progress_slots.pop(task_id, None)
+        if entry: self.progress_table.release(entry[0])
+        if not self._progress_slots: self.progress_poll_timer.stop()
+
+    def poll_progress_table(self):
+        """Shows the progress workers wrote to the shared table since the last poll; rows whose slot did not change are not touched."""
+        for task_id, entry in list(self._progress_slots.items()):
+            slot, last_seq = entry
+            if self.progress_table.seq(slot) == last_seq: continue
+            record = self.progress_table.read(slot); row = self.find_row_by_task_id(task_id)
+            if record is None or row == -1: continue # Torn by a fast writer; picked up next poll
+            entry[1] = record['seq']
+            info = self.download_queue.get(task_id) or self.conversion_queue.get(task_id)
+            if not info or info['status'] != 'starting': continue # Pausing/paused/finished rows keep their text
+            s_item=self.status_table.item(row,6)
+            if s_item is None: s_item=QTableWidgetItem(); self.status_table.setItem(row,6,s_item)
+            prog_bar=self.status_table.cellWidget(row,3)
+            if record['state'] == STATE_DOWNLOADING:
+                if self.download_tuner: self.download_tuner.observe_bytes(task_id, record['downloaded_bytes'])
+                self._note_download_size(task_id, record['total_bytes'], record['downloaded_bytes'])
+                if isinstance(prog_bar, QProgressBar): prog_bar.setRange(0,100); prog_bar.setValue(int(record['percentage'] or 0)); prog_bar.setTextVisible(True)
+                self.status_table.setItem(row,4,QTableWidgetItem(str(record['speed']) if record['speed'] is not None else 'N/A')); self.status_table.setItem(row,5,QTableWidgetItem(str(int(record['eta'])) if record['eta'] is not None else 'N/A'))
+                s_item.setText("Downloading"); s_item.setToolTip("")
+            elif record['state'] == STATE_CONVERTING:
+                if isinstance(prog_bar, QProgressBar): prog_bar.setRange(0,100); prog_bar.setValue(int(record['percentage'] or 0)); prog_bar.setTextVisible(True)
+                s_item.setText("Converting..."); s_item.setToolTip("")
+
+    def _start_download(self, task_id, details):
+        os.makedirs(details['output_path'], exist_ok=True); progress_writer = self._progress_writer_for(task_id)
+        if self.download_worker_mode == 'process' and progress_writer: # Worker processes report progress only through the progress table
+            if not self.download_pool: self.download_pool = DownloadProcessPool(self.progress_table); atexit.register(self.download_pool.shutdown)
+            worker = ProcessDownloadWorker(self.download_pool, task_id, details['url'], details['output_path'], details['quality'], details['format'], progress_writer, item_id=details.get('yt_id',task_id), enqueued_at=details.get('enqueued_at'), parent=self, stream=details.get('stream',False), output_layout=self.settings_manager.get_setting('output_layout'), scratch_dir=self.settings_manager.get_setting('scratch_dir')); thread = None
+        else:
+            worker = DownloadWorker(task_id=task_id, item_id=details.get('yt_id',task_id), task_type='single_video_download', url=details['url'], output_path=details['output_path'], quality=details['quality'], video_format=details['format'], enqueued_at=details.get('enqueued_at'), progress_writer=progress_writer, stream=details.get('stream',False), output_layout=self.settings_manager.get_setting('output_layout'), scratch_dir=self.settings_manager.get_setting('scratch_dir'))
+            thread = WorkerThread(worker, self)
+        worker.progress_signal.connect(self.update_download_progress); worker.finished_signal.connect(self.handle_worker_finished); worker.telemetry_signal.connect(self.handle_task_telemetry)
+        details.update({'worker_thread':thread,'worker_obj':worker}); self._set_task_status('download', task_id, 'starting')
+        self.add_or_update_table_row(task_id,details['title'],details['type'],"Starting..."); (thread or worker).start(); self.active_downloads+=1
+
+    def autotune_concurrency(self):
+        if self.download_tuner:
+            self.MAX_CONCURRENT_DOWNLOADS=self.download_tuner.tick(self.active_downloads, self.scheduler.queued_count('download'))
+        if self.conversion_tuner:
+            self.MAX_CONCURRENT_CONVERSIONS=self.conversion_tuner.tick(self.active_conversions, self.scheduler.queued_count('conversion'))
+
     def update_download_progress(self, data):
         task_id=data['id']; row=self.find_row_by_task_id(task_id)
         if row == -1: return
+        if self.download_tuner and data.get('status') == 'downloading': self.download_tuner.observe_bytes(task_id, data.get('downloaded_bytes'))
+        if data.get('status') == 'downloading': self._note_download_size(task_id, data.get('total_bytes'), data.get('downloaded_bytes'))
         s_item=self.status_table.item(row,6) or QTableWidgetItem(); self.status_table.setItem(row,6,s_item); s_item.setToolTip("")
         prog_bar=self.status_table.cellWidget(row,3)
-        if data.get('status') == 'retrying': 
+        if data.get('status') == 'title': # Progress itself arrives through the progress table
+            if data['title'] and data['title'] != "N/A" and self.status_table.item(row,1): self.status_table.item(row,1).setText(data['title']); self.download_queue[task_id]['title']=data['title']
+        elif data.get('status') in ['retrying', 'postprocessing']: 
             s_item.setText(data.get('message','Retrying...'))
             if isinstance(prog_bar, QProgressBar): prog_bar.setRange(0,0); prog_bar.setTextVisible(False)
         elif data.get('status') == 'downloading':
@@ -252,19 +549,23 @@ class MainWindow(QMainWindow):
     def handle_worker_finished(self, data):
         task_id=data['id']; row=self.find_row_by_task_id(task_id)
         if row == -1: return
+        if self.download_queue.get(task_id,{}).get('interrupt') and data['status']!='completed': self._park_interrupted_download(task_id); self.schedule_tasks(); return
         s_txt=data['status'].capitalize(); s_item=self.status_table.item(row,6) or QTableWidgetItem(); self.status_table.setItem(row,6,s_item); s_item.setToolTip("")
         prog_bar=self.status_table.cellWidget(row,3)
         if isinstance(prog_bar, QProgressBar): prog_bar.setRange(0,100)
-        if data['status']=='completed': s_txt="✔ Completed"; prog_bar.setValue(100) if isinstance(prog_bar, QProgressBar) else None
+        if data['status']=='completed': s_txt="✔ Completed"; s_item.setToolTip(data.get('message','')); prog_bar.setValue(100) if isinstance(prog_bar, QProgressBar) else None
         elif data['status']=='failed': s_txt="✘ Failed"; s_item.setToolTip(data.get('message','Error')); prog_bar.setValue(0) if isinstance(prog_bar, QProgressBar) else None
         elif data['status']=='cancelled': s_txt="∅ Cancelled"
         s_item.setText(s_txt)
         if data.get('title') and data['title']!="N/A" and self.status_table.item(row,1) : self.status_table.item(row,1).setText(data['title']); self.download_queue[task_id]['title']=data['title']
+        if self.download_tuner and data['status']!='cancelled': self.download_tuner.observe_result(data['status']=='completed'); self.download_tuner.forget(task_id)
+        self._release_progress_slot(task_id)
         if task_id in self.download_queue:
-            if self.download_queue[task_id].get('type')=='Video Download': self.active_downloads=max(0,self.active_downloads-1)
-            self.download_queue[task_id].update({'status':data['status'],'worker_thread':None,'worker_obj':None})
+            if self.scheduler.release(task_id): self.active_downloads=max(0,self.active_downloads-1)
+            self.download_queue[task_id].update({'worker_thread':None,'worker_obj':None}); self._set_task_status('download', task_id, data['status'])
             if data['status']=='completed' and data.get('filepath'): self.download_queue[task_id]['filepath']=data['filepath']
-        self.process_download_queue()
+            if data['status']=='completed' and self.download_queue[task_id].get('url_key'): get_download_history().add(self.download_queue[task_id]['url_key'], data.get('title'), data.get('filepath'))
+        self.schedule_tasks()
         if data['status']=='completed' and self.auto_clear_completed: QTimer.singleShot(2000, lambda: self.clear_task_from_table(task_id,'download'))
         self.update_control_states()
         self.check_and_notify_batch_completion('download')
@@ -273,15 +574,38 @@ class MainWindow(QMainWindow):
     def get_selected_task_ids(self): return [self.status_table.item(idx.row(),0).data(Qt.ItemDataRole.UserRole) for idx in self.status_table.selectionModel().selectedRows() if self.status_table.item(idx.row(),0)]
 
     def pause_selected_tasks(self): 
-        task_ids = self.get_selected_task_ids()
+        """
+        Queued tasks leave the queue. Running downloads are stopped and keep their .part file;
+        running conversions are suspended (SIGSTOP) and give their scheduler resources back.
+        """
+        task_ids = self.get_selected_task_ids(); unsupported = []
         for task_id in task_ids:
-            q, task_type_str = (self.download_queue, "Download") if task_id in self.download_queue else (self.conversion_queue, "Conversion") if task_id in self.conversion_queue else (None, None)
-            if q and task_id in q:
-                info = q[task_id]
-                if info.get('status') in ['downloading', 'starting', 'converting']: 
-                    if info.get('worker_obj'): info['worker_obj'].cancel() 
-                info['status'] = 'paused'; self.add_or_update_table_row(task_id, info.get('title',''), info.get('type', task_type_str), "Paused")
-        self.update_control_states()
+            kind, q = ('download', self.download_queue) if task_id in self.download_queue else ('conversion', self.conversion_queue) if task_id in self.conversion_queue else (None, None)
+            if not q or q[task_id].get('type') == 'Playlist Info Fetch': continue
+            info = q[task_id]; type_str = info.get('type','Video Download') if kind == 'download' else f"{info['task_subtype'].capitalize()} Conv."
+            if info.get('status') == 'queued':
+                self.scheduler.remove(task_id); self._set_task_status(kind, task_id, 'paused'); self.add_or_update_table_row(task_id, info.get('title',''), type_str, "Paused")
+            elif info.get('status') == 'starting' and info.get('worker_obj'):
+                if kind == 'download':
+                    info['interrupt'] = 'pause'; self._set_task_status(kind, task_id, 'pausing'); info['worker_obj'].cancel(pause=True); self.add_or_update_table_row(task_id, info.get('title',''), type_str, "Pausing...")
+                elif info['worker_obj'].pause():
+                    info['encode_elapsed']=info.get('encode_elapsed',0.0)+time.monotonic()-info.get('encode_resumed_at',time.monotonic())
+                    if self.scheduler.release(task_id): self.active_conversions=max(0,self.active_conversions-1)
+                    self._set_task_status(kind, task_id, 'paused'); self.add_or_update_table_row(task_id, info.get('title',''), type_str, "Paused")
+                else: unsupported.append(info.get('title', task_id))
+        if unsupported: QMessageBox.information(self, "Cannot Pause", "These conversions cannot be paused and keep running:\n" + "\n".join(unsupported))
+        self.schedule_tasks()
+
+    def resume_selected_tasks(self):
+        """Puts paused tasks back in the queue; the scheduler continues them where they stopped."""
+        for task_id in self.get_selected_task_ids():
+            kind = 'download' if task_id in self.download_queue else 'conversion' if task_id in self.conversion_queue else None
+            if kind and (self.download_queue if kind == 'download' else self.conversion_queue)[task_id].get('status') == 'paused': self.requeue_task(task_id, kind)
+        self.schedule_tasks()
+
+    def _resume_conversion(self, t_id, details):
+        self._set_task_status('conversion', t_id, 'starting'); details['worker_obj'].resume(); self.active_conversions += 1; details['encode_resumed_at']=time.monotonic()
+        self.add_or_update_table_row(t_id, details['title'], f"{details['task_subtype'].capitalize()} Conv.", "Converting (resumed)...")
 
     def cancel_selected_tasks(self): 
         task_ids = self.get_selected_task_ids()
@@ -289,13 +613,13 @@ class MainWindow(QMainWindow):
             q, active_attr, type_str = (self.download_queue, 'active_downloads', "Download") if task_id in self.download_queue else \
                                        (self.conversion_queue, 'active_conversions', "Conversion") if task_id in self.conversion_queue else (None, None, None)
             if q and task_id in q:
-                info = q[task_id]
+                info = q[task_id]; info.pop('interrupt', None) # A download that is being paused ends as cancelled instead
                 if info.get('worker_obj'): info['worker_obj'].cancel()
                 else:
-                    info['status'] = 'cancelled'; self.add_or_update_table_row(task_id, info.get('title',''), info.get('type', type_str), "Cancelled")
-                    if info.get('worker_thread') and active_attr: setattr(self, active_attr, max(0, getattr(self, active_attr)-1))
+                    self.scheduler.remove(task_id); self._set_task_status('download' if q is self.download_queue else 'conversion', task_id, 'cancelled'); self.add_or_update_table_row(task_id, info.get('title',''), info.get('type', type_str), "Cancelled")
+                    if self.scheduler.release(task_id) and active_attr: setattr(self, active_attr, max(0, getattr(self, active_attr)-1))
                     info.update({'worker_obj':None,'worker_thread':None})
-        self.process_download_queue(); self.process_conversion_queue(); self.update_control_states()
+        self.schedule_tasks()
 
     def clear_finished_tasks(self): 
         dl_q, conv_q = self.download_queue, self.conversion_queue
@@ -307,24 +631,29 @@ class MainWindow(QMainWindow):
             s_item = self.status_table.item(r,6)
             s_item_text = (s_item.text() if s_item else "").lower()
             if stat in ['completed','failed','cancelled'] or any(s in s_item_text for s in ["✔","✘","∅","fetched","error"]):
-                self.status_table.removeRow(r)
-                if t_id in dl_q: del dl_q[t_id]
-                if t_id in conv_q: del conv_q[t_id]
+                self.status_table.removeRow(r); self._row_items.pop(t_id, None)
+                if t_id in dl_q: self._remove_task('download', t_id)
+                if t_id in conv_q: self._remove_task('conversion', t_id)
         self.update_control_states()
 
     def add_conversion_files(self):
         files, _ = QFileDialog.getOpenFileNames(self, "Select Files", os.path.expanduser("~"), 
             "All Files (*);;Video (*.mp4 *.mkv);;Audio (*.mp3 *.aac);;Images (*.png *.jpg);;Docs (*.docx *.txt)")
         if not files: return
-        s_fmt_str=self.conv_format_combo.currentText(); t_fmt,f_type=self.parse_format_string(s_fmt_str)
+        s_fmt_str=self.conv_format_combo.currentText(); t_fmt,f_type=self.parse_format_string(s_fmt_str); priority=PRIORITY_LEVELS[self.conv_priority_combo.currentText()]; profile=self.conv_profile_combo.currentData()
         if not t_fmt: QMessageBox.warning(self,"Invalid Format",f"Could not parse: {s_fmt_str}"); return
         out_dir=self.conv_output_dir_display.text()
         if not out_dir: QMessageBox.warning(self,"Missing Output","Select conversion output directory."); return
-        exts={'video':['.mp4','.mkv','.avi','.mov','.webm','.flv','.ts'],'audio':['.mp3','.aac','.wav','.ogg','.flac','.m4a'],
-              'image':['.png','.jpg','.jpeg','.webp','.heic','.heif'],'document':['.docx','.txt']}
+        media_formats={fmt:f_kind for fmt,f_kind in (self.parse_format_string(self.conv_format_combo.itemText(i)) for i in range(self.conv_format_combo.count())) if f_kind in ['video','audio']}
+        extra_fmts=[]
+        for fmt in re.split(r"[\s,;]+",self.conv_extra_formats_input.text().lower()):
+            fmt=fmt.lstrip('.')
+            if fmt and fmt not in media_formats: QMessageBox.warning(self,"Invalid Format",f"'{fmt}' is not a video/audio target format."); return
+            if fmt and fmt!=t_fmt and fmt not in extra_fmts: extra_fmts.append(fmt)
+        media_paths=[]
         for path in files:
             t_id=self.generate_task_id(); b_name=os.path.basename(path); _,ext=os.path.splitext(path); ext=ext.lower()
-            sub_type = next((k for k,v in exts.items() if ext in v), None)
+            sub_type = converter.guess_task_subtype(path)
             if not sub_type: QMessageBox.warning(self,"Unsupported File",f"File type for '{b_name}' not recognized."); continue
             valid=True
             if sub_type=='document' and (f_type!='document' or t_fmt!='pdf'): valid=False
@@ -333,23 +662,87 @@ class MainWindow(QMainWindow):
             elif sub_type=='image' and f_type!='image': valid=False
             if not valid: QMessageBox.warning(self,"Format Mismatch",f"Cannot convert {sub_type} '{b_name}' to {s_fmt_str}."); continue
             if ext in ['.heic','.heif'] and sub_type=='image' and not self.check_heif_support(): QMessageBox.warning(self,"HEIF Missing",f"'{b_name}' needs 'pillow-heif'."); continue
-            self.conversion_queue[t_id]={'input_filepath':path,'status':'queued','output_dir':out_dir,'target_format':t_fmt,'task_subtype':sub_type,'title':b_name}
-            self.add_or_update_table_row(t_id,b_name,f"{sub_type.capitalize()} Conv.","Queued")
+            extras=[fmt for fmt in extra_fmts if sub_type=='video' or media_formats[fmt]=='audio'] if sub_type in ['video','audio'] else [] # Audio files only gain audio formats
+            if extras: b_name=f"{b_name} → {', '.join([t_fmt]+extras).upper()}"
+            self._add_task('conversion',t_id,{'input_filepath':path,'status':'queued','output_dir':out_dir,'target_format':t_fmt,'extra_formats':extras,'task_subtype':sub_type,'title':b_name,'enqueued_at':time.time(),'priority':priority,
+                                            'profile':profile if sub_type in ['video','audio'] else None,'target_size_mb':self.conv_target_size_spin.value(),'normalize_loudness':sub_type in ['video','audio'] and self.conv_loudness_checkbox.isChecked()})
+            self.scheduler.submit(t_id,'conversion',lambda p=path,st=sub_type: self.estimate_conversion_cost(p,st),priority,self.conversion_queue[t_id]['enqueued_at'],space=lambda t=t_id: self._conversion_space(t))
+            self.add_or_update_table_row(t_id,b_name,f"{sub_type.capitalize()} Conv.",self.queued_status_text(priority))
+            if sub_type in ['video','audio']: media_paths.append(path)
+        if media_paths: converter.prefetch_media_info(media_paths) # Warm the probe cache for the whole batch in parallel
         self.update_control_states()
 
-    def process_conversion_queue(self):
-        if self.active_conversions >= self.MAX_CONCURRENT_CONVERSIONS: return
-        for t_id,details in list(self.conversion_queue.items()):
-            if self.active_conversions >= self.MAX_CONCURRENT_CONVERSIONS: break
-            if details['status']=='queued':
-                b_name_no_ext,_=os.path.splitext(os.path.basename(details['input_filepath'])); o_fname=f"{b_name_no_ext}.{details['target_format']}"; o_fpath=os.path.join(details['output_dir'],o_fname)
-                os.makedirs(os.path.dirname(o_fpath),exist_ok=True)
-                worker=ConversionWorker(t_id,details['input_filepath'],o_fpath,details['target_format'],details['task_subtype'])
-                thread=WorkerThread(worker);worker.conversion_update_signal.connect(self.update_conversion_progress);worker.conversion_finished_signal.connect(self.handle_conversion_finished)
-                details.update({'worker_thread':thread,'worker_obj':worker,'status':'starting','output_filepath_expected':o_fpath})
-                self.add_or_update_table_row(t_id,details['title'],f"{details['task_subtype'].capitalize()} Conv.","Starting...")
-                thread.start();self.active_conversions+=1
-        self.update_control_states()
+    def process_conversion_queue(self): self.schedule_tasks()
+
+    def _download_space(self, task_id):
+        """Disk space a download reserves in the scheduler: what is left of it once yt-dlp reported its size, a guess by quality before that."""
+        details = self.download_queue.get(task_id) or {}
+        return details.get('output_path') or self.default_output_directory, details.get('space_needed') or estimate_download_bytes(details.get('quality', 'best'))
+
+    def _conversion_space(self, t_id):
+        """Disk space a conversion reserves: probed bit rate × duration (or the input size) per output file."""
+        details = self.conversion_queue.get(t_id) or {}
+        return details.get('output_dir') or self.default_conversion_output_directory, estimate_conversion_bytes(details.get('input_filepath',''), get_probe_cache().get(details.get('input_filepath','')), 1 + len(details.get('extra_formats', [])))
+
+    def _note_download_size(self, task_id, total_bytes, downloaded_bytes):
+        """Shrinks a running download's space reservation to what it still needs once its size is known."""
+        details = self.download_queue.get(task_id)
+        if not details or not total_bytes: return
+        details['space_needed'] = download_space_needed(total_bytes, downloaded_bytes); self.scheduler.update_space(task_id, details['space_needed'])
+
+    def estimate_conversion_cost(self, path, sub_type):
+        """Scheduler cost of a conversion; uses ffprobe data once the prefetch has cached it (never probes on the GUI thread)."""
+        return estimate_conversion_cost(sub_type, get_probe_cache().get(path) if sub_type=='video' else None)
+
+    def _start_conversion(self, t_id, details, cost):
+        b_name_no_ext,_=os.path.splitext(os.path.basename(details['input_filepath'])); o_fname=f"{b_name_no_ext}.{details['target_format']}"; o_fpath=os.path.join(details['output_dir'],o_fname)
+        os.makedirs(os.path.dirname(o_fpath),exist_ok=True)
+        threads=max(int(cost['cpu']),1) # ffmpeg gets as many threads as cores were reserved for it, but never more than its share of the cores when auto-tuning
+        if self.conversion_tuner: threads=min(threads,self.conversion_tuner.ffmpeg_threads())
+        q_opts={'threads':threads} if details['task_subtype'] in ['video','audio'] else None
+        extra_outputs=[(os.path.join(details['output_dir'],f"{b_name_no_ext}.{fmt}"),fmt) for fmt in details.get('extra_formats',[])]
+        worker=ConversionWorker(t_id,details['input_filepath'],o_fpath,details['target_format'],details['task_subtype'],q_opts,enqueued_at=details.get('enqueued_at'),progress_writer=self._progress_writer_for(t_id),extra_outputs=extra_outputs,
+                                profile=details.get('profile'),target_size_mb=details.get('target_size_mb'),normalize_loudness=details.get('normalize_loudness',False),scratch_dir=self.settings_manager.get_setting('scratch_dir'))
+        details.update(predicted_seconds=self.predict_conversion_seconds(details,(q_opts or {}).get('threads')),encode_elapsed=0.0,encode_resumed_at=time.monotonic())
+        if details['predicted_seconds'] is not None: self._predicted_conversions.add(t_id)
+        thread=WorkerThread(worker,self);worker.conversion_update_signal.connect(self.update_conversion_progress);worker.conversion_finished_signal.connect(self.handle_conversion_finished);worker.telemetry_signal.connect(self.handle_task_telemetry)
+        details.update({'worker_thread':thread,'worker_obj':worker,'output_filepath_expected':o_fpath}); self._set_task_status('conversion', t_id, 'starting')
+        self.add_or_update_table_row(t_id,details['title'],f"{details['task_subtype'].capitalize()} Conv.","Starting...")
+        thread.start();self.active_conversions+=1
+
+    def predict_conversion_seconds(self, details, threads=None):
+        """Predicted encode time of a video conversion from the encoder calibration and cached probe data; None if uncalibrated, not probed yet or not an x264 target."""
+        if details['task_subtype']!='video': return None
+        media_info=get_probe_cache().get(details['input_filepath']); calibration=get_encoder_calibration()
+        estimates=[calibration.estimate_seconds(details.get('profile'),media_info,converter.FORMAT_DEFAULT_CODECS.get(fmt,{}).get('video_codec','libx264'),threads)
+                   for fmt in [details['target_format']]+details.get('extra_formats',[]) if fmt not in converter.AUDIO_ONLY_FORMATS]
+        return sum(estimates) if estimates and None not in estimates else None
+
+    def update_conversion_etas(self):
+        """Counts down the predicted time to finish (ETR column) of running conversions; paused time does not count."""
+        now=time.monotonic()
+        for t_id in list(self._predicted_conversions):
+            info=self.conversion_queue.get(t_id); row=self.find_row_by_task_id(t_id)
+            if not info or row == -1: self._predicted_conversions.discard(t_id); continue
+            if info['status']!='starting': continue
+            remaining=info['predicted_seconds']-info['encode_elapsed']-(now-info['encode_resumed_at'])
+            self.status_table.setItem(row,5,QTableWidgetItem(str(max(int(remaining),0))))
+
+    def conversion_profile_changed(self):
+        profile=self.conv_profile_combo.currentData(); self.settings_manager.set_setting('conversion_profile', profile)
+        self.conv_target_size_spin.setEnabled(profile=='size_targeted')
+
+    def start_encoder_calibration(self):
+        if self.calibration_thread: return
+        worker=EncoderCalibrationWorker(); self.calibration_thread=WorkerThread(worker,self)
+        worker.progress_signal.connect(lambda data: self.conv_calibrate_button.setText(f"Calibrating... ({ENCODING_PROFILES[data['profile']]['label']} done)"))
+        worker.finished_signal.connect(self.handle_calibration_finished)
+        self.conv_calibrate_button.setEnabled(False); self.conv_calibrate_button.setText("Calibrating..."); self.calibration_thread.start()
+
+    def handle_calibration_finished(self, data):
+        self.calibration_thread=None; self.conv_calibrate_button.setEnabled(True); self.conv_calibrate_button.setText("Calibrate Speed")
+        if data['status']!='completed': QMessageBox.warning(self,"Calibration Failed",f"Could not measure encode speed (is FFmpeg with libx264 installed?).\n{data.get('message','')}"); return
+        self.conv_calibrate_button.setToolTip("Encode speed at 720p on this machine: " + ", ".join(f"{ENCODING_PROFILES[name]['label']} {r['fps']:.0f} fps" for name, r in data['profiles'].items()))
 
     def update_conversion_progress(self, data):
         t_id=data['id']; row=self.find_row_by_task_id(t_id)
@@ -361,7 +754,8 @@ class MainWindow(QMainWindow):
             t_type=data.get('type','video'); p_val=data.get('progress_value')
             if t_type in ['image','document'] or p_val is None: prog_bar.setRange(0,0); prog_bar.setTextVisible(False)
             else: prog_bar.setRange(0,100); prog_bar.setValue(p_val); prog_bar.setTextVisible(True)
-        self.status_table.setItem(row,4,QTableWidgetItem("N/A")); self.status_table.setItem(row,5,QTableWidgetItem("N/A")) 
+        self.status_table.setItem(row,4,QTableWidgetItem("N/A"))
+        if t_id not in self._predicted_conversions: self.status_table.setItem(row,5,QTableWidgetItem("N/A")) # Otherwise update_conversion_etas counts down
         if 'title' in data and self.status_table.item(row,1): self.status_table.item(row,1).setText(data['title'])
         self.update_control_states()
 
@@ -375,45 +769,51 @@ class MainWindow(QMainWindow):
         elif data['status']=='failed': s_txt_disp="✘ Failed"; s_item.setToolTip(data.get('message','Error')); prog_bar.setValue(0) if isinstance(prog_bar, QProgressBar) else None
         elif data['status']=='cancelled': s_txt_disp="∅ Cancelled"
         s_item.setText(s_txt_disp)
+        if self.conversion_tuner and data['status']!='cancelled': self.conversion_tuner.observe_result(data['status']=='completed')
+        self._release_progress_slot(t_id); self._predicted_conversions.discard(t_id)
         if t_id in self.conversion_queue:
-            self.conversion_queue[t_id].update({'status':data['status'],'worker_thread':None,'worker_obj':None})
-            if data['status']=='completed' and data.get('output_filepath'): self.conversion_queue[t_id]['output_filepath_actual']=data['output_filepath']
-            self.active_conversions=max(0,self.active_conversions-1)
-        self.process_conversion_queue()
+            self.conversion_queue[t_id].update({'worker_thread':None,'worker_obj':None}); self._set_task_status('conversion', t_id, data['status'])
+            if data['status']=='completed' and data.get('output_filepath'): self.conversion_queue[t_id].update(output_filepath_actual=data['output_filepath'],output_filepaths_actual=data.get('output_filepaths') or [data['output_filepath']])
+            if self.scheduler.release(t_id): self.active_conversions=max(0,self.active_conversions-1)
+        self.schedule_tasks()
         if data['status']=='completed' and self.auto_clear_completed: QTimer.singleShot(2000,lambda:self.clear_task_from_table(t_id,'conversion'))
         self.update_control_states()
         self.check_and_notify_batch_completion('conversion')
 
 
+    def handle_task_telemetry(self, data):
+        """Shows the phase breakdown of a completed task as the tooltip of its status cell."""
+        row=self.find_row_by_task_id(data['id'])
+        if row == -1 or data['status']!='completed': return
+        s_item=self.status_table.item(row,6)
+        if s_item: s_item.setToolTip(format_task_telemetry(data))
+        q=self.download_queue if data['id'] in self.download_queue else self.conversion_queue
+        if data['id'] in q: q[data['id']]['telemetry']=data
+
     def check_and_notify_batch_completion(self, completed_task_type):
         if completed_task_type == 'download':
             if self.active_downloads == 0:
                 # Check if any downloads are still queued or in an active-like state (starting, retrying)
-                still_processing_downloads = any(
-                    task['status'] in ['queued', 'starting', 'retrying'] 
-                    for task in self.download_queue.values()
-                )
+                counts = self.status_counts['download']
+                still_processing_downloads = counts['queued'] + counts['starting'] + counts['retrying'] > 0
                 if not still_processing_downloads:
                     # Check if there were any tasks at all in the download queue that reached a final state
                     # This prevents notifications if the queue was empty and something external triggered this check.
-                    if any(task['status'] in ['completed', 'failed', 'cancelled'] for task in self.download_queue.values()):
+                    if counts['completed'] + counts['failed'] + counts['cancelled'] > 0:
                          send_system_notification("Downloads Complete", "All video download tasks have finished processing.")
         
         elif completed_task_type == 'conversion':
             if self.active_conversions == 0:
-                still_processing_conversions = any(
-                    task['status'] in ['queued', 'starting'] 
-                    for task in self.conversion_queue.values()
-                )
+                counts = self.status_counts['conversion']
+                still_processing_conversions = counts['queued'] + counts['starting'] > 0
                 if not still_processing_conversions:
-                    if any(task['status'] in ['completed', 'failed', 'cancelled'] for task in self.conversion_queue.values()):
+                    if counts['completed'] + counts['failed'] + counts['cancelled'] > 0:
                         send_system_notification("Conversions Complete", "All file conversion tasks have finished processing.")
 
     def clear_task_from_table(self, task_id, queue_type):
-        row=self.find_row_by_task_id(task_id)
-        if row != -1: self.status_table.removeRow(row)
+        self.remove_table_row(task_id)
         q=self.download_queue if queue_type=='download' else self.conversion_queue
-        if task_id in q: del q[task_id]; print(f"Task {task_id} removed from {queue_type} queue.")
+        if task_id in q: self._remove_task(queue_type, task_id); print(f"Task {task_id} removed from {queue_type} queue.")
         self.update_control_states()
 
     def parse_format_string(self, format_str):
@@ -424,11 +824,28 @@ class MainWindow(QMainWindow):
         try: from PIL import features; return features.check('heif')
         except ImportError: return False
 
+    def _add_task(self, kind, task_id, record):
+        (self.download_queue if kind == 'download' else self.conversion_queue)[task_id] = record; self.status_counts[kind][record['status']] += 1
+
+    def _set_task_status(self, kind, task_id, status):
+        """All status changes of queued tasks go through here, so status_counts stays exact."""
+        info = (self.download_queue if kind == 'download' else self.conversion_queue)[task_id]; counts = self.status_counts[kind]
+        counts[info['status']] -= 1; counts[status] += 1; info['status'] = status
+
+    def _remove_task(self, kind, task_id):
+        info = (self.download_queue if kind == 'download' else self.conversion_queue).pop(task_id); self.status_counts[kind][info['status']] -= 1
+
     def update_control_states(self):
+        """Schedules a refresh of the buttons; any number of calls within one event-loop iteration cause a single refresh."""
+        if self._control_update_pending: return
+        self._control_update_pending = True; QTimer.singleShot(0, self._apply_control_states)
+
+    def _apply_control_states(self):
+        self._control_update_pending = False
         if not hasattr(self, 'start_downloads_button') or not self.start_downloads_button: return 
-        has_q_dl=any(t['status']=='queued' for t in self.download_queue.values())
+        has_q_dl=self.status_counts['download']['queued'] > 0
         self.start_downloads_button.setEnabled(has_q_dl and self.active_downloads < self.MAX_CONCURRENT_DOWNLOADS)
-        has_q_conv=any(t['status']=='queued' for t in self.conversion_queue.values())
+        has_q_conv=self.status_counts['conversion']['queued'] > 0
         self.start_conversions_button.setEnabled(has_q_conv and self.active_conversions < self.MAX_CONCURRENT_CONVERSIONS)
         if self.url_input: self.add_queue_button.setEnabled(bool(self.url_input.text().strip()))
         self.update_selection_dependent_buttons()
@@ -436,8 +853,9 @@ class MainWindow(QMainWindow):
 
     def update_selection_dependent_buttons(self):
         if not hasattr(self, 'status_table') or not self.status_table or not self.status_table.selectionModel(): return 
-        has_selection=bool(self.status_table.selectionModel().selectedRows())
+        has_selection=self.status_table.selectionModel().hasSelection()
         self.pause_selected_button.setEnabled(has_selection)
+        self.resume_selected_button.setEnabled(has_selection)
         self.cancel_selected_button.setEnabled(has_selection)
 
 if __name__ == '__main__':
@@ -0,0 +1,102 @@
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget,
+    QTableWidgetItem, QHeaderView, QAbstractItemView, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import QTimer
+
+from src.utils.telemetry import get_metrics_registry
+
+REFRESH_INTERVAL_MS = 2000
+PHASE_LABELS = {
+    'queue_wait': "Queue wait", 'metadata': "Metadata", 'transfer': "Transfer",
+    'postprocess': "Merge/post-process", 'encode': "Encode",
+    'bytes': "Bytes", 'cpu_seconds': "ffmpeg CPU", 'peak_rss_bytes': "ffmpeg peak RSS",
+}
+
+
+def format_metric_value(metric, value):
+    if value is None:
+        return "N/A"
+    if metric in ('bytes', 'peak_rss_bytes'):
+        for unit in ("B", "KB", "MB", "GB"):
+            if value < 1024 or unit == "GB":
+                return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+            value /= 1024
+    return f"{value:.2f} s"
+
+
+def format_task_telemetry(telemetry):
+    """One-line summary of a worker's telemetry dict, for the status table tooltip."""
+    parts = [f"{PHASE_LABELS[phase]} {format_metric_value(phase, seconds)}" for phase, seconds in telemetry.get('phases', {}).items()]
+    if telemetry.get('bytes'):
+        parts.append(f"Size {format_metric_value('bytes', telemetry['bytes'])}")
+    if telemetry.get('cpu_seconds') is not None:
+        parts.append(f"CPU {format_metric_value('cpu_seconds', telemetry['cpu_seconds'])}")
+    if telemetry.get('peak_rss_bytes') is not None:
+        parts.append(f"Peak RSS {format_metric_value('peak_rss_bytes', telemetry['peak_rss_bytes'])}")
+    return " · ".join(parts)
+
+
+class MetricsDialog(QDialog):
+    """Rolling per-phase percentiles of finished tasks, with Prometheus/JSON export."""
+
+    def __init__(self, parent=None, registry=None):
+        super().__init__(parent)
+        self.registry = registry or get_metrics_registry()
+        self.setWindowTitle("Performance Metrics")
+        self.setMinimumSize(720, 420)
+
+        layout = QVBoxLayout(self)
+        self.info_label = QLabel(f"Percentiles over the last {self.registry.window} finished tasks of each kind.")
+        layout.addWidget(self.info_label)
+        self.table = QTableWidget(); self.table.setColumnCount(8)
+        self.table.setHorizontalHeaderLabels(["Task Kind", "Metric", "Count", "Mean", "p50", "p90", "p99", "Max"])
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+        self.totals_label = QLabel(); layout.addWidget(self.totals_label)
+
+        buttons_layout = QHBoxLayout()
+        self.export_prometheus_button = QPushButton("Export Prometheus..."); self.export_prometheus_button.clicked.connect(lambda: self.export('prometheus'))
+        self.export_json_button = QPushButton("Export JSON..."); self.export_json_button.clicked.connect(lambda: self.export('json'))
+        self.reset_button = QPushButton("Reset"); self.reset_button.clicked.connect(self.reset_metrics)
+        self.close_button = QPushButton("Close"); self.close_button.clicked.connect(self.close)
+        for btn in [self.export_prometheus_button, self.export_json_button, self.reset_button]: buttons_layout.addWidget(btn)
+        buttons_layout.addStretch(); buttons_layout.addWidget(self.close_button)
+        layout.addLayout(buttons_layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(REFRESH_INTERVAL_MS)
+        self.refresh()
+
+    def refresh(self):
+        data = self.registry.snapshot()
+        rows = [(kind, metric, summary) for kind, metrics in sorted(data['summaries'].items())
+                for metric, summary in sorted(metrics.items(), key=lambda m: list(PHASE_LABELS).index(m[0]) if m[0] in PHASE_LABELS else len(PHASE_LABELS))]
+        self.table.setRowCount(len(rows))
+        for row, (kind, metric, summary) in enumerate(rows):
+            values = [kind.replace('_', ' ').capitalize(), PHASE_LABELS.get(metric, metric), str(summary['count'])]
+            values += [format_metric_value(metric, summary[key]) for key in ('mean', 'p50', 'p90', 'p99', 'max')]
+            for col, text in enumerate(values): self.table.setItem(row, col, QTableWidgetItem(text))
+
+        totals = []
+        for kind, counters in sorted(data['counters'].items()):
+            finished = ", ".join(f"{name[len('tasks_'):]} {int(value)}" for name, value in sorted(counters.items()) if name.startswith('tasks_'))
+            totals.append(f"{kind.replace('_', ' ').capitalize()}: {finished or 'none'}"
+                          + (f", {format_metric_value('bytes', counters['bytes_total'])}" if counters.get('bytes_total') else ""))
+        self.totals_label.setText("\n".join(totals) or "No finished tasks yet.")
+
+    def export(self, fmt):
+        file_filter = "Prometheus text (*.prom *.txt)" if fmt == 'prometheus' else "JSON (*.json)"
+        default_name = "versadownloader_metrics.prom" if fmt == 'prometheus' else "versadownloader_metrics.json"
+        path, _ = QFileDialog.getSaveFileName(self, "Export Metrics", default_name, file_filter)
+        if not path: return
+        try:
+            with open(path, 'w') as f: f.write(self.registry.to_prometheus() if fmt == 'prometheus' else self.registry.to_json())
+        except OSError as e:
+            QMessageBox.warning(self, "Export Failed", f"Could not write {path}: {e}")
+
+    def reset_metrics(self):
+        self.registry.reset(); self.refresh()
@@ -4,6 +4,7 @@ from PyQt6.QtWidgets import (
     QCheckBox, QComboBox, QDialogButtonBox, QFileDialog, QMessageBox
 )
 from PyQt6.QtCore import Qt
+from src.utils.output_paths import OUTPUT_LAYOUTS
 
 class SettingsDialog(QDialog):
     def __init__(self, settings_manager, parent=None):
@@ -27,6 +28,14 @@ class SettingsDialog(QDialog):
         conversion_dir_layout = self.create_browse_layout(self.conversion_dir_edit, self.browse_conversion_dir_button)
         layout.addRow("Conversion Output Directory:", conversion_dir_layout)
 
+        # Scratch Directory
+        self.scratch_dir_edit = QLineEdit()
+        self.scratch_dir_edit.setPlaceholderText("None (write into the output directories)")
+        self.scratch_dir_edit.setToolTip("Fast local disk for partial downloads and encodes in progress; finished files are moved to the output directory.")
+        self.browse_scratch_dir_button = QPushButton("Browse...")
+        scratch_dir_layout = self.create_browse_layout(self.scratch_dir_edit, self.browse_scratch_dir_button)
+        layout.addRow("Scratch Directory:", scratch_dir_layout)
+
         # Max Downloads
         self.max_downloads_spinbox = QSpinBox()
         self.max_downloads_spinbox.setRange(1, 10)
@@ -37,6 +46,30 @@ class SettingsDialog(QDialog):
         self.max_conversions_spinbox.setRange(1, 10)
         layout.addRow("Max Concurrent Conversions:", self.max_conversions_spinbox)
 
+        # Auto-tune concurrency
+        self.auto_tune_checkbox = QCheckBox("Auto-tune concurrency (values above are starting points)")
+        self.auto_tune_checkbox.setToolTip("Adds download slots while throughput scales and backs off on plateaus or errors; sizes conversions to the CPU cores.")
+        layout.addRow(self.auto_tune_checkbox)
+
+        # Preemption
+        self.preempt_checkbox = QCheckBox("Urgent downloads may pause lower-priority ones")
+        self.preempt_checkbox.setToolTip("The paused download is queued again and resumes from its partial file.")
+        layout.addRow(self.preempt_checkbox)
+
+        # Download workers
+        self.download_worker_mode_combo = QComboBox()
+        self.download_worker_mode_combo.addItem("Threads (in the app process)", 'thread')
+        self.download_worker_mode_combo.addItem("Separate processes", 'process')
+        self.download_worker_mode_combo.setToolTip("Separate processes keep yt-dlp's parsing off the interface; useful with many parallel downloads.")
+        layout.addRow("Download Workers:", self.download_worker_mode_combo)
+
+        # Output Layout
+        self.output_layout_combo = QComboBox()
+        for layout_key, layout_label in OUTPUT_LAYOUTS.items():
+            self.output_layout_combo.addItem(layout_label, layout_key)
+        self.output_layout_combo.setToolTip("Sub-folders for downloaded videos; keeps folders small in large libraries.")
+        layout.addRow("Output Layout:", self.output_layout_combo)
+
         # Auto-clear
         self.auto_clear_checkbox = QCheckBox("Automatically clear completed tasks")
         layout.addRow(self.auto_clear_checkbox)
@@ -56,6 +89,7 @@ class SettingsDialog(QDialog):
         # Connect signals
         self.browse_download_dir_button.clicked.connect(lambda: self.browse_directory(self.download_dir_edit))
         self.browse_conversion_dir_button.clicked.connect(lambda: self.browse_directory(self.conversion_dir_edit))
+        self.browse_scratch_dir_button.clicked.connect(lambda: self.browse_directory(self.scratch_dir_edit))
         self.button_box.accepted.connect(self.apply_settings_and_accept)
         self.button_box.rejected.connect(self.reject)
 
@@ -73,9 +107,16 @@ class SettingsDialog(QDialog):
     def load_initial_settings(self):
         self.download_dir_edit.setText(self.settings_manager.get_setting('download_dir'))
         self.conversion_dir_edit.setText(self.settings_manager.get_setting('conversion_output_dir'))
+        self.scratch_dir_edit.setText(self.settings_manager.get_setting('scratch_dir'))
         self.max_downloads_spinbox.setValue(self.settings_manager.get_setting('max_concurrent_downloads'))
         self.max_conversions_spinbox.setValue(self.settings_manager.get_setting('max_concurrent_conversions'))
         self.auto_clear_checkbox.setChecked(self.settings_manager.get_setting('auto_clear_completed'))
+        self.auto_tune_checkbox.setChecked(self.settings_manager.get_setting('auto_tune_concurrency'))
+        self.preempt_checkbox.setChecked(self.settings_manager.get_setting('preempt_for_urgent'))
+        mode_index = self.download_worker_mode_combo.findData(self.settings_manager.get_setting('download_worker_mode'))
+        self.download_worker_mode_combo.setCurrentIndex(max(mode_index, 0))
+        layout_index = self.output_layout_combo.findData(self.settings_manager.get_setting('output_layout'))
+        self.output_layout_combo.setCurrentIndex(max(layout_index, 0))
         
         current_theme = self.settings_manager.get_setting('theme')
         theme_index = self.theme_combo.findText(current_theme, Qt.MatchFlag.MatchFixedString)
@@ -116,11 +157,20 @@ class SettingsDialog(QDialog):
             QMessageBox.warning(self, "Invalid Path", "Conversion output directory path is invalid. Please select a valid directory.")
             return
 
+        if self.scratch_dir_edit.text().strip() and not os.path.isdir(self.scratch_dir_edit.text().strip()):
+            QMessageBox.warning(self, "Invalid Path", "Scratch directory path is invalid. Select a valid directory or leave it empty.")
+            return
+
         self.settings_manager.set_setting('download_dir', self.download_dir_edit.text())
         self.settings_manager.set_setting('conversion_output_dir', self.conversion_dir_edit.text())
+        self.settings_manager.set_setting('scratch_dir', self.scratch_dir_edit.text().strip())
         self.settings_manager.set_setting('max_concurrent_downloads', self.max_downloads_spinbox.value())
         self.settings_manager.set_setting('max_concurrent_conversions', self.max_conversions_spinbox.value())
         self.settings_manager.set_setting('auto_clear_completed', self.auto_clear_checkbox.isChecked())
+        self.settings_manager.set_setting('auto_tune_concurrency', self.auto_tune_checkbox.isChecked())
+        self.settings_manager.set_setting('preempt_for_urgent', self.preempt_checkbox.isChecked())
+        self.settings_manager.set_setting('download_worker_mode', self.download_worker_mode_combo.currentData())
+        self.settings_manager.set_setting('output_layout', self.output_layout_combo.currentData())
         self.settings_manager.set_setting('theme', self.theme_combo.currentText())
         
         self.settings_manager.save()
@@ -144,6 +194,15 @@ if __name__ == '__main__':
                 'max_concurrent_downloads': 2,
                 'max_concurrent_conversions': 1,
                 'auto_clear_completed': True,
+                'auto_tune_concurrency': False,
+                'preempt_for_urgent': True,
+                'download_worker_mode': 'thread',
+                'conversion_profile': 'balanced',
+                'target_size_mb': 50,
+                'normalize_loudness': False,
+                'stream_downloads': False,
+                'output_layout': 'flat',
+                'scratch_dir': '',
                 'theme': 'Dark'
             }
             self.settings = self.defaults.copy()
@@ -1,7 +1,18 @@
 from PyQt6.QtCore import QThread, pyqtSignal, QObject
 from src.downloading import downloader 
+from src.downloading.playlist_sync import PlaylistSync
+from src.downloading.url_tools import classify_url
+from src.conversion import converter
+from src.conversion.profiles import profile_quality_options, get_encoder_calibration
+from src.conversion import thumbnails
+from src.conversion.loudness import get_loudness, loudnorm_quality_options
+import os
+import signal
+import sys
 import time 
 from src.utils.logger import setup_logger # Added
+from src.utils.telemetry import TaskTelemetry, get_metrics_registry, kill_child
+from src.utils.progress_table import STATE_DOWNLOADING, STATE_CONVERTING
 
 # Setup logger for this module
 worker_logger = setup_logger('Workers', 'application.log', console_out=False) # Console out can be noisy for workers
@@ -11,8 +22,9 @@ class DownloadWorker(QObject):
     playlist_entry_signal = pyqtSignal(dict)
     progress_signal = pyqtSignal(dict)
     finished_signal = pyqtSignal(dict)
+    telemetry_signal = pyqtSignal(dict)
     
-    def __init__(self, task_id, task_type, url, output_path, quality, video_format, item_id=None):
+    def __init__(self, task_id, task_type, url, output_path, quality, video_format, item_id=None, enqueued_at=None, progress_writer=None, stream=False, output_layout='flat', scratch_dir=None):
         super().__init__()
         self.task_id = task_id 
         self.item_id = item_id if item_id else task_id 
@@ -22,10 +34,19 @@ class DownloadWorker(QObject):
         self.quality = quality
         self.video_format = video_format
         self._is_cancelled = False
+        self._pause_requested = False # Set by cancel(pause=True): the download stops but keeps its file name and .part file
+        self.telemetry = TaskTelemetry('download', task_id, enqueued_at)
+        self._finished_info = {}
+        self.progress_writer = progress_writer # Slot in the shared progress table; without one, progress is emitted per update
+        self._reported_title = None
+        self.stream = stream # Convert while downloading (downloader.stream_video) instead of writing the source file
+        self.output_layout = output_layout # Sub-folder layout of single video downloads (utils.output_paths)
+        self.scratch_dir = scratch_dir or None # Part files and merges go here; only finished files reach output_path
 
     def _progress_hook(self, d):
         if self._is_cancelled:
             # worker_logger.debug(f"DownloadWorker (Task ID: {self.task_id}, Item ID: {self.item_id}): Progress hook called but task is cancelled. Raising exception to stop yt-dlp.")
+            if self._pause_requested: raise downloader.DownloadPaused("Download paused by user via _progress_hook")
             raise Exception("Download cancelled by user via _progress_hook") 
 
         if d['status'] == 'retrying':
@@ -39,6 +60,7 @@ class DownloadWorker(QObject):
             return 
 
         if d['status'] == 'downloading':
+            self.telemetry.stop('metadata'); self.telemetry.stop('postprocess'); self.telemetry.start('transfer')
             percentage = 0
             if d.get('total_bytes') and d.get('total_bytes') > 0:
                 percentage = (d.get('downloaded_bytes', 0) / d.get('total_bytes')) * 100
@@ -47,6 +69,14 @@ class DownloadWorker(QObject):
             
             base_filename = d.get('info_dict', {}).get('filename', d.get('filename', "N/A"))
 
+            if self.progress_writer:
+                self.progress_writer.update(STATE_DOWNLOADING, percentage=percentage, downloaded_bytes=d.get('downloaded_bytes'),
+                                            total_bytes=d.get('total_bytes') or d.get('total_bytes_estimate'), speed=d.get('speed'), eta=d.get('eta'))
+                title = d.get('info_dict', {}).get('title', base_filename)
+                if title != self._reported_title: # The title is the only per-download text; it goes out once
+                    self._reported_title = title
+                    self.progress_signal.emit({'id': self.task_id, 'item_id': self.item_id, 'status': 'title', 'title': title})
+                return
             self.progress_signal.emit({
                 'id': self.task_id, 'item_id': self.item_id,
                 'title': d.get('info_dict', {}).get('title', base_filename),
@@ -58,13 +88,15 @@ class DownloadWorker(QObject):
                 '_info_dict_filename': d.get('info_dict', {}).get('filename')
             })
         elif d['status'] == 'finished':
-            final_filepath = d.get('info_dict', {}).get('filepath') or d.get('filename')
-            self.finished_signal.emit({
-                'id': self.task_id, 'item_id': self.item_id,
-                'status': 'completed', 'message': 'Download finished successfully.',
-                'filepath': final_filepath,
-                'title': d.get('info_dict', {}).get('title', "Unknown title")
-            })
+            # Each downloaded stream ends here; merging and post-processing run until download_video returns.
+            self.telemetry.stop('transfer'); self.telemetry.start('postprocess')
+            self.telemetry.bytes += d.get('total_bytes') or d.get('downloaded_bytes') or 0
+            # Completion is reported by run() once download_video returns, so the slot stays
+            # accounted for while yt-dlp merges or post-processes with ffmpeg.
+            self._finished_info = {'filepath': d.get('info_dict', {}).get('filepath') or d.get('filename'),
+                                   'title': d.get('info_dict', {}).get('title', "Unknown title")}
+            self.progress_signal.emit({'id': self.task_id, 'item_id': self.item_id, 'status': 'postprocessing',
+                                       'message': 'Merging / post-processing...'})
         elif d['status'] == 'error':
             # This error is from within yt-dlp's processing (e.g., ffmpeg postprocessing error)
             self.finished_signal.emit({
@@ -74,6 +106,22 @@ class DownloadWorker(QObject):
             })
             # worker_logger.error(f"DownloadWorker (Task ID: {self.task_id}, Item ID: {self.item_id}): yt-dlp processing error: {d.get('error', 'Unknown')}")
 
+    def _postprocessor_hook(self, d):
+        if d.get('status') == 'finished' and d.get('info_dict', {}).get('filepath'):
+            self._finished_info['filepath'] = d['info_dict']['filepath'] # Final path after merging/extraction
+
+
+    def _emit_playlist_entry(self, item, index):
+        self.playlist_entry_signal.emit({
+            'id': item.get('id', f"playlist_{self.task_id}_item_{index}"),
+            'task_id': f"pl_item_{item.get('id', f'new_{index}')}_{time.time()}",
+            'title': item.get('title', 'N/A'), 'playlist_index': index,
+            'original_url': item.get('original_url'), 'status': 'queued_from_playlist',
+            'playlist_title': item.get('playlist_title', 'Playlist'),
+            'quality': self.quality, 'video_format': self.video_format,
+            'output_path': self.output_path, 'playlist_task_id': self.task_id,
+            'sync': self.task_type == 'playlist_sync'
+        })
 
     def run(self):
         worker_logger.info(f"DownloadWorker (Task ID: {self.task_id}, Item ID: {self.item_id}) started for URL: {self.url}, Type: {self.task_type}")
@@ -82,12 +130,23 @@ class DownloadWorker(QObject):
 
         try:
             if self.task_type == 'single_video_download':
-                success, msg_or_path = downloader.download_video(
+                self.telemetry.start('metadata') # Ends with the first downloaded chunk
+                fetch = downloader.stream_video if self.stream else downloader.download_video
+                success, msg_or_path = fetch(
                     url=self.url, output_path=self.output_path,
                     quality_label=self.quality, preferred_format=self.video_format,
                     progress_hooks=[self._progress_hook], max_retries=2, 
-                    task_id_for_hook=self.task_id 
+                    task_id_for_hook=self.task_id, output_layout=self.output_layout, scratch_dir=self.scratch_dir,
+                    ydl_opts_override={'postprocessor_hooks': [self._postprocessor_hook]}
                 )
+                if success and not self._is_cancelled:
+                    final_status = "completed"; final_message = "Download finished successfully."
+                    self.finished_signal.emit({
+                        'id': self.task_id, 'item_id': self.item_id,
+                        'status': final_status, 'message': final_message,
+                        'filepath': self._finished_info.get('filepath'),
+                        'title': self._finished_info.get('title', "Unknown title")
+                    })
                 if not success and not self._is_cancelled:
                     # This path is hit if download_video itself fails after all retries,
                     # or before starting yt-dlp (e.g. info fetch fails).
@@ -107,22 +166,28 @@ class DownloadWorker(QObject):
                 if playlist_items:
                     for index, item in enumerate(playlist_items):
                         if self._is_cancelled: break
-                        self.playlist_entry_signal.emit({
-                            'id': item.get('id', f"playlist_{self.task_id}_item_{index}"),
-                            'task_id': f"pl_item_{item.get('id', f'new_{index}')}_{time.time()}",
-                            'title': item.get('title', 'N/A'), 'playlist_index': index,
-                            'original_url': item.get('original_url'), 'status': 'queued_from_playlist',
-                            'playlist_title': item.get('playlist_title', 'Playlist'),
-                            'quality': self.quality, 'video_format': self.video_format,
-                            'output_path': self.output_path
-                        })
-                    self.finished_signal.emit({'id': self.task_id, 'item_id': self.item_id, 'status': 'completed', 'message': 'Playlist items fetched.'})
-                else:
+                        self._emit_playlist_entry(item, index)
                     final_status = "completed"; final_message = "Playlist items fetched."
                     self.finished_signal.emit({'id': self.task_id, 'item_id': self.item_id, 'status': final_status, 'message': final_message})
                 else:
                     final_status = "failed"; final_message = "Failed to fetch playlist info."
                     self.finished_signal.emit({'id': self.task_id, 'item_id': self.item_id, 'status': final_status, 'message': final_message})
+
+            elif self.task_type == 'playlist_sync':
+                # Only entries that are not downloaded yet are emitted; see PlaylistSync.
+                url_info = classify_url(self.url) or {}
+                sync = PlaylistSync(self.url, url_info.get('key'), self.output_path, url_info.get('kind', 'playlist'))
+                try:
+                    for item in sync.new_entries():
+                        if self._is_cancelled: break
+                        self._emit_playlist_entry(item, item['playlist_index'])
+                    final_status = "completed"
+                    final_message = f"Sync: {sync.stats['new']} new of {sync.stats['scanned']} scanned" + (" (stopped at known entries)." if sync.stats['stopped_early'] else ".")
+                except Exception as e: # yt-dlp extraction errors
+                    worker_logger.error(f"DownloadWorker (Task ID: {self.task_id}): Playlist sync failed for {self.url}: {e}")
+                    final_status = "failed"; final_message = f"Failed to sync playlist: {e}"
+                if not self._is_cancelled:
+                    self.finished_signal.emit({'id': self.task_id, 'item_id': self.item_id, 'status': final_status, 'message': final_message})
             
             elif self.task_type == 'single_video_info_fetch':
                 video_info = downloader.get_video_info(self.url) 
@@ -160,13 +225,68 @@ class DownloadWorker(QObject):
                     'id': self.task_id, 'item_id': self.item_id,
                     'status': final_status, 'message': final_message, 'filepath': None
                 })
+            if self.task_type == 'single_video_download':
+                get_metrics_registry().record_task(self.telemetry, final_status)
+                self.telemetry_signal.emit({'id': self.task_id, 'status': final_status, **self.telemetry.to_dict()})
             worker_logger.info(f"DownloadWorker (Task ID: {self.task_id}, Item ID: {self.item_id}) finished. Final status: {final_status}. Message: {final_message or 'N/A'}")
 
 
-    def cancel(self):
-        worker_logger.info(f"DownloadWorker (Task ID: {self.task_id}, Item ID: {self.item_id}): Cancellation requested.")
+    def cancel(self, pause=False):
+        """Stops the task. With pause, a download keeps its reserved file name for the resume (see downloader.DownloadPaused)."""
+        worker_logger.info(f"DownloadWorker (Task ID: {self.task_id}, Item ID: {self.item_id}): {'Pause' if pause else 'Cancellation'} requested.")
+        self._pause_requested = pause
         self._is_cancelled = True
 
+class ProcessDownloadWorker(QObject):
+    """
+    Runs a single video download in a DownloadProcessPool worker process. Emits the same
+    signals as a DownloadWorker of type 'single_video_download' (progress itself comes
+    through the progress table), so MainWindow handles both alike; start() replaces
+    running it in a WorkerThread.
+    """
+    progress_signal = pyqtSignal(dict)
+    finished_signal = pyqtSignal(dict)
+    telemetry_signal = pyqtSignal(dict)
+
+    def __init__(self, pool, task_id, url, output_path, quality, video_format, progress_writer, item_id=None, enqueued_at=None, parent=None, stream=False, output_layout='flat', scratch_dir=None):
+        super().__init__(parent)
+        self.pool = pool
+        self.task_id = task_id
+        self.item_id = item_id if item_id else task_id
+        self.url = url
+        self.output_path = output_path
+        self.quality = quality
+        self.video_format = video_format
+        self.progress_writer = progress_writer
+        self.enqueued_at = enqueued_at
+        self.stream = stream
+        self.output_layout = output_layout
+        self.scratch_dir = scratch_dir or None
+
+    def start(self):
+        worker_logger.info(f"ProcessDownloadWorker (Task ID: {self.task_id}) queued for URL: {self.url}")
+        self.pool.submit(self.task_id, self.progress_writer.slot, self.url, self.output_path, self.quality, self.video_format, self.enqueued_at, self._on_pool_event, self.stream, self.output_layout, self.scratch_dir)
+
+    def _on_pool_event(self, event, payload):
+        # Called on the pool's listener thread; the signals are delivered to the GUI thread.
+        if event == 'title':
+            self.progress_signal.emit({'id': self.task_id, 'item_id': self.item_id, 'status': 'title', 'title': payload})
+        elif event == 'status':
+            self.progress_signal.emit({'id': self.task_id, 'item_id': self.item_id, 'status': payload[0], 'message': payload[1]})
+        elif event == 'finished':
+            result = dict(payload); telemetry_data = result.pop('telemetry')
+            self.finished_signal.emit({'id': self.task_id, 'item_id': self.item_id, **result})
+            if telemetry_data:
+                telemetry = TaskTelemetry.from_dict(telemetry_data)
+                get_metrics_registry().record_task(telemetry, result['status'])
+                self.telemetry_signal.emit({'id': self.task_id, 'status': result['status'], **telemetry.to_dict()})
+            worker_logger.info(f"ProcessDownloadWorker (Task ID: {self.task_id}) finished. Final status: {result['status']}. Message: {result['message'] or 'N/A'}")
+            self.deleteLater() # Thread-safe; runs after the queued signals above are delivered
+
+    def cancel(self, pause=False):
+        worker_logger.info(f"ProcessDownloadWorker (Task ID: {self.task_id}): {'Pause' if pause else 'Cancellation'} requested.")
+        self.pool.cancel(self.progress_writer.slot, pause)
+
 # Example of how to use QThread with this QObject based worker
 class WorkerThread(QThread):
     def __init__(self, worker_instance, parent=None):
@@ -175,8 +295,9 @@ class WorkerThread(QThread):
         self.worker.moveToThread(self) # Move the worker object to this thread
         self.started.connect(self.worker.run) # Execute run when thread starts
         # Clean up:
-        self.worker.finished_signal.connect(self.quit) # Make thread quit when worker is done
-        self.worker.finished_signal.connect(self.worker.deleteLater) # Schedule worker for deletion
+        done_signal = self.worker.finished_signal if hasattr(self.worker, 'finished_signal') else self.worker.conversion_finished_signal
+        done_signal.connect(self.quit) # Make thread quit when worker is done
+        done_signal.connect(self.worker.deleteLater) # Schedule worker for deletion
         self.finished.connect(self.deleteLater) # Schedule thread for deletion
 
     def request_cancel(self):
@@ -185,6 +306,7 @@ class WorkerThread(QThread):
 
 # Example usage (for testing, not part of the final app structure directly here)
 if __name__ == '__main__':
+    from PyQt6.QtWidgets import QApplication
     app = QApplication(sys.argv) # Required for QObject based signals even in scripts
 
     def test_progress(data):
@@ -214,13 +336,13 @@ if __name__ == '__main__':
     # sys.exit(app.exec()) # Keep app running if other tests are added below, or manage exit explicitly
 
 # --- Conversion Worker ---
-from src.conversion import converter # Assuming converter.py is in src.conversion
 
 class ConversionWorker(QObject):
     conversion_update_signal = pyqtSignal(dict) 
     conversion_finished_signal = pyqtSignal(dict) 
+    telemetry_signal = pyqtSignal(dict)
 
-    def __init__(self, task_id, input_filepath, output_filepath, target_format, task_subtype='video', quality_options=None, parent=None):
+    def __init__(self, task_id, input_filepath, output_filepath, target_format, task_subtype='video', quality_options=None, parent=None, enqueued_at=None, progress_writer=None, extra_outputs=None, profile=None, target_size_mb=None, normalize_loudness=False, scratch_dir=None):
         super().__init__(parent)
         self.task_id = task_id
         self.input_filepath = input_filepath # Store for logging
@@ -228,16 +350,52 @@ class ConversionWorker(QObject):
         self.target_format = target_format
         self.task_subtype = task_subtype 
         self.quality_options = quality_options if quality_options else {}
+        self.scratch_dir = scratch_dir or None # ffmpeg encodes here; outputs are moved into place when done
         self._is_cancelled = False
+        self._pause_requested = False
+        self._process = None # ffmpeg subprocess of a video/audio conversion, once started
+        self.telemetry = TaskTelemetry(f"{task_subtype}_conversion", task_id, enqueued_at)
+        self.progress_writer = progress_writer # See DownloadWorker
+        self.extra_outputs = extra_outputs or [] # (output_filepath, target_format) encoded in the same ffmpeg run (video/audio only)
+        self.profile = profile # Encoding profile name (conversion.profiles); options given in quality_options take precedence
+        self.target_size_mb = target_size_mb
+        self.normalize_loudness = normalize_loudness # Two-pass EBU R128 loudnorm (conversion.loudness), video/audio only
+        self._loudnorm_options = {}
+
+    def _quality_options_for(self, target_format):
+        """The profile's options for one target, under the explicit quality_options. Raises ValueError (see profile_quality_options)."""
+        if not self.profile:
+            return {**self.quality_options, **self._loudnorm_options}
+        media_info = converter.get_media_info(self.input_filepath) if self.profile == 'size_targeted' else None # Probe cache hit after the prefetch
+        return {**profile_quality_options(self.profile, media_info, self.target_size_mb, target_format.lower() in converter.AUDIO_ONLY_FORMATS), **self.quality_options, **self._loudnorm_options}
+
+    def _measure_loudness(self):
+        """Analysis pass of the loudness normalization, skipped when the file's content was measured before. Raises ValueError."""
+        self.conversion_update_signal.emit({'id': self.task_id, 'type': self.task_subtype, 'status_text': "Measuring loudness...", 'progress_value': None})
+        measurement, cached = get_loudness(self.input_filepath, progress_callback=self._progress_callback_handler)
+        self._process = None # The analysis ffmpeg has exited; only the encode's outputs are removed on cancel
+        if not cached:
+            self.telemetry.add_child_usage(measurement.get('cpu_seconds'), measurement.get('peak_rss_bytes'))
+        self._loudnorm_options = loudnorm_quality_options(measurement)
+        worker_logger.info(f"ConversionWorker (Task ID: {self.task_id}): loudness {measurement['input_i']:.1f} LUFS{' (cached)' if cached else ''}")
 
     def _progress_callback_handler(self, progress_data):
         """Handles progress data from converter.convert_video and emits signals."""
         status = progress_data.get('status')
+        if status in ('finished', 'error'):
+            self.telemetry.add_child_usage(progress_data.get('cpu_seconds'), progress_data.get('peak_rss_bytes'))
+        if status == 'process_started':
+            self._process = progress_data.get('process')
+            if self._is_cancelled: self._kill_process() # Cancelled while ffmpeg was being launched
+            elif self._pause_requested: self._send_signal(signal.SIGSTOP)
+            return
         if self._is_cancelled: 
             # worker_logger.debug(f"ConversionWorker (Task ID: {self.task_id}): Progress callback ignored due to cancellation.")
             return
 
-        if status == 'starting':
+        if status == 'starting' and self.progress_writer:
+            self.progress_writer.update(STATE_CONVERTING, percentage=0)
+        elif status == 'starting':
             # worker_logger.info(f"ConversionWorker (Task ID: {self.task_id}): Received 'starting' status from converter for {self.input_filepath}.")
             self.conversion_update_signal.emit({
                 'id': self.task_id, 'type': self.task_subtype,
@@ -264,59 +422,131 @@ class ConversionWorker(QObject):
         try:
             success = False
             msg_or_path = "An unknown error occurred during conversion worker execution."
-
-            if self.task_subtype == 'image':
+            output_filepaths = None
+            self.telemetry.start('encode')
+            if self.task_subtype in ['video', 'audio'] and self.normalize_loudness:
+                self._measure_loudness()
+
+            if self._is_cancelled: # Cancelled during the loudness analysis
+                msg_or_path = "Conversion cancelled during loudness analysis."
+            elif self.task_subtype == 'image':
                 self.conversion_update_signal.emit({'id': self.task_id, 'status_text': 'Converting image...', 'progress_value': None, 'type': self.task_subtype})
                 success, msg_or_path = converter.convert_image(self.input_filepath, self.output_filepath, self.target_format)
             elif self.task_subtype == 'document':
                 self.conversion_update_signal.emit({'id': self.task_id, 'status_text': 'Converting document...', 'progress_value': None, 'type': self.task_subtype})
                 success, msg_or_path = converter.convert_document(self.input_filepath, self.output_filepath, self.target_format)
+            elif self.task_subtype in ['video', 'audio'] and self.extra_outputs:
+                outputs = [(path, fmt, self._quality_options_for(fmt)) for path, fmt in [(self.output_filepath, self.target_format)] + self.extra_outputs]
+                success, result = converter.convert_video_multi(self.input_filepath, outputs, self._progress_callback_handler, self.scratch_dir)
+                output_filepaths, msg_or_path = (result, result[0]) if success else ([], result)
             elif self.task_subtype in ['video', 'audio']:
-                success, msg_or_path = converter.convert_video(self.input_filepath, self.output_filepath, self.target_format, self.quality_options, self._progress_callback_handler)
+                success, msg_or_path = converter.convert_video(self.input_filepath, self.output_filepath, self.target_format, self._quality_options_for(self.target_format), self._progress_callback_handler, self.scratch_dir)
             else:
                 msg_or_path = f"Unsupported conversion subtype: {self.task_subtype}"; success = False
+            self.telemetry.stop('encode')
+            if success: self.telemetry.bytes = sum(os.path.getsize(p) for p in (output_filepaths or [msg_or_path]) if os.path.exists(p))
             
-            if self._is_cancelled: # Check after potentially long conversion
+            if self._is_cancelled and not success: # Check after potentially long conversion; a cancel that came after a successful encode is too late
                 final_status = "cancelled"; final_message = "Conversion cancelled during operation."
+                if self._process and not self.scratch_dir: # The killed ffmpeg wrote its partial outputs in place; with a scratch dir the converter discarded them
+                    for path in [self.output_filepath] + [p for p, _ in self.extra_outputs]:
+                        if os.path.exists(path): os.remove(path)
             elif success:
-                final_status = "completed"; final_message = f"Successfully converted to {os.path.basename(msg_or_path)}"; output_filepath_on_success = msg_or_path
+                final_status = "completed"; final_message = f"Successfully converted to {', '.join(os.path.basename(p) for p in (output_filepaths or [msg_or_path]))}"; output_filepath_on_success = msg_or_path
             else:
                 final_status = "failed"; final_message = msg_or_path
         
+        except ValueError as e: # Profile options that cannot be met (e.g. a size target without a probed duration), or a failed loudness analysis
+            final_status = "failed"; final_message = str(e)
+            worker_logger.warning(f"ConversionWorker (Task ID: {self.task_id}): {e}")
         except Exception as e:
             final_status = "failed"; final_message = f"Worker error: {str(e)}"
             worker_logger.error(f"ConversionWorker (Task ID: {self.task_id}) encountered an unexpected error: {e}", exc_info=True)
         
         finally: # Emit final signal
-            if self._is_cancelled and final_status != "cancelled": # Ensure cancel status takes precedence if flag is set late
+            if self._is_cancelled and final_status not in ("cancelled", "completed"): # Ensure cancel status takes precedence if flag is set late
                 final_status = "cancelled"; final_message = "Conversion cancelled by user (final check)."
                 worker_logger.info(f"ConversionWorker (Task ID: {self.task_id}) was cancelled (final check).")
 
             self.conversion_finished_signal.emit({
                 'id': self.task_id, 'status': final_status, 
                 'message': final_message, 'output_filepath': output_filepath_on_success, 
-                'type': self.task_subtype
+                'output_filepaths': output_filepaths if final_status == "completed" else None, 'type': self.task_subtype
             })
+            get_metrics_registry().record_task(self.telemetry, final_status)
+            self.telemetry_signal.emit({'id': self.task_id, 'status': final_status, **self.telemetry.to_dict()})
             worker_logger.info(f"ConversionWorker (Task ID: {self.task_id}) finished. Final status: {final_status}. Message: {final_message or 'N/A'}")
 
     def cancel(self):
-        """Requests cancellation of the conversion task."""
-        # This is a basic cancellation flag. If ffmpeg is already running via
-        # ffmpeg.run (blocking), this flag won't stop it.
-        # It's mainly effective if checked before ffmpeg.run starts or if
-        # ffmpeg.run_async was used and process handle available.
+        """Requests cancellation of the conversion task and kills a running (or suspended) ffmpeg."""
         print(f"ConversionWorker: Cancel requested for task {self.task_id}")
         self._is_cancelled = True
-        # If we had a subprocess handle for ffmpeg, we'd try to terminate it here.
-        # self.conversion_update_signal.emit({
-        #     'id': self.task_id,
-        #     'status_text': 'Cancellation requested...',
-        #     'progress_value': None
-        # })
+        self._kill_process()
+
+    def pause(self):
+        """
+        Suspends the ffmpeg process with SIGSTOP, so no encoding work is lost. A pause
+        requested before ffmpeg has started is applied as soon as it starts.
+
+        Returns:
+            bool: False if this conversion cannot be suspended (image/document
+                  conversions, or platforms without SIGSTOP such as Windows).
+        """
+        if self.task_subtype not in ['video', 'audio'] or not hasattr(signal, 'SIGSTOP'):
+            return False
+        self._pause_requested = True
+        if self._process: self._send_signal(signal.SIGSTOP)
+        self.telemetry.stop('encode')
+        worker_logger.info(f"ConversionWorker (Task ID: {self.task_id}) paused.")
+        return True
+
+    def resume(self):
+        """Continues a conversion suspended by pause() (SIGCONT)."""
+        self._pause_requested = False
+        if self._process: self._send_signal(signal.SIGCONT)
+        self.telemetry.start('encode')
+        worker_logger.info(f"ConversionWorker (Task ID: {self.task_id}) resumed.")
+
+    def _send_signal(self, sig):
+        if self._process.returncode is not None: return # Already reaped
+        try: os.kill(self._process.pid, sig)
+        except ProcessLookupError: pass
+
+    def _kill_process(self):
+        if self._process: kill_child(self._process) # SIGKILL also ends a stopped process
+
+
+class EncoderCalibrationWorker(QObject):
+    """Runs the encoder speed calibration (conversion.profiles.EncoderCalibration) off the GUI thread."""
+    progress_signal = pyqtSignal(dict)
+    finished_signal = pyqtSignal(dict)
+
+    def run(self):
+        worker_logger.info("Encoder calibration started.")
+        try:
+            data = get_encoder_calibration().run(progress_callback=lambda name, result: self.progress_signal.emit({'profile': name, **result}))
+            self.finished_signal.emit({'status': 'completed' if data['profiles'] else 'failed', **data})
+        except Exception as e:
+            worker_logger.error(f"Encoder calibration failed: {e}", exc_info=True)
+            self.finished_signal.emit({'status': 'failed', 'message': str(e), 'profiles': {}})
+
+
+class ThumbnailLoader(QObject):
+    """
+    Hands sprite-sheet requests to the thumbnails pool and reports results on the GUI thread.
+
+    ready_signal carries {'id': task ID, 'path': video path, 'sheet': get_sprite_sheet() result or None};
+    it is emitted from a pool thread, so Qt queues it to the loader's (GUI) thread.
+    """
+    ready_signal = pyqtSignal(dict)
+
+    def request(self, task_id, path):
+        thumbnails.request_sprite_sheet(path, callback=lambda sheet: self.ready_signal.emit({'id': task_id, 'path': path, 'sheet': sheet}))
 
 
 if __name__ == '__main__':
     # Keep the existing DownloadWorker test code if needed, or add new tests for ConversionWorker
+    from PyQt6.QtWidgets import QApplication
     app = QApplication(sys.argv)
 
     # Example Test for ConversionWorker (uncomment to run)
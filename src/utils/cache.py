@@ -0,0 +1,228 @@
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Root directory for on-disk caches (ffprobe results, thumbnails, analysis data).
+# Can be redirected with the VERSADOWNLOADER_CACHE_DIR environment variable.
+CACHE_DIR = os.environ.get("VERSADOWNLOADER_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "VersaDownloader")
+# Seconds a JsonStore waits after a change before writing its file, so a burst of changes
+# ends in one write and a crash loses at most this much.
+FLUSH_DELAY = 2.0
+
+
+def get_cache_path(name):
+    """
+    Returns the path of a file or directory inside the cache directory,
+    creating the cache directory itself if needed.
+
+    Args:
+        name (str): File or sub-directory name (e.g., 'probe_cache.json').
+
+    Returns:
+        str: Absolute path inside CACHE_DIR.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, name)
+
+
+def file_key(path):
+    """
+    Builds a cache key identifying the current content of a file without reading it.
+
+    The key is (absolute path, size, mtime in ns, inode), so any rewrite,
+    truncation or replacement of the file yields a different key.
+
+    Args:
+        path (str): Path to an existing file.
+
+    Returns:
+        str: Key string, or None if the file cannot be stat'ed.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}|{st.st_ino}"
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    SHA-1 of a file's bytes, for caches that should follow the content rather than
+    the path (a copied or renamed file keeps its digest). Reads the whole file.
+
+    Args:
+        path (str): Path to an existing file.
+        chunk_size (int): Bytes read per call.
+
+    Returns:
+        str: Hex digest, or None if the file cannot be read.
+    """
+    digest = hashlib.sha1()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def write_json_atomic(path, text):
+    """
+    Replaces path with text (serialized JSON) without ever leaving a partial file.
+
+    The text goes to a uniquely named temporary file next to path, which is fsynced and
+    renamed over it, so concurrent writers (threads or processes) never share the
+    temporary file and the last rename wins.
+
+    Raises:
+        OSError: If the file cannot be written; path is left as it was.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class JsonStore:
+    """
+    Base of the JSON files kept in the cache directory (probe results, download history,
+    playlist sync state, encoder calibration, loudness measurements).
+
+    The file is loaded on first use: methods call _ensure_loaded() with self._lock held.
+    A change is recorded with _mark_dirty(), which schedules flush() flush_delay seconds
+    ahead; flush() writes the file with write_json_atomic and also runs at exit.
+
+    Subclasses implement _restore(stored) (fill the in-memory data from the parsed file),
+    _clear() and _snapshot() (the JSON-serializable data to write).
+    """
+
+    def __init__(self, path, logger, description, flush_delay=FLUSH_DELAY):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._logger = logger
+        self._description = description # e.g. 'probe cache', for log messages
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock() # One write at a time, so an older snapshot never replaces a newer one
+        self._loaded = False
+        self._dirty = False
+        self._flush_timer = None
+        atexit.register(self.flush)
+
+    def _restore(self, stored):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _snapshot(self):
+        raise NotImplementedError
+
+    def _ensure_loaded(self):
+        # Called with self._lock held. Deferred to first use, so importing a module never touches the disk.
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self._restore(json.load(f))
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            self._logger.warning(f"Ignoring unreadable {self._description} {self.path}: {e}")
+            self._clear()
+
+    def _mark_dirty(self):
+        # Called with self._lock held.
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_delay, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self):
+        """Writes the file now if the data changed since the last write."""
+        with self._write_lock:
+            with self._lock:
+                if self._flush_timer:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty:
+                    return
+                text = json.dumps(self._snapshot()) # Serialized under the lock: values may be mutated in place
+                self._dirty = False
+            try:
+                write_json_atomic(self.path, text)
+            except OSError as e:
+                self._logger.error(f"Failed to write {self._description} {self.path}: {e}")
+                with self._lock:
+                    self._dirty = True # Retried by the next flush
+
+
+class DigestIndex(JsonStore):
+    """
+    Remembers the file_digest of each file_key, persisted as JSON, so caches keyed by
+    content read an unchanged file only once. The least recently used entries are
+    dropped beyond max_entries.
+    """
+
+    def __init__(self, path, logger, max_entries=16384):
+        super().__init__(path, logger, 'digest index')
+        self.max_entries = max_entries
+        self._digests = OrderedDict()
+
+    def _restore(self, stored):
+        self._digests.update(stored)
+        self._trim()
+
+    def _clear(self):
+        self._digests.clear()
+
+    def _snapshot(self):
+        return self._digests
+
+    def _trim(self):
+        while len(self._digests) > self.max_entries:
+            self._digests.popitem(last=False)
+
+    def lookup(self, path):
+        """The remembered digest of the file's current content, or None; never reads the file."""
+        key = file_key(path)
+        if key is None:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            digest = self._digests.get(key)
+            if digest is not None:
+                self._digests.move_to_end(key)
+            return digest
+
+    def digest(self, path):
+        """The file's digest, hashing it (see file_digest) only if its file_key is not known yet."""
+        digest = self.lookup(path)
+        if digest is None:
+            digest = file_digest(path)
+            key = file_key(path)
+            if digest is None or key is None:
+                return None
+            with self._lock:
+                self._digests[key] = digest
+                self._trim()
+                self._mark_dirty()
+        return digest
+
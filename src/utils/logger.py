@@ -1,5 +1,9 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 
 # Ensure the logs directory exists
 LOGS_DIR = "logs"
@@ -9,11 +13,172 @@ if not os.path.exists(LOGS_DIR):
 # Keep existing formatter format, it's good.
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(filename)s:%(lineno)d - %(message)s'
 
+# Log files are rotated once they reach LOG_MAX_BYTES; LOG_BACKUP_COUNT old files are kept.
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# All loggers hand their records to one bounded queue that a single writer thread drains,
+# so a slow disk or console never blocks a download worker or the GUI thread.
+LOG_QUEUE_SIZE = 10000
+# Above this fill level DEBUG records are sampled (1 in DEBUG_SAMPLE_RATE is kept).
+LOG_QUEUE_HIGH_WATER = int(LOG_QUEUE_SIZE * 0.75)
+DEBUG_SAMPLE_RATE = 10
+# How long a WARNING-or-above record may wait for room in a full queue before it is dropped.
+LOG_QUEUE_FULL_TIMEOUT = 0.05
+
+def _parse_subsystem_levels(spec):
+    # "Workers=DEBUG,yt_downloader=WARNING" -> {'Workers': 10, 'yt_downloader': 30}
+    levels = {}
+    for part in (spec or "").split(','):
+        name, _, level_name = part.partition('=')
+        level = logging.getLevelName(level_name.strip().upper())
+        if name.strip() and isinstance(level, int):
+            levels[name.strip()] = level
+    return levels
+
+# Per-subsystem level overrides, keyed by the core logger name passed to setup_logger.
+# Set them with the VERSADOWNLOADER_LOG_LEVELS environment variable or set_subsystem_level().
+SUBSYSTEM_LEVELS = _parse_subsystem_levels(os.environ.get("VERSADOWNLOADER_LOG_LEVELS"))
+
+_log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_listener = None
+_listener_lock = threading.Lock()
+_configured_loggers = {}
+
+
+class _BackpressureStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.debug_seen = 0
+        self.dropped = 0
+
+    def add_dropped(self):
+        with self.lock:
+            self.dropped += 1
+
+    def take_dropped(self):
+        with self.lock:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
+
+_stats = _BackpressureStats()
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks the logging thread for long: under back-pressure
+    DEBUG records are sampled, and records that still do not fit are dropped and counted.
+    The destination (file, console) travels with the record to the writer thread.
+    """
+
+    def __init__(self, log_queue, log_file, console_out):
+        super().__init__(log_queue)
+        self.log_file = log_file
+        self.console_out = console_out
+
+    def emit(self, record):
+        try:
+            if record.levelno <= logging.DEBUG and self.queue.qsize() >= LOG_QUEUE_HIGH_WATER:
+                with _stats.lock:
+                    _stats.debug_seen += 1
+                    keep = _stats.debug_seen % DEBUG_SAMPLE_RATE == 0
+                if not keep:
+                    _stats.add_dropped()
+                    return
+            record = self.prepare(record)
+            record.log_file = self.log_file
+            record.console_out = self.console_out
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=LOG_QUEUE_FULL_TIMEOUT)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            _stats.add_dropped()
+        except Exception:
+            self.handleError(record)
+
+
+class _DispatchHandler(logging.Handler):
+    """Runs on the writer thread and routes each record to its rotating file and, optionally, the console."""
+
+    def __init__(self):
+        super().__init__()
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        self.file_handlers = {}
+        self.console_handler = logging.StreamHandler()
+        self.console_handler.setFormatter(self.formatter)
+
+    def _file_handler(self, log_file):
+        handler = self.file_handlers.get(log_file)
+        if handler is None:
+            handler = logging.handlers.RotatingFileHandler(
+                os.path.join(LOGS_DIR, log_file), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True)
+            handler.setFormatter(self.formatter)
+            self.file_handlers[log_file] = handler
+        return handler
+
+    def handle(self, record):
+        log_file = getattr(record, 'log_file', 'application.log')
+        self._file_handler(log_file).handle(record)
+        if getattr(record, 'console_out', False):
+            self.console_handler.handle(record)
+
+        dropped = _stats.take_dropped() if _stats.dropped else 0
+        if dropped:
+            notice = logging.makeLogRecord({
+                'name': 'VersaDownloader.logging', 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"Dropped {dropped} log record(s) under back-pressure.", 'pathname': __file__, 'lineno': 0,
+            })
+            self._file_handler(log_file).handle(notice)
+        return True
+
+    def close(self):
+        for handler in self.file_handlers.values():
+            handler.close()
+        self.console_handler.flush()
+        super().close()
+
+
+def _ensure_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = logging.handlers.QueueListener(_log_queue, _DispatchHandler())
+            _listener.start()
+            atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Stops the writer thread after it has written every queued record."""
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+def set_subsystem_level(name, level):
+    """
+    Changes the level of a subsystem logger at runtime (e.g. set_subsystem_level('Workers', logging.DEBUG)).
+
+    Args:
+        name (str): Core logger name as passed to setup_logger.
+        level (int): New logging level.
+    """
+    SUBSYSTEM_LEVELS[name] = level
+    logger = _configured_loggers.get(name)
+    if logger is not None:
+        logger.setLevel(level)
+
 def setup_logger(name, log_file, level=logging.INFO, console_out=False, logger_name_prefix="VersaDownloader"):
     """
     Sets up a logger that writes to a specified file in the 'logs' directory
     and optionally to the console.
 
+    Records are queued and written by a single background thread (rotating files,
+    see LOG_MAX_BYTES). A level configured for this subsystem in SUBSYSTEM_LEVELS
+    takes precedence over `level`.
+
     Args:
         name (str): Core name of the logger (e.g., 'app_main', 'MainWindow').
         log_file (str): Filename for the log file (e.g., 'application.log').
@@ -28,7 +193,7 @@ def setup_logger(name, log_file, level=logging.INFO, console_out=False, logger_n
     """
     full_logger_name = f"{logger_name_prefix}.{name}" if logger_name_prefix else name
     logger = logging.getLogger(full_logger_name)
-    
+
     # Prevent adding multiple handlers if called repeatedly with the same logger name
     if logger.hasHandlers():
         # If handlers exist, assume it's configured.
@@ -37,22 +202,11 @@ def setup_logger(name, log_file, level=logging.INFO, console_out=False, logger_n
         # For this project, simple "configure once" is fine.
         return logger
 
-    logger.setLevel(level)
-    formatter = logging.Formatter(LOG_FORMAT)
-
-    # File Handler (always active)
-    file_path = os.path.join(LOGS_DIR, log_file)
-    file_handler = logging.FileHandler(file_path)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-
-    # Console Handler (optional)
-    if console_out:
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
-        
+    _ensure_listener()
+    logger.setLevel(SUBSYSTEM_LEVELS.get(name, level))
+    logger.addHandler(_NonBlockingQueueHandler(_log_queue, log_file, console_out))
     logger.propagate = False # Prevent log duplication if root logger is also configured
+    _configured_loggers[name] = logger
 
     return logger
 
@@ -65,11 +219,17 @@ if __name__ == '__main__':
     logger2 = setup_logger('another_module', 'module.log', console_out=False)
     logger2.info("This is an info message for another_module, only to file.")
     logger2.warning("This is a warning message for another_module.")
-    
+
     # Test that calling setup_logger again doesn't add more handlers
     logger1_again = setup_logger('my_app', 'app.log', level=logging.DEBUG, console_out=True)
     logger1_again.info("Testing logger1 again, should not duplicate handlers or messages in console.")
     # Note: With the current simple check, if console_out changed, it wouldn't reconfigure.
     # A more complex setup might remove old handlers and add new ones if config changes.
-    
+
+    # Flood the queue: DEBUG records are sampled/dropped instead of blocking this thread.
+    for i in range(50000):
+        logger1.debug(f"Flood message {i}")
+    set_subsystem_level('my_app', logging.WARNING)
+    logger1.info("Not written: my_app is now at WARNING.")
+
     print(f"Log files should be in the '{os.path.abspath(LOGS_DIR)}' directory.")
@@ -1,5 +1,4 @@
 # import logging # No longer needed directly here if setup_logger handles basicConfig
-from plyer import notification 
 from .logger import setup_logger # Use relative import if logger.py is in the same package/directory
 
 # Setup logger for this module using the standardized setup_logger
@@ -13,6 +12,7 @@ def send_system_notification(title, message, app_name="VersaDownloader", timeout
     (Args documentation remains the same)
     """
     try:
+        from plyer import notification # Deferred: plyer probes platform backends on import
         notif_logger.info(f"Attempting to send notification: Title='{title}', Message='{message}'")
         notification.notify(
             title=title,
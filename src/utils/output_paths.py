@@ -0,0 +1,180 @@
+import os
+import re
+import tempfile
+import time
+
+# Everything but letters, digits and '_' (in any script), spaces and '-'; the same set the
+# character-by-character isalnum() filter kept, as one precompiled pattern.
+UNSAFE_NAME_CHARS = re.compile(r"[^\w \-]+")
+
+# Folder layouts below a download directory, with their labels for the settings dialog.
+OUTPUT_LAYOUTS = {
+    'flat': "Flat (all files in one folder)",
+    'date': "By upload date (YYYY/MM)",
+    'channel': "By channel",
+    'id_prefix': "By video ID prefix",
+}
+DEFAULT_LAYOUT = 'flat'
+# Characters of the video ID that name its folder; 2 gives 64 * 64 folders for YouTube IDs.
+ID_PREFIX_LENGTH = 2
+
+# Extensions of finished downloads; a name is taken while a file with one of them exists.
+MEDIA_EXTENSIONS = ('mp4', 'mkv', 'webm', 'mov', 'avi', 'flv', 'mp3', 'm4a', 'ogg', 'opus', 'aac', 'flac', 'wav')
+# Marker that reserves a file name while its download runs; it holds the owner's ID.
+RESERVATION_SUFFIX = '.reserved'
+MAX_NAME_ATTEMPTS = 1000
+# Folder levels below a download directory that can hold markers: playlist folder plus
+# the deepest layout ('date' adds YYYY/MM).
+RESERVATION_SEARCH_DEPTH = 3
+
+
+def safe_name(title, default='untitled'):
+    """
+    File or folder name for a title: unsafe characters removed, trailing spaces stripped.
+
+    Args:
+        title (str): Video, playlist or channel title (None is treated as empty).
+        default (str): Name used when nothing is left of the title.
+    """
+    return UNSAFE_NAME_CHARS.sub('', title or '').rstrip() or default
+
+
+def layout_directory(output_dir, layout, info):
+    """
+    Directory below output_dir that a download goes to under a layout.
+
+    Args:
+        output_dir (str): Download (or playlist) directory.
+        layout (str): Key of OUTPUT_LAYOUTS; unknown keys are treated as 'flat'.
+        info (dict): Video metadata with 'id', 'channel'/'uploader' and 'upload_date' (YYYYMMDD);
+                     missing values fall back to today's date, 'Unknown channel' and '_'.
+
+    Returns:
+        str: The directory (not created).
+    """
+    if layout == 'date':
+        date = str(info.get('upload_date') or time.strftime('%Y%m%d'))
+        return os.path.join(output_dir, date[:4], date[4:6])
+    if layout == 'channel':
+        return os.path.join(output_dir, safe_name(info.get('channel') or info.get('uploader'), 'Unknown channel'))
+    if layout == 'id_prefix':
+        return os.path.join(output_dir, safe_name(info.get('id'), '_')[:ID_PREFIX_LENGTH])
+    return output_dir
+
+
+def _reservation_owner(marker_path):
+    try:
+        with open(marker_path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _create_marker(marker_path, owner):
+    """
+    Creates a reservation marker that already holds owner, so a concurrent reader never
+    sees it empty: the owner is written to a temporary file that is then hard-linked to
+    marker_path. Where hard links are not supported (e.g. FAT), falls back to O_EXCL.
+
+    Raises:
+        FileExistsError: If the marker exists.
+    """
+    directory = os.path.dirname(marker_path)
+    # Ends in RESERVATION_SUFFIX, so remove_stale_reservations also clears one left by a crash
+    fd, temp_path = tempfile.mkstemp(prefix='.', suffix='.tmp' + RESERVATION_SUFFIX, dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(owner)
+        try:
+            os.link(temp_path, marker_path)
+            return
+        except FileExistsError:
+            raise
+        except OSError: # No hard links on this file system
+            pass
+    finally:
+        os.remove(temp_path)
+    fd = os.open(marker_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    with os.fdopen(fd, 'w') as f:
+        f.write(owner)
+
+
+def reserve_name(directory, stem, owner):
+    """
+    Reserves a file name (without extension) in directory for one download.
+
+    Candidates are stem, "stem (2)", "stem (3)", ... A candidate is reserved by linking
+    its marker file (<name>.reserved) into place with the owner already written, which
+    only one process or thread can do, so concurrent downloads of videos with the same
+    title never share a path. A candidate that has a finished file (see MEDIA_EXTENSIONS)
+    is skipped rather than overwritten. A marker that already holds owner is reused, so a
+    retried or resumed download keeps its name and its .part file.
+
+    The marker is released once the download has finished, so downloading the same video
+    again later does not find its old file by owner: it gets "stem (2)" and the finished
+    file is kept.
+
+    Args:
+        directory (str): Target directory; created if needed.
+        stem (str): Sanitized name (see safe_name).
+        owner (str): ID of the download (e.g. the video ID), stored in the marker.
+
+    Returns:
+        str: The reserved name; release it with release_name once the download has ended.
+
+    Raises:
+        OSError: If the directory cannot be created or no candidate is free.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for attempt in range(1, MAX_NAME_ATTEMPTS + 1):
+        candidate = stem if attempt == 1 else f"{stem} ({attempt})"
+        marker_path = os.path.join(directory, candidate + RESERVATION_SUFFIX)
+        try:
+            _create_marker(marker_path, owner)
+        except FileExistsError:
+            if _reservation_owner(marker_path) == owner:
+                return candidate
+            continue
+        if any(os.path.exists(os.path.join(directory, f"{candidate}.{ext}")) for ext in MEDIA_EXTENSIONS):
+            os.remove(marker_path) # Finished file of an earlier download
+            continue
+        return candidate
+    raise OSError(f"No free file name for '{stem}' in {directory} after {MAX_NAME_ATTEMPTS} attempts")
+
+
+def release_name(directory, name):
+    """Removes the reservation marker of a name; the finished file (if any) keeps the name taken."""
+    try:
+        os.remove(os.path.join(directory, name + RESERVATION_SUFFIX))
+    except FileNotFoundError:
+        pass
+
+
+def remove_stale_reservations(directory, max_age):
+    """
+    Removes reservation markers older than max_age seconds below directory (up to
+    RESERVATION_SEARCH_DEPTH folders deep): those of downloads that crashed, or that were
+    paused and never resumed, and would otherwise push new downloads to "Title (2)".
+
+    Returns:
+        int: Number of markers removed.
+    """
+    if not directory or not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - max_age
+    base_depth = directory.rstrip(os.sep).count(os.sep)
+    removed = 0
+    for root, dirs, files in os.walk(directory):
+        if root.rstrip(os.sep).count(os.sep) - base_depth >= RESERVATION_SEARCH_DEPTH:
+            dirs[:] = [] # Deeper folders are not created by downloads
+        for name in files:
+            if not name.endswith(RESERVATION_SUFFIX):
+                continue
+            path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+    return removed
@@ -0,0 +1,149 @@
+import math
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+
+from .logger import setup_logger
+
+progress_logger = setup_logger('ProgressTable', 'application.log')
+
+# One fixed-size record per task slot:
+# seq (u32), state (u32), downloaded_bytes (i64), total_bytes (i64),
+# percentage, speed, eta, updated_at (f64; time.monotonic(), comparable across processes).
+SLOT_STRUCT = struct.Struct('<IIqqdddd')
+# Enough for every download and conversion the scheduler can run at once, plus paused conversions.
+DEFAULT_SLOTS = 256
+# A reader retries this often when a writer keeps changing a slot; it then skips the slot for this read.
+MAX_READ_ATTEMPTS = 8
+
+STATE_EMPTY = 0
+STATE_DOWNLOADING = 1
+STATE_CONVERTING = 2
+STATE_NAMES = {STATE_EMPTY: 'empty', STATE_DOWNLOADING: 'downloading', STATE_CONVERTING: 'converting'}
+
+_UNKNOWN = float('nan')
+
+
+def _optional_float(value):
+    return _UNKNOWN if value is None or isinstance(value, str) else float(value)
+
+
+class ProgressTable:
+    """
+    Progress of running tasks in a shared-memory array of fixed-size records, one per slot.
+
+    The UI creates the table and hands a slot to each task it starts. The task's worker
+    writes its progress into that slot (from a thread, or from another process that
+    attaches by name), and the UI reads all slots on a timer. Nothing is pickled or queued
+    per progress update; a writer only overwrites its record.
+
+    Each slot has one writer. Records are guarded by a sequence lock: the writer makes
+    the sequence number odd, writes the fields and makes it even again. A reader that
+    sees an odd number, or a different number after reading, read a torn record and
+    tries again.
+    """
+
+    def __init__(self, slots=DEFAULT_SLOTS, name=None, create=True):
+        self.slots = slots
+        self._shm = shared_memory.SharedMemory(name=name, create=create, size=slots * SLOT_STRUCT.size if create else 0)
+        self._owner = create
+        self._buf = self._shm.buf
+        self._free = list(range(slots - 1, -1, -1)) if create else []
+        self._lock = threading.Lock()
+        if create:
+            self._buf[:slots * SLOT_STRUCT.size] = bytes(slots * SLOT_STRUCT.size)
+
+    @classmethod
+    def attach(cls, name, slots=DEFAULT_SLOTS):
+        """
+        Opens a table created by another process, for writing a slot. Meant for worker
+        processes started with multiprocessing: they share the creator's resource tracker,
+        so the segment is not freed when a worker exits.
+        """
+        return cls(slots, name=name, create=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    # --- Slot ownership (creating process) ---
+
+    def allocate(self):
+        """Returns a free slot index with a cleared record, or None if every slot is taken."""
+        with self._lock:
+            if not self._free:
+                return None
+            slot = self._free.pop()
+        self.clear(slot)
+        return slot
+
+    def release(self, slot):
+        """Returns a slot once its writer has finished."""
+        if slot is None:
+            return
+        with self._lock:
+            self._free.append(slot)
+
+    def clear(self, slot):
+        self.write(slot, STATE_EMPTY)
+
+    def in_use(self):
+        with self._lock:
+            return self.slots - len(self._free)
+
+    # --- Writer ---
+
+    def write(self, slot, state, percentage=None, downloaded_bytes=None, total_bytes=None, speed=None, eta=None):
+        """Overwrites a slot's record. Only the slot's single writer may call this."""
+        offset = slot * SLOT_STRUCT.size
+        seq = struct.unpack_from('<I', self._buf, offset)[0]
+        struct.pack_into('<I', self._buf, offset, (seq + 1) & 0xFFFFFFFF) # Odd: write in progress
+        SLOT_STRUCT.pack_into(self._buf, offset, (seq + 1) & 0xFFFFFFFF, state,
+                              -1 if downloaded_bytes is None else int(downloaded_bytes), -1 if total_bytes is None else int(total_bytes),
+                              _optional_float(percentage), _optional_float(speed), _optional_float(eta), time.monotonic())
+        struct.pack_into('<I', self._buf, offset, (seq + 2) & 0xFFFFFFFF)
+
+    # --- Reader ---
+
+    def read(self, slot):
+        """
+        Returns a consistent snapshot of a slot as a dict ('seq', 'state', 'percentage',
+        'downloaded_bytes', 'total_bytes', 'speed', 'eta', 'updated_at'; unknown values are
+        None), or None if the writer kept changing it.
+        """
+        offset = slot * SLOT_STRUCT.size
+        for _ in range(MAX_READ_ATTEMPTS):
+            record = SLOT_STRUCT.unpack_from(self._buf, offset)
+            if record[0] % 2 == 0 and struct.unpack_from('<I', self._buf, offset)[0] == record[0]:
+                seq, state, downloaded, total, percentage, speed, eta, updated_at = record
+                return {'seq': seq, 'state': state, 'downloaded_bytes': None if downloaded < 0 else downloaded,
+                        'total_bytes': None if total < 0 else total,
+                        'percentage': None if math.isnan(percentage) else percentage, 'speed': None if math.isnan(speed) else speed,
+                        'eta': None if math.isnan(eta) else eta, 'updated_at': updated_at}
+        return None
+
+    def seq(self, slot):
+        """Sequence number of a slot; unchanged means the record was not written since it was last read."""
+        return struct.unpack_from('<I', self._buf, slot * SLOT_STRUCT.size)[0]
+
+    def close(self):
+        """Detaches from the segment; the creating process also frees it."""
+        self._buf = None
+        try:
+            self._shm.close()
+            if self._owner:
+                self._shm.unlink()
+        except (BufferError, FileNotFoundError) as e:
+            progress_logger.warning(f"Progress table {self._shm.name} not released cleanly: {e}")
+
+
+class ProgressWriter:
+    """A worker's handle on its slot, so workers do not deal with slot indices."""
+
+    def __init__(self, table, slot):
+        self.table = table
+        self.slot = slot
+
+    def update(self, state, **fields):
+        self.table.write(self.slot, state, **fields)
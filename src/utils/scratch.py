@@ -0,0 +1,118 @@
+import errno
+import hashlib
+import os
+import shutil
+import time
+
+from .logger import setup_logger
+from .output_paths import safe_name, remove_stale_reservations
+
+scratch_logger = setup_logger('Scratch', 'application.log')
+
+# Files in the scratch directory untouched for this long are left over from a crash or an
+# abandoned paused download and are removed by cleanup_orphans.
+ORPHAN_MAX_AGE = 24 * 3600
+# Suffix of a cross-device copy in progress at the destination.
+COPY_SUFFIX = '.partial'
+
+
+def download_scratch_dir(scratch_dir, owner):
+    """
+    yt-dlp temp directory of one download (its .part, fragment and pre-merge files).
+
+    One folder per owner (video ID), so downloads of different videos with the same title
+    never share part files, and a resumed download finds its own.
+    """
+    return os.path.join(scratch_dir, 'downloads', safe_name(owner, '_'))
+
+
+def scratch_file_for(output_file_path, scratch_dir):
+    """
+    Path in scratch_dir that an encoder writes output_file_path to before it is moved into
+    place with move_into_place. The name keeps the extension and is unique per destination.
+    """
+    digest = hashlib.sha1(os.path.abspath(output_file_path).encode('utf-8')).hexdigest()[:12]
+    folder = os.path.join(scratch_dir, 'conversions')
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{digest}-{os.path.basename(output_file_path)}")
+
+
+def move_into_place(scratch_file, output_file_path):
+    """
+    Moves a finished file from the scratch directory to its destination.
+
+    A rename when both are on one filesystem. Otherwise the file is copied to
+    <destination>.partial and renamed, so the destination never holds half a file, and
+    the scratch copy is removed afterwards.
+
+    Raises:
+        OSError: If the file cannot be moved (the scratch file is kept).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_file_path)), exist_ok=True)
+    try:
+        os.replace(scratch_file, output_file_path)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    tmp_path = output_file_path + COPY_SUFFIX
+    try:
+        shutil.copyfile(scratch_file, tmp_path)
+        os.replace(tmp_path, output_file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    os.remove(scratch_file)
+
+
+def discard(path):
+    """Removes a scratch file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        scratch_logger.warning(f"Could not remove scratch file {path}: {e}")
+
+
+def cleanup_orphans(scratch_dir, max_age=ORPHAN_MAX_AGE, download_dir=None):
+    """
+    Removes files in scratch_dir not modified for max_age seconds, then empty folders, and
+    file name reservations older than max_age below download_dir (see
+    output_paths.remove_stale_reservations).
+
+    Meant for startup: data of running downloads and conversions is written continuously,
+    so only leftovers of crashed or abandoned tasks are old enough to go.
+
+    Returns:
+        Tuple (files_removed, bytes_freed) for scratch_dir
+    """
+    markers = remove_stale_reservations(download_dir, max_age) if download_dir else 0
+    if markers:
+        scratch_logger.info(f"Removed {markers} stale file name reservation(s) from {download_dir}")
+    if not scratch_dir or not os.path.isdir(scratch_dir):
+        return 0, 0
+    cutoff = time.time() - max_age
+    removed = freed = 0
+    for root, dirs, files in os.walk(scratch_dir, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+                if stat.st_mtime < cutoff:
+                    os.remove(path)
+                    removed += 1
+                    freed += stat.st_size
+            except OSError as e:
+                scratch_logger.warning(f"Could not remove orphaned scratch file {path}: {e}")
+        if root != scratch_dir:
+            try:
+                os.rmdir(root) # Only succeeds once the folder is empty
+            except OSError:
+                pass
+    if removed:
+        scratch_logger.info(f"Removed {removed} orphaned scratch file(s) ({freed / 1024 / 1024:.1f} MB) from {scratch_dir}")
+    return removed, freed
@@ -0,0 +1,239 @@
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+
+# Phases a task can go through. Downloads use queue_wait/metadata/transfer/postprocess,
+# media conversions queue_wait/encode; image and document conversions only queue_wait/encode.
+PHASES = ('queue_wait', 'metadata', 'transfer', 'postprocess', 'encode')
+# Number of most recent samples kept per (kind, metric) for the rolling percentiles.
+WINDOW_SIZE = 500
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class TaskTelemetry:
+    """
+    Phase timings, bytes and child-process resource usage of a single task.
+
+    Phases are timed with time.monotonic(); a phase that is started several times
+    (e.g. the video and audio streams of one download) accumulates.
+    """
+
+    def __init__(self, kind, task_id=None, enqueued_at=None):
+        self.kind = kind
+        self.task_id = task_id
+        self.phases = {}
+        self._open = {}
+        self.bytes = 0
+        self.cpu_seconds = None
+        self.peak_rss_bytes = None
+        if enqueued_at is not None: # Wall-clock timestamp from the queue record
+            self.phases['queue_wait'] = max(time.time() - enqueued_at, 0.0)
+
+    def start(self, phase):
+        self._open.setdefault(phase, time.monotonic())
+
+    def stop(self, phase):
+        started = self._open.pop(phase, None)
+        if started is not None:
+            self.phases[phase] = self.phases.get(phase, 0.0) + time.monotonic() - started
+
+    def stop_all(self):
+        for phase in list(self._open):
+            self.stop(phase)
+
+    def is_running(self, phase):
+        return phase in self._open
+
+    def add_child_usage(self, cpu_seconds, peak_rss_bytes):
+        """Adds the rusage of a finished child process (ffmpeg). None values are ignored."""
+        if cpu_seconds is not None:
+            self.cpu_seconds = (self.cpu_seconds or 0.0) + cpu_seconds
+        if peak_rss_bytes is not None:
+            self.peak_rss_bytes = max(self.peak_rss_bytes or 0, peak_rss_bytes)
+
+    def to_dict(self):
+        return {'kind': self.kind, 'task_id': self.task_id, 'phases': dict(self.phases), 'bytes': self.bytes,
+                'cpu_seconds': self.cpu_seconds, 'peak_rss_bytes': self.peak_rss_bytes}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuilds a finished task's telemetry from to_dict() output (e.g. sent by a worker process)."""
+        telemetry = cls(data['kind'], data.get('task_id'))
+        telemetry.phases = dict(data.get('phases') or {})
+        telemetry.bytes = data.get('bytes') or 0
+        telemetry.cpu_seconds, telemetry.peak_rss_bytes = data.get('cpu_seconds'), data.get('peak_rss_bytes')
+        return telemetry
+
+
+def wait_with_rusage(process):
+    """
+    Reads the stderr of a subprocess.Popen to EOF and reaps it with os.wait4, so the
+    CPU time and peak RSS of that one child are known even when several run at once.
+
+    Falls back to communicate() (no usage figures) where os.wait4 is unavailable, and to
+    the exit code Popen already collected if something else reaped the child first.
+
+    Returns:
+        Tuple (stderr_bytes, cpu_seconds_or_None, peak_rss_bytes_or_None); process.returncode is set.
+    """
+    if not hasattr(os, 'wait4'):
+        _, err = process.communicate()
+        return err or b'', None, None
+    err = process.stderr.read() if process.stderr else b''
+    if process.stderr:
+        process.stderr.close()
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    except ChildProcessError: # Reaped by Popen.poll()/wait() on another thread; its usage figures are gone
+        process.wait() # Returns the exit code Popen collected when it reaped the child
+        return err, None, None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    rss_unit = 1 if sys.platform == 'darwin' else 1024 # ru_maxrss is in bytes on macOS, KiB elsewhere
+    return err, usage.ru_utime + usage.ru_stime, usage.ru_maxrss * rss_unit
+
+
+def kill_child(process):
+    """
+    Kills a subprocess.Popen that another thread is waiting on with wait_with_rusage().
+
+    Popen.kill() polls the child first and can reap it, which would take the exit status
+    and usage figures away from wait_with_rusage(); this sends SIGKILL without reaping.
+    """
+    if process.returncode is not None:
+        return
+    try:
+        if hasattr(os, 'wait4'):
+            os.kill(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError: # Already exited
+        pass
+
+
+def _percentile(ordered, q):
+    index = min(int(q * len(ordered)), len(ordered) - 1)
+    return ordered[index]
+
+
+class MetricsRegistry:
+    """
+    Thread-safe aggregate of finished tasks: rolling windows of phase durations and
+    resource figures per task kind, plus running totals.
+    """
+
+    def __init__(self, window=WINDOW_SIZE):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._counters = {}
+
+    def observe(self, kind, metric, value):
+        if value is None:
+            return
+        with self._lock:
+            samples = self._samples.get((kind, metric))
+            if samples is None:
+                samples = self._samples[(kind, metric)] = deque(maxlen=self.window)
+            samples.append(float(value))
+
+    def increment(self, kind, name, value=1):
+        with self._lock:
+            self._counters[(kind, name)] = self._counters.get((kind, name), 0) + value
+
+    def record_task(self, telemetry, status):
+        """Adds a finished task's TaskTelemetry to the windows and totals."""
+        telemetry.stop_all()
+        for phase, seconds in telemetry.phases.items():
+            self.observe(telemetry.kind, phase, seconds)
+        if telemetry.bytes:
+            self.observe(telemetry.kind, 'bytes', telemetry.bytes)
+            self.increment(telemetry.kind, 'bytes_total', telemetry.bytes)
+        if telemetry.cpu_seconds is not None:
+            self.observe(telemetry.kind, 'cpu_seconds', telemetry.cpu_seconds)
+            self.increment(telemetry.kind, 'cpu_seconds_total', telemetry.cpu_seconds)
+        self.observe(telemetry.kind, 'peak_rss_bytes', telemetry.peak_rss_bytes)
+        self.increment(telemetry.kind, f"tasks_{status}")
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {'summaries': {kind: {metric: {'count', 'mean', 'p50', 'p90', 'p99', 'max'}}},
+                   'counters': {kind: {name: value}}}
+        """
+        with self._lock:
+            samples = {key: sorted(values) for key, values in self._samples.items() if values}
+            counters = dict(self._counters)
+        summaries = {}
+        for (kind, metric), ordered in samples.items():
+            summary = {'count': len(ordered), 'mean': sum(ordered) / len(ordered), 'max': ordered[-1]}
+            for q in QUANTILES:
+                summary[f"p{int(q * 100)}"] = _percentile(ordered, q)
+            summaries.setdefault(kind, {})[metric] = summary
+        totals = {}
+        for (kind, name), value in counters.items():
+            totals.setdefault(kind, {})[name] = value
+        return {'summaries': summaries, 'counters': totals}
+
+    def to_json(self):
+        data = self.snapshot()
+        data['timestamp'] = time.time()
+        data['window'] = self.window
+        return json.dumps(data, indent=2)
+
+    def to_prometheus(self):
+        """Renders the snapshot in the Prometheus text exposition format."""
+        data = self.snapshot()
+        lines = []
+
+        def _summary(name, help_text, entries):
+            if not entries:
+                return
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} summary")
+            for labels, summary in entries:
+                for q in QUANTILES:
+                    lines.append(f'{name}{{{labels},quantile="{q}"}} {summary[f"p{int(q * 100)}"]:.6g}')
+                lines.append(f"{name}_sum{{{labels}}} {summary['mean'] * summary['count']:.6g}")
+                lines.append(f"{name}_count{{{labels}}} {summary['count']}")
+
+        summaries = data['summaries']
+        _summary('versadownloader_task_phase_seconds', f"Task phase durations over the last {self.window} tasks.",
+                 [(f'kind="{kind}",phase="{metric}"', s) for kind, metrics in summaries.items() for metric, s in metrics.items() if metric in PHASES])
+        _summary('versadownloader_task_bytes', "Bytes transferred or written per task.",
+                 [(f'kind="{kind}"', metrics['bytes']) for kind, metrics in summaries.items() if 'bytes' in metrics])
+        _summary('versadownloader_child_cpu_seconds', "CPU seconds of ffmpeg child processes per task.",
+                 [(f'kind="{kind}"', metrics['cpu_seconds']) for kind, metrics in summaries.items() if 'cpu_seconds' in metrics])
+        _summary('versadownloader_child_peak_rss_bytes', "Peak resident set size of ffmpeg child processes per task.",
+                 [(f'kind="{kind}"', metrics['peak_rss_bytes']) for kind, metrics in summaries.items() if 'peak_rss_bytes' in metrics])
+
+        task_lines = [f'versadownloader_tasks_total{{kind="{kind}",status="{name[len("tasks_"):]}"}} {value}'
+                      for kind, names in data['counters'].items() for name, value in names.items() if name.startswith('tasks_')]
+        if task_lines:
+            lines += ["# HELP versadownloader_tasks_total Finished tasks by final status.", "# TYPE versadownloader_tasks_total counter"] + task_lines
+        for counter, help_text in (('bytes_total', "Bytes transferred or written."), ('cpu_seconds_total', "CPU seconds used by ffmpeg child processes.")):
+            counter_lines = [f'versadownloader_{counter}{{kind="{kind}"}} {names[counter]:.6g}' for kind, names in data['counters'].items() if counter in names]
+            if counter_lines:
+                lines += [f"# HELP versadownloader_{counter} {help_text}", f"# TYPE versadownloader_{counter} counter"] + counter_lines
+        return "\n".join(lines) + "\n"
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry():
+    """Returns the process-wide MetricsRegistry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry